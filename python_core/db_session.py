@@ -1,11 +1,128 @@
+"""
+Schema versions: schema.sql declares `-- schema_version: N` in its first
+lines and is always the complete current schema, which is all a new database
+needs. A database records the version it was brought to in PRAGMA
+user_version, and a session whose database is current runs no DDL at all.
+
+An older database gets the MIGRATIONS steps above its version, in order,
+then schema.sql (for new tables, indexes and views; everything in it is
+IF NOT EXISTS or DROP + CREATE), then the new user_version. Migrations only
+hold what schema.sql can't do on an existing database, like adding columns.
+Version 0 is every database from before versioning.
+"""
+
 import sqlite3
 import os
+import re
+import hashlib
 import logging
 import json
+from contextlib import contextmanager
 import python_core.utils.safe_file_utils as safefileutils
 from python_core.utils.pyodide_utils import get_config_value
 
 
+SCHEMA_VERSION_RE = re.compile(r"^--\s*schema_version:\s*(\d+)", re.MULTILINE)
+
+
+def add_column(table: str, column: str, col_type: str):
+    """Migration step; a no-op if the table doesn't exist yet or already has the column."""
+
+    def step(conn: sqlite3.Connection) -> None:
+        # read from the cursor description so it works with any row_factory
+        try:
+            cursor = conn.execute(f"SELECT * FROM {table} LIMIT 0")
+        except sqlite3.OperationalError:
+            return  # created by schema.sql with the column
+        if column not in {col[0] for col in cursor.description}:
+            print(f"[DBSession] Adding column {table}.{column}")
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+
+    return step
+
+
+# (version, steps): each step is SQL text or a callable taking the connection;
+# webapp/src/database/sqlite-worker.js repeats the add_column steps
+MIGRATIONS = (
+    (
+        1,
+        [
+            add_column("uploaded_files", "raw_keys", "JSONTEXT"),
+            add_column("raw_data", "encoding", "TEXT"),
+        ],
+    ),
+    (2, [add_column("uploaded_files", "config_digest", "TEXT")]),
+    (
+        3,
+        [
+            add_column(
+                "events",
+                "duplicate_of",
+                "TEXT REFERENCES events(id) ON DELETE SET NULL",
+            )
+        ],
+    ),
+)
+
+
+def read_schema(schema_path: str) -> tuple:
+    """(declared version, SQL text) of schema.sql."""
+    with open(schema_path, "r", encoding="utf-8") as f:
+        sql = f.read()
+    match = SCHEMA_VERSION_RE.search(sql)
+    if match is None:
+        raise ValueError(f"No '-- schema_version: N' line in {schema_path}")
+    return int(match.group(1)), sql
+
+
+# the DatabaseSession opened by pipeline_session(), reused by sessions inside it
+_pipeline = None
+
+FLUSH_CHUNK = 64 * 1024  # granularity of the changed-pages flush
+
+# bulk_load sessions: no rollback journal on disk (OPFS has no WAL), no syncs,
+# a 64 MiB page cache and in-memory temp b-trees
+BULK_PRAGMAS = (
+    ("journal_mode", "MEMORY"),
+    ("synchronous", "OFF"),
+    ("cache_size", -64 * 1024),
+    ("temp_store", "MEMORY"),
+)
+
+
+_DML = re.compile(r"\s*(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+class _Connection(sqlite3.Connection):
+    """
+    While defer_foreign_keys is set, opens the transaction itself before a DML
+    statement (where sqlite3 would issue its implicit BEGIN) and sets PRAGMA
+    defer_foreign_keys inside it: SQLite switches the pragma off whenever a
+    transaction ends, even the read transaction of an autocommit SELECT.
+    """
+
+    defer_foreign_keys = False
+
+    def _begin(self, sql: str) -> None:
+        if self.defer_foreign_keys and not self.in_transaction and _DML.match(sql):
+            super().execute("BEGIN")
+            super().execute("PRAGMA defer_foreign_keys = ON")
+
+    def execute(self, sql, *args):
+        self._begin(sql)
+        return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        self._begin(sql)
+        return super().executemany(sql, *args)
+
+
+def _pragma(conn: sqlite3.Connection, name: str):
+    cursor = conn.cursor()
+    cursor.row_factory = None  # whatever the session's row factory
+    return cursor.execute(f"PRAGMA {name}").fetchone()[0]
+
+
 def dict_factory(cursor: sqlite3.Cursor, row: tuple, json_columns: set = None) -> dict:
     d = {}
     for idx, col in enumerate(cursor.description):
@@ -29,7 +146,17 @@ class DatabaseSession:
         schema_path: str = None,
         use_dict_factory: bool = False,
         json_columns: list = None,
+        bulk_load: bool = False,
+        defer_foreign_keys: bool = False,
     ) -> None:
+        """
+        bulk_load applies BULK_PRAGMAS for the session and runs PRAGMA optimize
+        after it. It trades crash safety for speed (no journal on disk, no
+        syncs), so it is for callers that opt in. defer_foreign_keys checks
+        foreign keys when each transaction commits instead of per statement
+        (PRAGMA defer_foreign_keys); actions like ON DELETE CASCADE still run,
+        and a commit that would leave a violation fails.
+        """
         self.db_path_orig = db_path or get_config_value("DB_PATH")
         self.db_path_target = None
         self.schema_path = schema_path or get_config_value("SCHEMA_PATH")
@@ -42,6 +169,46 @@ class DatabaseSession:
         self.conn = None
         self.logger = logging.getLogger(__name__)
 
+        self._joined = False  # using the pipeline_session() connection
+        self._saved_row_factory = None
+        self._chunk_hashes = None  # of the mirrored OPFS file, for the changed-pages flush
+        self.bulk_load = bulk_load
+        self.defer_foreign_keys = defer_foreign_keys
+        self._restore_pragmas = None
+        self._saved_defer_foreign_keys = False
+
+    def _begin_bulk_load(self) -> None:
+        """Applies the bulk pragmas, remembering the current values for _end_bulk_load."""
+        if self.conn.in_transaction:
+            self.conn.commit()  # journal_mode is fixed inside one
+        pragmas = BULK_PRAGMAS if self.bulk_load else ()
+        self._restore_pragmas = [(name, _pragma(self.conn, name)) for name, _ in pragmas]
+        for name, value in pragmas:
+            self.conn.execute(f"PRAGMA {name} = {value}")
+        if self.defer_foreign_keys:
+            self._saved_defer_foreign_keys = self.conn.defer_foreign_keys
+            self.conn.defer_foreign_keys = True
+
+    def _end_bulk_load(self, ok: bool) -> None:
+        """Restores the pragmas of before _begin_bulk_load; ok: the session succeeded."""
+        if self.defer_foreign_keys:
+            self.conn.defer_foreign_keys = self._saved_defer_foreign_keys
+        if self.conn.in_transaction:
+            self.conn.rollback()  # the session has committed or failed by now
+        for name, value in self._restore_pragmas:
+            self.conn.execute(f"PRAGMA {name} = {value}")
+        self._restore_pragmas = None
+        if ok and self.bulk_load:
+            self.conn.execute("PRAGMA optimize")
+
+    def _set_row_factory(self) -> None:
+        if self.use_dict_factory:
+            self.conn.row_factory = lambda cursor, row: dict_factory(
+                cursor, row, self.json_columns
+            )
+        else:
+            self.conn.row_factory = None  # tuples, used in worker bc more efficient
+
     def _wrap_json_serialization(self) -> None:
         orig_execute = self.conn.execute
         orig_executemany = self.conn.executemany
@@ -68,6 +235,24 @@ class DatabaseSession:
                     params[col] = json.dumps(val)
         return params
 
+    def _ensure_schema(self) -> None:
+        current = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        version, sql = read_schema(self.schema_path)
+        if current >= version:
+            return
+
+        print(f"[DBSession] Upgrading schema from version {current} to {version}")
+        for step_version, steps in MIGRATIONS:
+            if current < step_version <= version:
+                for step in steps:
+                    if callable(step):
+                        step(self.conn)
+                    else:
+                        self.conn.executescript(step)
+        self.conn.executescript(sql)
+        self.conn.execute(f"PRAGMA user_version = {version}")
+        self.conn.commit()
+
     def _firefox_workaround_opfs_to_memfs(self) -> str:
         """Workaround: Mirror OPFS to internal MEMFS to avoid Firefox stat() crash"""
         os.makedirs("/tmp", exist_ok=True)
@@ -76,6 +261,8 @@ class DatabaseSession:
             db_bytes = safefileutils.read_bytes(self.db_path_orig)
             with open(self.firefox_internal_temp_path, "wb") as dst:
                 dst.write(db_bytes)
+            if get_config_value("FIREFOX_FLUSH_CHANGED_PAGES", default=False):
+                self._chunk_hashes = _chunk_hashes(db_bytes)
         else:
             # Create an empty file to ensure it exists for Firefox
             with open(self.firefox_internal_temp_path, "wb") as dst:
@@ -87,6 +274,14 @@ class DatabaseSession:
         if self.firefox_internal_temp_path and safefileutils.exists(
             self.firefox_internal_temp_path
         ):
+            if self._chunk_hashes is not None:
+                try:
+                    self._flush_changed_chunks()
+                    os.remove(self.firefox_internal_temp_path)
+                    self.firefox_internal_temp_path = None
+                    return
+                except OSError as e:
+                    print(f"[DBSession] Changed-pages flush failed ({e}), writing all")
             with (
                 open(self.firefox_internal_temp_path, "rb") as src,
                 open(self.db_path_orig, "wb") as dst,
@@ -95,7 +290,33 @@ class DatabaseSession:
             os.remove(self.firefox_internal_temp_path)
             self.firefox_internal_temp_path = None
 
+    def _flush_changed_chunks(self) -> None:
+        """Writes back only the FLUSH_CHUNK-sized ranges whose hash changed since mirroring."""
+        with open(self.firefox_internal_temp_path, "rb") as src:
+            db_bytes = src.read()
+        written = 0
+        with open(self.db_path_orig, "r+b") as dst:
+            for i, digest in enumerate(_chunk_hashes(db_bytes)):
+                if i < len(self._chunk_hashes) and self._chunk_hashes[i] == digest:
+                    continue
+                dst.seek(i * FLUSH_CHUNK)
+                dst.write(db_bytes[i * FLUSH_CHUNK : (i + 1) * FLUSH_CHUNK])
+                written += 1
+            dst.truncate(len(db_bytes))
+        print(
+            f"[DBSession] Flushed {written} of {-(-len(db_bytes) // FLUSH_CHUNK)} changed chunks to OPFS"
+        )
+
     def __enter__(self) -> sqlite3.Connection:
+        if _pipeline is not None and _pipeline.db_path_orig == self.db_path_orig:
+            # schema, mirror and flush belong to the pipeline session
+            self._joined = True
+            self.conn = _pipeline.conn
+            self._saved_row_factory = self.conn.row_factory
+            self._set_row_factory()
+            if self.bulk_load or self.defer_foreign_keys:
+                self._begin_bulk_load()
+            return self.conn
 
         try:
             if self.is_firefox:
@@ -113,16 +334,13 @@ class DatabaseSession:
                 self.db_path_target = self.db_path_orig
 
             self.conn = sqlite3.connect(
-                self.db_path_target, timeout=10.0, check_same_thread=False
+                self.db_path_target,
+                timeout=10.0,
+                check_same_thread=False,
+                factory=_Connection,
             )
             print(f"[DB] Successfully connected to {self.db_path_target}")
 
-            if self.use_dict_factory:
-                self.conn.row_factory = lambda cursor, row: dict_factory(
-                    cursor, row, self.json_columns
-                )
-            # else: defaults to tuple, used in worker bc more efficient
-
             self.conn.execute("PRAGMA journal_mode = DELETE; ")
             self.conn.execute("PRAGMA foreign_keys = ON;")
 
@@ -131,12 +349,11 @@ class DatabaseSession:
                     raise FileNotFoundError(
                         f"Schema file not found at: {self.schema_path}"
                     )
+                self._ensure_schema()
 
-                with open(self.schema_path, "r", encoding="utf-8") as f:
-                    self.conn.executescript(f.read())
-
-                self.conn.commit()
-
+            self._set_row_factory()
+            if self.bulk_load or self.defer_foreign_keys:
+                self._begin_bulk_load()
             return self.conn
 
         except Exception as e:
@@ -153,10 +370,24 @@ class DatabaseSession:
             raise e
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._joined:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+            if self._restore_pragmas is not None:
+                self._end_bulk_load(exc_type is None)
+            self.conn.row_factory = self._saved_row_factory
+            self.conn = None
+            self._joined = False
+            return
+
         if self.conn:
             try:
                 if exc_type is None:
                     self.conn.commit()
+                if self._restore_pragmas is not None:
+                    self._end_bulk_load(exc_type is None)
                 self.conn.close()
 
                 if self.is_firefox:
@@ -172,3 +403,86 @@ class DatabaseSession:
                 import traceback
 
                 traceback.print_exc()
+
+
+def _chunk_hashes(db_bytes: bytes) -> list:
+    return [
+        hashlib.sha1(db_bytes[i : i + FLUSH_CHUNK]).digest()
+        for i in range(0, len(db_bytes), FLUSH_CHUNK)
+    ]
+
+
+def _row_estimate(conn: sqlite3.Connection, table: str) -> int:
+    """Rows in a rowid table, from its largest rowid: a b-tree seek, not a scan."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+
+
+@contextmanager
+def deferred_indexes(conn: sqlite3.Connection, tables: tuple, expected_rows: int = 0):
+    """
+    Drops the secondary indexes of `tables` for the duration of a bulk insert
+    and rebuilds them afterwards (also if the load fails), so the load appends
+    to the tables' b-trees without index maintenance per row. Rebuilding costs
+    a pass over the whole table, so a table is only included while it holds
+    no more rows than the load is expected to add (by default: while empty).
+    Implicit indexes (PRIMARY KEY, UNIQUE) stay. Only for loads that don't
+    query these tables by the dropped indexes meanwhile. Statistics are left
+    to PRAGMA optimize, which bulk_load sessions run on exit.
+    """
+    tables = tuple(t for t in tables if _row_estimate(conn, t) <= expected_rows)
+    placeholders = ",".join("?" * len(tables))
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    indexes = cursor.execute(
+        f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+        """,
+        tables,
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        for _, sql in indexes:
+            conn.execute(sql)
+        conn.commit()
+        if indexes:
+            print(f"[DBSession] Rebuilt {len(indexes)} deferred indexes on {', '.join(tables)}")
+
+
+@contextmanager
+def pipeline_session(db_path: str = None, schema_path: str = None):
+    """
+    One connection for a whole pipeline run: every DatabaseSession on the same
+    db_path opened inside it reuses this connection (with its own row factory)
+    instead of connecting, checking the schema and, on Firefox, copying the
+    whole database from OPFS to MEMFS and back again. The mirror is made once
+    here and flushed once on the way out. Stages commit as before; if one
+    fails, what earlier stages committed is still flushed.
+    """
+    global _pipeline
+    if _pipeline is not None:  # nested: the outer one does the work
+        yield _pipeline.conn
+        return
+
+    session = DatabaseSession(db_path, schema_path)
+    conn = session.__enter__()
+    _pipeline = session
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _pipeline = None
+        session.__exit__(None, None, None)
@@ -12,8 +12,11 @@ from . import profiles
 from python_core.utils.pyodide_utils import get_config_value
 
 
-def group(upload_id: str, db_path: str = None) -> None:
+def group(upload_id: str, db_path: str = None, bulk_load: bool = None) -> None:
+    """bulk_load (default: the BULK_LOAD config value): see DatabaseSession."""
     db_path = db_path or get_config_value("DB_PATH")
+    if bulk_load is None:
+        bulk_load = bool(get_config_value("BULK_LOAD", default=False))
     json_columns = [
         "attributes",
         "origins",
@@ -26,7 +29,10 @@ def group(upload_id: str, db_path: str = None) -> None:
     ]
 
     with DatabaseSession(
-        db_path, use_dict_factory=True, json_columns=json_columns
+        db_path,
+        use_dict_factory=True,
+        json_columns=json_columns,
+        bulk_load=bulk_load,
     ) as conn:
         events_df, devices_df = _deduplicate_and_fetch_inputs(conn, upload_id)
         if events_df.empty and devices_df.empty:
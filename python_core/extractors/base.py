@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 
 
 class BaseParser(ABC):
@@ -26,3 +26,13 @@ class BaseParser(ABC):
         config: The 'parser' section from the YAML manifest (e.g., {'json_root': '...'})
         """
         pass
+
+    def iter_records(
+        self, content: str, config: Optional[Dict] = None, filepath: str = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming counterpart of extract(), used by extractors.worker.
+        Parsers that can emit records incrementally override this as a generator;
+        the default just walks the list built by extract().
+        """
+        yield from self.extract(content, config, filepath)
@@ -1,9 +1,8 @@
-import pandas as pd
 import io
-import csv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from .base import BaseParser
 from python_core.errors import FileLevelError
+from python_core.utils.csv_utils import iter_csv_records
 
 
 class CSVParser(BaseParser):
@@ -11,24 +10,22 @@ class CSVParser(BaseParser):
     def extract(
         cls, content: str, config: Optional[Dict] = None, filepath: str = None
     ) -> List[Dict[str, Any]]:
+        return list(cls.iter_records(content, config, filepath))
+
+    @classmethod
+    def iter_records(
+        cls, content: str, config: Optional[Dict] = None, filepath: str = None
+    ) -> Iterator[Dict[str, Any]]:
         config = config or {}
         if not content or not content.strip():
             raise FileLevelError("Empty CSV input")
+        bad_lines = []
         try:
-            df, bad_lines, line_map = cls.str_to_df(content)
-
-            if df.empty:
-                return []
-
-            records = df.to_dict(orient="records")
-            for i, record in enumerate(records):
-                if i in line_map:
-                    record["__line_numbers"] = line_map[i]
-                else:
-                    record["__line_numbers"] = [
-                        i + 2
-                    ]  # fallback: header on line 1, data starts at line 2
-            return records
+            for record, line_span in iter_csv_records(
+                io.StringIO(content, newline=""), bad_lines=bad_lines
+            ):
+                record["__line_numbers"] = line_span
+                yield record
 
         except FileLevelError:
             raise
@@ -36,54 +33,14 @@ class CSVParser(BaseParser):
             raise FileLevelError(
                 f"CSV extraction failed: {e}", context={"error_type": type(e).__name__}
             )
-
-    @classmethod
-    def str_to_df(cls, s: str):
-        bad_lines = []
-        line_map = {}  # map from row_index to [start_line, end_line]
-
-        # Track line boundaries for each record (handles multiline values)
-        lines = s.splitlines(keepends=False)
-        row_idx = 0
-        current_record_start = 2  # data starts at line 2 (1-indexed, after header)
-        in_quote = False
-
-        for line_num, line in enumerate(lines, start=1):
-            if line_num == 1:  # header
-                continue
-            # Very basic quote tracking for multiline values
-            in_quote = in_quote ^ (line.count('"') % 2 == 1)
-            if not in_quote:
-                # End of a record
-                line_map[row_idx] = [current_record_start, line_num]
-                row_idx += 1
-                current_record_start = line_num + 1
-
-        def handle_bad_line(line):
-            bad_lines.append(
-                f"Malformed or ragged line skipped: {','.join(line[:5])}..."
-            )
-            return None
-
-        try:
-            df = pd.read_csv(
-                io.StringIO(s),
-                dtype=str,
-                keep_default_na=False,
-                on_bad_lines=handle_bad_line,
-                engine="python",
-                quoting=csv.QUOTE_MINIMAL,
-            )
-            df = df.dropna(how="all")
-            return df, bad_lines, line_map
-        except Exception as e:
-            raise FileLevelError(
-                f"CSV parse failed: {e}", context={"error_type": type(e).__name__}
-            )
+        if bad_lines:
+            print(f"[CSVParser] Skipped {len(bad_lines)} malformed rows in {filepath}")
 
     @classmethod
     def drop_duplicates(cls, df, dupe_cfg: dict):
         # dupe_cfg = { subset: ["Recovery ID"], keep: "row_completeness"}
+        import pandas as pd
+
         try:
             subset = dupe_cfg.get("subset", [])
             keep = dupe_cfg.get("keep", "first")
@@ -1,74 +1,39 @@
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from .csv_ import CSVParser
 from python_core.errors import FileLevelError
+from python_core.utils.csv_utils import iter_csv_records
 
 
 """
-A "concatenated csv" is a file that contains multiple CSV sections 
+A "concatenated csv" is a file that contains multiple CSV sections
 separated by titles and newlines. This is common in Apple's datasets.
-Determines if a file is a concatenated CSV file by checking if it 
+Determines if a file is a concatenated CSV file by checking if it
 contains multiple sections separated by titles and newlines.
 """
 
 
 class CSVMultiParser(CSVParser):
     @classmethod
-    def extract(
+    def iter_records(
         cls, content: str, config: Optional[Dict] = None, filepath: str = None
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         config = config or {}
         if not content or not content.strip():
             raise FileLevelError("Empty CSV input")
-        try:
-            if cls._is_concatenated(content, filepath):
-                segments = re.split("\n\n\n", content)
-                all_records = []
-                current_line = 1
 
-                for segment in segments:
-                    segment_start_line = current_line
-                    lines = [
-                        line.strip()
-                        for line in segment.split("\n")
-                        if len(line.strip()) > 0
-                    ]
-                    if len(lines) >= 2:
-                        header = lines[0]
-                        csvstring = "\n".join(lines[1:])
-                        df, bad_lines, line_map = cls.str_to_df(csvstring)
-                        if df.empty:
-                            current_line += len(segment.split("\n"))
-                            continue
-                        records = df.fillna("").to_dict(orient="records")
-                        for i, record in enumerate(records):
-                            if i in line_map:
-                                start, end = line_map[i]
-                                record["__line_numbers"] = [
-                                    segment_start_line + start - 2,
-                                    segment_start_line + end - 2,
-                                ]
-                            else:
-                                record["__line_numbers"] = [segment_start_line]
-                            record["__segment_header"] = header
-                            all_records.append(record)
-                    current_line += len(segment.split("\n"))
-                return all_records
+        if not cls._is_concatenated(content, filepath):
+            print(
+                "[CSVMultiParser] No concatenated sections detected. Parsing as single CSV."
+            )
+            yield from super().iter_records(content, config, filepath)
+            return
 
-            else:  # if not concatenated, parse as a single CSV
-                print(
-                    "[CSVMultiParser] No concatenated sections detected. Parsing as single CSV."
-                )
-                df, bad_lines, line_map = cls.str_to_df(content)
-                if df.empty:
-                    return []
-                records = df.to_dict(orient="records")
-                for i, record in enumerate(records):
-                    if i in line_map:
-                        record["__line_numbers"] = line_map[i]
-                    else:
-                        record["__line_numbers"] = [i + 2]
-                return records
+        try:
+            current_line = 1
+            for segment in re.split("\n\n\n", content):
+                yield from cls._iter_segment(segment, current_line)
+                current_line += segment.count("\n") + 3  # + the "\n\n\n" separator
 
             # TODO deal with error handling
         except FileLevelError:
@@ -78,6 +43,25 @@ class CSVMultiParser(CSVParser):
                 f"CSV extraction failed: {e}", context={"error_type": type(e).__name__}
             )
 
+    @classmethod
+    def _iter_segment(
+        cls, segment: str, segment_start_line: int
+    ) -> Iterator[Dict[str, Any]]:
+        """A segment is a title line followed by a CSV table; lines are stripped."""
+        lines = segment.split("\n")
+        title_idx = next((i for i, line in enumerate(lines) if line.strip()), None)
+        if title_idx is None:
+            return
+        header = lines[title_idx].strip()
+
+        csv_lines = (line.strip() + "\n" for line in lines[title_idx + 1 :])
+        for record, line_span in iter_csv_records(
+            csv_lines, first_line=segment_start_line + title_idx + 1
+        ):
+            record["__line_numbers"] = line_span
+            record["__segment_header"] = header
+            yield record
+
     @classmethod
     def _is_concatenated(cls, s: str, path: str):
 
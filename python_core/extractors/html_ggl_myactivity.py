@@ -1,8 +1,15 @@
 import re
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from .base import BaseParser
 from python_core.errors import FileLevelError
+from python_core.utils.html_stream import StrippedTextParser, attr_value, iter_parsed
+
+
+OUTER_CELL_CLASS = "outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"
+HEADER_CELL_CLASS = "header-cell mdl-cell mdl-cell--12-col"
+CONTENT_CELL_CLASS = "content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1"
+CAPTION_CELL_CLASS = "content-cell mdl-cell mdl-cell--12-col mdl-typography--caption"
 
 
 class HTMLMyActvityParser(BaseParser):
@@ -10,112 +17,225 @@ class HTMLMyActvityParser(BaseParser):
     def extract(
         cls, content: str, config: Optional[Dict] = None, filepath: str = None
     ) -> List[Dict[str, Any]]:
+        return list(cls.iter_records(content, config, filepath))
+
+    @classmethod
+    def iter_records(
+        cls, content: str, config: Optional[Dict] = None, filepath: str = None
+    ) -> Iterator[Dict[str, Any]]:
         config = config or {}
         if not content or not content.strip():
             raise FileLevelError("Empty HTML input")
         try:
-            total_lines = len(content.splitlines())
-            line_range = [1, max(1, total_lines)]
-
-            soup = BeautifulSoup(content, "html.parser")
-            records = cls._parse_google_myactivity(soup)
-
-            for record in records:
-                record["__line_numbers"] = line_range
-
-            return records
+            # event-driven: one record per outer cell as its </div> goes by, no DOM
+            yield from iter_parsed(_MyActivityStream(cls._build_record), content)
 
         except FileLevelError:
             raise
         except Exception as e:
             raise FileLevelError(
-                f"CSV extraction failed: {e}", context={"error_type": type(e).__name__}
+                f"MyActivity extraction failed: {e}",
+                context={"error_type": type(e).__name__},
             )
 
     @classmethod
     def _parse_google_myactivity(cls, soup: BeautifulSoup) -> list[dict]:
-        outer_cells = soup.find_all(
-            "div", class_="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"
-        )
+        """DOM version of the streaming parser, same records (without line numbers)."""
+        outer_cells = soup.find_all("div", class_=OUTER_CELL_CLASS)
         data_list = []
 
         for cell in outer_cells:
-            data_dict = {}
-
-            header = cell.find(
-                "div", class_="header-cell mdl-cell mdl-cell--12-col"
-            ).get_text(strip=True)
-            data_dict["Platform"] = header
-
-            content_cells = cell.find_all(
-                "div",
-                class_="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1",
-            )
+            header = cell.find("div", class_=HEADER_CELL_CLASS).get_text(strip=True)
 
+            content_cells = cell.find_all("div", class_=CONTENT_CELL_CLASS)
             activity_cell = content_cells[0]
-            activity_text = activity_cell.get_text(separator="<br>", strip=True).split(
-                "<br>"
-            )
-            activity_line = activity_text[0]
-            data_dict["Activity"] = re.sub(r"\s+", " ", activity_line)
-
             link = activity_cell.find("a")  # link in activity cell
-            if link:
-                data_dict["Activity"] = link.get_text(strip=True)
-                data_dict["URL"] = link["href"]
-
-            for line in activity_text[1:]:  # address and timestamp
-                if re.search(r"\d{4}", line):
-                    data_dict["Timestamp"] = line
-                elif data_dict["Platform"] == "Maps":
-                    data_dict["Address"] = line
-
-            # context cell
-            context_cell = cell.find(
-                "div",
-                class_="content-cell mdl-cell mdl-cell--12-col mdl-typography--caption",
-            )
+
+            context_cell = cell.find("div", class_=CAPTION_CELL_CLASS)
+            context_strings = None
+            location_link = None
             if context_cell:
-                # context_lines = context_cell.get_text(separator='<br>', strip=True).split('<br>')
-                # Replace <br> with a unique placeholder
-                context_lines = context_cell.get_text(
-                    separator="[BR]", strip=True
-                ).split("[BR]")
-                newcontextlines = []
-                for i, elem in enumerate(context_lines):
-                    if elem == "Locations:" and context_lines[i + 1] == "At":
-                        context_lines.extend(
-                            [
-                                "Locations:",
-                                "At this general area - Based on your past activity",
-                            ]
-                        )
-                    elif elem in (
-                        "At",
-                        "this general area",
-                        "- Based on your past activity",
-                    ):
-                        continue
-                    elif elem == "here":
-                        newcontextlines[-1] = newcontextlines[-1] + " " + elem
-                    elif elem == ".":
-                        newcontextlines[-1] = newcontextlines[-1] + elem
-                    else:
-                        newcontextlines.append(elem)
-                context_lines = newcontextlines
-
-                for i in range(0, len(context_lines), 2):
-                    attribute = context_lines[i].replace(":", "").strip()
-                    value = context_lines[i + 1].strip()
-                    if attribute == "Locations":
-                        location_link = context_cell.find("a")
-                        if location_link:
-                            data_dict["Location.URL"] = location_link["href"]
-                            # value = location_link.get_text(strip=True)
-                    if attribute == "here":
-                        continue
-                    data_dict[attribute] = value
-
-            data_list.append(data_dict)
+                context_strings = list(context_cell.stripped_strings)
+                location_link = context_cell.find("a")
+
+            data_list.append(
+                cls._build_record(
+                    header,
+                    list(activity_cell.stripped_strings),
+                    (link.get_text(strip=True), link.attrs) if link else None,
+                    context_strings,
+                    location_link.attrs if location_link else None,
+                )
+            )
 
         return data_list
+
+    @classmethod
+    def _build_record(
+        cls,
+        header: str,
+        activity_strings: List[str],
+        link: Optional[tuple],
+        context_strings: Optional[List[str]],
+        location_attrs: Optional[dict],
+    ) -> dict:
+        """
+        One record from an outer cell. *_strings are a cell's stripped, non-empty
+        text nodes (what get_text(strip=True) would join); link is (text, attrs)
+        of the activity cell's first <a>, location_attrs those of the caption's.
+        """
+        data_dict = {}
+        data_dict["Platform"] = header
+
+        activity_text = "<br>".join(activity_strings).split("<br>")
+        activity_line = activity_text[0]
+        data_dict["Activity"] = re.sub(r"\s+", " ", activity_line)
+
+        if link:
+            data_dict["Activity"] = link[0]
+            data_dict["URL"] = link[1]["href"]
+
+        for line in activity_text[1:]:  # address and timestamp
+            if re.search(r"\d{4}", line):
+                data_dict["Timestamp"] = line
+            elif data_dict["Platform"] == "Maps":
+                data_dict["Address"] = line
+
+        # context cell
+        if context_strings is not None:
+            # Replace <br> with a unique placeholder
+            context_lines = "[BR]".join(context_strings).split("[BR]")
+            newcontextlines = []
+            for i, elem in enumerate(context_lines):
+                if elem == "Locations:" and context_lines[i + 1] == "At":
+                    context_lines.extend(
+                        [
+                            "Locations:",
+                            "At this general area - Based on your past activity",
+                        ]
+                    )
+                elif elem in (
+                    "At",
+                    "this general area",
+                    "- Based on your past activity",
+                ):
+                    continue
+                elif elem == "here":
+                    newcontextlines[-1] = newcontextlines[-1] + " " + elem
+                elif elem == ".":
+                    newcontextlines[-1] = newcontextlines[-1] + elem
+                else:
+                    newcontextlines.append(elem)
+            context_lines = newcontextlines
+
+            for i in range(0, len(context_lines), 2):
+                attribute = context_lines[i].replace(":", "").strip()
+                value = context_lines[i + 1].strip()
+                if attribute == "Locations":
+                    if location_attrs is not None:
+                        data_dict["Location.URL"] = location_attrs["href"]
+                        # value = location_link.get_text(strip=True)
+                if attribute == "here":
+                    continue
+                data_dict[attribute] = value
+
+        return data_dict
+
+
+class _MyActivityStream(StrippedTextParser):
+    """
+    Tracks the open <div>s of the current outer cell and collects the text of its
+    header, first content cell and caption. Each record is queued with its
+    [start, end] source lines when the outer cell's </div> is reached.
+    """
+
+    def __init__(self, build_record):
+        super().__init__()
+        self._build_record = build_record
+        self._divs = []  # roles of open divs inside the current cell
+        self._cell = None
+        self._in_link = False
+
+    def on_text(self, text):
+        if self._cell is None:
+            return
+        for role in self._divs:
+            if role in ("header", "activity", "context"):
+                self._cell[role].append(text)
+        if self._in_link:
+            self._cell["link"][0].append(text)
+
+    def handle_starttag(self, tag, attrs):
+        super().handle_starttag(tag, attrs)
+        cell = self._cell
+        if tag == "a" and cell is not None:
+            attrs = {k: v if v is not None else "" for k, v in attrs}
+            if "activity" in self._divs and cell["link"] is None:
+                cell["link"] = ([], attrs)
+                self._in_link = True
+            if "context" in self._divs and cell["location"] is None:
+                cell["location"] = attrs
+            return
+        if tag != "div":
+            return
+
+        cls_attr = " ".join((attr_value(attrs, "class") or "").split())
+        if cell is None:
+            if cls_attr == OUTER_CELL_CLASS:
+                self._cell = {
+                    "start": self.getpos()[0],
+                    "header": None,
+                    "activity": None,
+                    "context": None,
+                    "link": None,
+                    "location": None,
+                }
+                self._divs = ["outer"]
+            return
+
+        role = None
+        if cls_attr == HEADER_CELL_CLASS and cell["header"] is None:
+            role = "header"
+        elif cls_attr == CONTENT_CELL_CLASS and cell["activity"] is None:
+            role = "activity"
+        elif cls_attr == CAPTION_CELL_CLASS and cell["context"] is None:
+            role = "context"
+        if role:
+            cell[role] = []
+        self._divs.append(role)
+
+    def handle_endtag(self, tag):
+        super().handle_endtag(tag)
+        if tag == "a":
+            self._in_link = False
+        elif tag == "div" and self._cell is not None:
+            role = self._divs.pop()
+            if role == "activity":
+                self._in_link = False
+            if not self._divs:
+                self._finish_cell()
+
+    def close(self):
+        super().close()
+        if self._cell is not None:  # unclosed outer cell at EOF
+            self._finish_cell()
+
+    def _finish_cell(self):
+        cell, self._cell = self._cell, None
+        self._divs = []
+        self._in_link = False
+        if cell["header"] is None:
+            raise AttributeError("outer cell has no header cell")
+        if cell["activity"] is None:
+            raise IndexError("outer cell has no content cell")
+
+        link = cell["link"]
+        record = self._build_record(
+            "".join(cell["header"]),
+            cell["activity"],
+            ("".join(link[0]), link[1]) if link else None,
+            cell["context"],
+            cell["location"],
+        )
+        record["__line_numbers"] = [cell["start"], self.getpos()[0]]
+        self._records.append(record)
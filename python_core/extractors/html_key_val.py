@@ -1,6 +1,7 @@
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any, Optional
 from .base import BaseParser
+from python_core.utils.line_index import LineIndex
 
 class HTMLKeyValParser(BaseParser):
     def extract(
@@ -22,5 +23,5 @@ class HTMLKeyValParser(BaseParser):
                 if key and val:
                     record[key] = val
                     
-        record["__line_numbers"] = [1, len(content.splitlines())]
+        record["__line_numbers"] = LineIndex(content).full_span
         return [record] if record else []
@@ -1,149 +1,202 @@
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Optional, Iterator
 from .csv_ import CSVParser
 from python_core.errors import FileLevelError
+from python_core.utils.csv_utils import row_to_record
+from python_core.utils.html_stream import StrippedTextParser, iter_parsed
 
 
 class HTMLTableParser(CSVParser):
-    @classmethod
-    def _extract_table(cls, table_element) -> List[Dict[str, Any]]:
-        headers = []
-        rows_data = []
-
-        thead = table_element.find("thead")
-        tbody = table_element.find("tbody")
-
-        if thead:
-            header_row = thead.find("tr")
-            if header_row:
-                headers = [
-                    th.get_text(strip=True) for th in header_row.find_all(["th", "td"])
-                ]
-
-        if not headers:
-            first_tr = table_element.find("tr")
-            if first_tr:
-                potential_headers = first_tr.find_all(["th", "td"])
-                if all(cell.name == "th" for cell in potential_headers):
-                    headers = [th.get_text(strip=True) for th in potential_headers]
-
-        rows_to_parse = (
-            tbody.find_all("tr")
-            if tbody
-            else table_element.find_all("tr")[1:]
-            if headers
-            else table_element.find_all("tr")
-        )
-
-        for row in rows_to_parse:
-            cells = row.find_all(["td", "th"])
-            if cells:
-                row_dict = {}
-                for i, cell in enumerate(cells):
-                    col_name = headers[i] if i < len(headers) else f"Column_{i}"
-                    row_dict[col_name] = cell.get_text(strip=True)
-                rows_data.append(row_dict)
-
-        return rows_data
-
     @classmethod
     def extract(
         cls, content: str, config: Optional[Dict] = None, filepath: str = None
     ) -> List[Dict[str, Any]]:
+        return list(cls.iter_records(content, config, filepath))
+
+    @classmethod
+    def iter_records(
+        cls, content: str, config: Optional[Dict] = None, filepath: str = None
+    ) -> Iterator[Dict[str, Any]]:
         config = config or {}
         if not content or not content.strip():
             raise FileLevelError("Empty HTML input")
         try:
-            soup = BeautifulSoup(content, "html.parser")
-            tables = soup.find_all("table")
+            stream = _TableStream()
+            yield from iter_parsed(stream, content)
 
-            if not tables:
+            if not stream.table_count:
                 raise FileLevelError("No tables found in HTML")
-
-            total_lines = len(content.splitlines())
-            all_rows = []
-
-            if len(tables) > 1:
+            if stream.table_count > 1:
                 print(
-                    f"[HTMLTableParser] Warning: Multiple tables found in HTML. Extracting {len(tables)} tables."
+                    f"[HTMLTableParser] Warning: Multiple tables found in HTML. Extracted {stream.table_count} tables."
                 )
-                for i, table in enumerate(tables):
-                    rows = cls._extract_table(table)
-                    for row in rows:
-                        row["__line_numbers"] = [1, total_lines]
-                    all_rows.extend(rows)
-            else:
-                rows = cls._extract_table(tables[0])
-                for row in rows:
-                    row["__line_numbers"] = [1, total_lines]
-                all_rows.extend(rows)
-
-            return all_rows
 
         except FileLevelError:
             raise
         except Exception as e:
             raise FileLevelError(
-                f"CSV extraction failed: {e}", context={"error_type": type(e).__name__}
+                f"HTML table extraction failed: {e}",
+                context={"error_type": type(e).__name__},
             )
 
 
+class _TableStream(StrippedTextParser):
+    """
+    <table>/<tr>/<td> state machine. The header is the first <thead> row, or
+    else a first row made only of <th>; every other row with cells becomes a
+    record keyed by it, queued with the row's [start, end] source lines as
+    soon as the row closes. Rows belong to their innermost table; unclosed
+    cells and rows are closed by the next one, as browsers do.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.table_count = 0
+        self._tables = []  # stack, for nested tables
+
+    def on_text(self, text):
+        if self._tables and self._tables[-1]["cell"] is not None:
+            self._tables[-1]["cell"].append(text)
+
+    def handle_starttag(self, tag, attrs):
+        super().handle_starttag(tag, attrs)
+        if tag == "table":
+            self.table_count += 1
+            self._tables.append(
+                {"headers": None, "in_thead": False, "row": None, "cell": None}
+            )
+            return
+        if not self._tables:
+            return
+
+        table = self._tables[-1]
+        if tag == "thead":
+            table["in_thead"] = True
+        elif tag == "tr":
+            self._end_row(table)
+            table["row"] = {
+                "start": self.getpos()[0],
+                "cells": [],
+                "all_th": True,
+                "in_thead": table["in_thead"],
+            }
+        elif tag in ("td", "th") and table["row"] is not None:
+            self._end_cell(table)
+            table["cell"] = []
+            table["row"]["all_th"] &= tag == "th"
+
+    def handle_endtag(self, tag):
+        super().handle_endtag(tag)
+        if not self._tables:
+            return
+
+        table = self._tables[-1]
+        if tag in ("td", "th"):
+            self._end_cell(table)
+        elif tag == "tr":
+            self._end_row(table)
+        elif tag == "thead":
+            self._end_row(table)
+            table["in_thead"] = False
+        elif tag == "table":
+            self._end_row(table)
+            self._tables.pop()
+
+    def close(self):
+        super().close()
+        while self._tables:
+            self._end_row(self._tables.pop())
+
+    def _end_cell(self, table):
+        if table["cell"] is not None:
+            table["row"]["cells"].append("".join(table["cell"]))
+            table["cell"] = None
+
+    def _end_row(self, table):
+        row = table["row"]
+        if row is None:
+            return
+        self._end_cell(table)
+        table["row"] = None
+
+        cells = row["cells"]
+        if row["in_thead"]:
+            if table["headers"] is None:
+                table["headers"] = cells
+            return
+        if table["headers"] is None:
+            if cells and row["all_th"]:
+                table["headers"] = cells
+                return
+            table["headers"] = []
+        if cells:
+            record = row_to_record(table["headers"], cells)
+            record["__line_numbers"] = [row["start"], self.getpos()[0]]
+            self._records.append(record)
+
+
 class HTMLGglSubscriberInfoParser(HTMLTableParser):
     @classmethod
-    def extract(
+    def iter_records(
         cls, content: str, config: Optional[Dict] = None, filepath: str = None
-    ) -> List[Dict[str, Any]]:
-        import re
-
-        rows = super().extract(content, config, filepath)
+    ) -> Iterator[Dict[str, Any]]:
+        yield from cls._expand_challenges(super().iter_records(content, config, filepath))
 
-        expanded_rows = []
+    @classmethod
+    def _expand_challenges(
+        cls, rows: Iterator[Dict[str, Any]]
+    ) -> Iterator[Dict[str, Any]]:
         for row in rows:
+            # built before yielding: the consumer may pop __line_numbers off the row
+            challenge_rows = cls._challenge_rows(row)
             # Keep the original row (which contains the Login or Logout event)
-            expanded_rows.append(row)
+            yield row
+            yield from challenge_rows
 
-            # Find the challenges column key, case-insensitively
-            challenges_key = next(
-                (k for k in row.keys() if "challenges" in k.lower()), None
-            )
-            if not challenges_key or not row[challenges_key]:
-                continue
-
-            challenges_str = row[challenges_key]
-            parts = [p.strip() for p in challenges_str.split(";") if p.strip()]
-
-            for part in parts:
-                # Format: "<Timestamp>: <Outcome>, <Dusi>"
-                # e.g., "2025-02-20 21:18:46 Z: Challenge Failed, -"
-                match = re.match(r"^(.+?\s[A-Z]):\s*(.+)$", part)
-                if not match:
-                    colon_idx = part.find(":")
-                    if colon_idx == -1:
-                        continue
-                    ts_str = part[:colon_idx].strip()
-                    rest = part[colon_idx + 1 :].strip()
-                else:
-                    ts_str = match.group(1).strip()
-                    rest = match.group(2).strip()
-
-                outcome = rest
-                if "," in rest:
-                    comma_parts = rest.split(",", 1)
-                    outcome = comma_parts[0].strip()
-
-                # Build virtual row for the challenge event
-                challenge_row = {
-                    "Timestamp": ts_str,
-                    "IP Address": row.get("IP Address", ""),
-                    "Activity Type": "Challenge",
-                    "Challenge Outcome": outcome,
-                    "Interactive": row.get("Interactive", ""),
-                    "Initiating Service": row.get("Initiating Service", ""),
-                    "Geo": row.get("Geo", ""),
-                    "Raw User Agents": row.get("Raw User Agents", ""),
-                    "Challenges (timestamp, outcome, dusi)": "",
-                    "__line_numbers": row.get("__line_numbers", [1]),
-                }
-                expanded_rows.append(challenge_row)
-
-        return expanded_rows
+    @classmethod
+    def _challenge_rows(cls, row: Dict[str, Any]) -> List[Dict[str, Any]]:
+        res = []
+        # Find the challenges column key, case-insensitively
+        challenges_key = next(
+            (k for k in row.keys() if "challenges" in k.lower()), None
+        )
+        if not challenges_key or not row[challenges_key]:
+            return res
+
+        challenges_str = row[challenges_key]
+        parts = [p.strip() for p in challenges_str.split(";") if p.strip()]
+
+        for part in parts:
+            # Format: "<Timestamp>: <Outcome>, <Dusi>"
+            # e.g., "2025-02-20 21:18:46 Z: Challenge Failed, -"
+            match = re.match(r"^(.+?\s[A-Z]):\s*(.+)$", part)
+            if not match:
+                colon_idx = part.find(":")
+                if colon_idx == -1:
+                    continue
+                ts_str = part[:colon_idx].strip()
+                rest = part[colon_idx + 1 :].strip()
+            else:
+                ts_str = match.group(1).strip()
+                rest = match.group(2).strip()
+
+            outcome = rest
+            if "," in rest:
+                comma_parts = rest.split(",", 1)
+                outcome = comma_parts[0].strip()
+
+            # Build virtual row for the challenge event
+            challenge_row = {
+                "Timestamp": ts_str,
+                "IP Address": row.get("IP Address", ""),
+                "Activity Type": "Challenge",
+                "Challenge Outcome": outcome,
+                "Interactive": row.get("Interactive", ""),
+                "Initiating Service": row.get("Initiating Service", ""),
+                "Geo": row.get("Geo", ""),
+                "Raw User Agents": row.get("Raw User Agents", ""),
+                "Challenges (timestamp, outcome, dusi)": "",
+                "__line_numbers": row.get("__line_numbers", [1]),
+            }
+            res.append(challenge_row)
+        return res
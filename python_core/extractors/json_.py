@@ -1,9 +1,12 @@
+import re
 import json as jsonlib
 import hjson
 import json5
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from .base import BaseParser
 from utils.json_utils import get_value_at_path
+from python_core.utils.json_stream import iter_json_root
+from python_core.utils.line_index import LineIndex
 from python_core.errors import FileLevelError
 
 # Try to import demjson3 for extra-lenient parsing, but make it optional
@@ -16,18 +19,120 @@ except ImportError:
     demjson3 = None
 
 
+DECODERS = {
+    "json": jsonlib.loads,
+    "single_quote": lambda st: jsonlib.loads(st.replace("'", '"')),
+    "json5": json5.loads,
+    # plain floats: the extract writer json.dumps records, which rejects Decimal
+    "hjson": lambda st: hjson.loads(st, object_pairs_hook=dict),
+}
+if HAS_DEMJSON3:
+    # lenient parsing for malformed data
+    DECODERS["demjson3"] = lambda st: demjson3.decode(
+        st, strict=False, allow_trailing_comma=True
+    )
+
+# full fallback order, cheapest/strictest first
+DECODER_CHAIN = ["json", "single_quote", "demjson3", "json5", "hjson"]
+
+_DECODER_MEMO = {}  # manifest_file_id -> lenient decoder that last succeeded for it
+
+SNIFF_WINDOW = 65536  # chars inspected at each end of a document
+
+_CONTAINER_START = re.compile(r"[ \t\n\r]*[\[{]")
+_DQ_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*"')
+_SNIFF_PATTERNS = {
+    "comments": re.compile(r"//|/\*|#"),
+    "trailing_commas": re.compile(r",\s*[}\]]"),
+    "single_quotes": re.compile(r"'"),
+    "unquoted_keys": re.compile(r"[{,]\s*[A-Za-z_$][\w$]*\s*:"),
+}
+
+
+def sniff_json_features(s: str, window: int = None) -> set:
+    """
+    Looks for non-standard JSON syntax in a bounded head and tail of `s`.
+    Windows are cut on line boundaries so double-quoted strings (which cannot
+    contain raw newlines) are blanked out whole before matching; a minified
+    single-line tail is only checked after its last quote.
+    """
+    window = window or SNIFF_WINDOW
+    if len(s) <= 2 * window:
+        chunks = [s]
+    else:
+        head = s[:window]
+        head = head[: head.rfind("\n") + 1] or head[: head.rfind('"') + 1]
+        tail = s[-window:]
+        tail = tail[tail.find("\n") + 1 :] if "\n" in tail else tail[tail.rfind('"') + 1 :]
+        chunks = [head, tail]
+
+    features = set()
+    for chunk in chunks:
+        structural = _DQ_STRING.sub('""', chunk)
+        for name, pattern in _SNIFF_PATTERNS.items():
+            if name not in features and pattern.search(structural):
+                features.add(name)
+    return features
+
+
 class JSONParser(BaseParser):
     @classmethod
     def extract(
         cls, content: str, config: Optional[Dict] = None, filepath: str = None
     ) -> List[Dict[str, Any]]:
+        return list(cls.iter_records(content, config, filepath))
+
+    @classmethod
+    def iter_records(
+        cls, content: str, config: Optional[Dict] = None, filepath: str = None
+    ) -> Iterator[Dict[str, Any]]:
         config = config or {}
+        streamed = 0
+        if cls._can_stream(content, config):
+            # only the root array's elements are ever decoded; siblings are skipped
+            try:
+                lines = LineIndex(content)
+                for value, start, end in iter_json_root(content, config.get("json_root")):
+                    if not isinstance(value, dict):
+                        continue
+                    value["__line_numbers"] = lines.span(start, end)
+                    streamed += 1
+                    yield value
+
+                if config.get("__stats") is not None:
+                    config["__stats"].update(
+                        {"decoder": "json_stream", "features": [], "failed_attempts": []}
+                    )
+                return
+            except ValueError as e:
+                print(
+                    f"[JSONParser] Streaming {filepath} stopped after {streamed} records ({e}); reparsing in full"
+                )
+
+        records = cls._parse_document(content, config)
+        if config.get("__stats") is not None and streamed:
+            config["__stats"]["stream_fallback_after"] = streamed
+        yield from records[streamed:]  # already yielded by the stream
+
+    @classmethod
+    def _can_stream(cls, content: str, config: dict) -> bool:
+        """Streaming needs strict JSON; leave anything the sniffer flags as lenient to the full parse."""
+        if not _CONTAINER_START.match(content):
+            return False
+        return not sniff_json_features(content)
+
+    @classmethod
+    def _parse_document(cls, content: str, config: dict) -> List[Dict[str, Any]]:
         try:
-            data = cls.basic_str_to_json(content)
+            data = cls.basic_str_to_json(
+                content,
+                memo_key=config.get("__manifest_file_id"),
+                stats=config.get("__stats"),
+            )
             root_data = cls._resolve_root(data, config)
 
-            total_lines = len(content.splitlines())
-            line_range = [1, max(1, total_lines)]
+            # the lenient decoders don't report offsets; records get the whole file
+            line_range = LineIndex(content).full_span
 
             if isinstance(root_data, list):
                 records = [x for x in root_data if isinstance(x, dict)]
@@ -47,53 +152,54 @@ class JSONParser(BaseParser):
             )
 
     @classmethod
-    def basic_str_to_json(cls, s: str):
+    def basic_str_to_json(cls, s: str, memo_key: str = None, stats: dict = None):
         # static, inherited
-        robust_parsing_methods = [
-            ("Standard JSON", lambda st: jsonlib.loads(st)),
-            ("Single-quote conversion", lambda st: jsonlib.loads(st.replace("'", '"'))),
-        ]
-
-        # Add demjson3 if available (lenient parsing for malformed data)
-        if HAS_DEMJSON3:
-            robust_parsing_methods.append(
-                (
-                    "demjson3 lenient",
-                    lambda st: demjson3.decode(
-                        st, strict=False, allow_trailing_comma=True
-                    ),
-                )
-            )
-
-        # Add other robust parsers
-        robust_parsing_methods.extend(
-            [
-                ("json5 ES5-style", lambda st: json5.loads(st)),
-                (
-                    "hjson",
-                    lambda st: hjson.loads(
-                        st, use_decimal=True, object_pairs_hook=dict
-                    ),
-                ),
-            ]
-        )
+        # Sniff the ends of the document and go straight to the cheapest decoder that
+        # can handle what was seen, instead of failing through the whole chain.
+        # Clean ends always get stdlib first; the decoder memoized for this manifest
+        # entry is only consulted once that fails (lenient syntax mid-document).
+        features = sniff_json_features(s)
+        order = [] if features else ["json"]
+        if memo_key in _DECODER_MEMO:
+            order.append(_DECODER_MEMO[memo_key])
+        if features & {"comments", "trailing_commas", "unquoted_keys"}:
+            order.extend(["json5", "demjson3", "hjson"])
+        elif "single_quotes" in features:
+            order.append("single_quote")
+        order.extend(DECODER_CHAIN)
 
         errors_encountered = []
         jsonobj = None
+        decoder = None
 
-        for name, method in robust_parsing_methods:
+        for name in dict.fromkeys(order):  # dedupe, keep order
+            method = DECODERS.get(name)
+            if method is None:  # demjson3 not installed
+                continue
             try:
                 jsonobj = method(s)
+                decoder = name
                 break
             except Exception as e:
                 errors_encountered.append(f"{name}: {type(e).__name__}: {str(e)}")
                 continue
 
-        if jsonobj is None:
+        if stats is not None:
+            stats.update(
+                {
+                    "decoder": decoder,
+                    "features": sorted(features),
+                    "failed_attempts": [e.split(":", 1)[0] for e in errors_encountered],
+                }
+            )
+
+        if decoder is None:
             raise FileLevelError(
                 f"Unable to parse JSON with any method. Attempts: {'; '.join(errors_encountered)}"
             )
 
+        if memo_key is not None and decoder != "json":
+            _DECODER_MEMO[memo_key] = decoder
         return jsonobj
 
     @classmethod
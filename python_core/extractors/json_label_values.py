@@ -1,21 +1,32 @@
 from .json_ import JSONParser
 from python_core.errors import FileLevelError, RecordLevelError
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
+from python_core.utils.line_index import LineIndex
 
 
 class JSONLabelValuesParser(JSONParser):
+    @classmethod
+    def iter_records(
+        cls, content: str, config: Optional[Dict] = None, filepath: str = None
+    ) -> Iterator[Dict[str, Any]]:
+        # label_values have to be flattened before json_root applies; no streaming
+        yield from cls.extract(content, config, filepath)
+
     @classmethod
     def extract(
         cls, content: str, config: Optional[Dict] = None, filepath: str = None
     ) -> List[Dict[str, Any]]:
         config = config or {}
         try:
-            raw_json = cls.basic_str_to_json(content)  # this is inherited
+            raw_json = cls.basic_str_to_json(
+                content,
+                memo_key=config.get("__manifest_file_id"),
+                stats=config.get("__stats"),
+            )  # this is inherited
             flat_json = cls._flatten_lv(raw_json)
             data = cls._resolve_root(flat_json, config)
 
-            total_lines = len(content.splitlines())
-            line_range = [1, max(1, total_lines)]
+            line_range = LineIndex(content).full_span
 
             if isinstance(data, list):
                 records = [x for x in data if isinstance(x, dict)]
@@ -1,7 +1,9 @@
+import io
+import json as jsonlib
 from .json_ import JSONParser
 from python_core.errors import FileLevelError
-from typing import List, Dict, Any, Optional
-from utils.filter_builder import make_filter
+from typing import List, Dict, Any, Optional, Iterator
+from utils.filter_builder import make_filter, make_raw_prefilter
 
 
 class JSONLParser(JSONParser):
@@ -9,26 +11,52 @@ class JSONLParser(JSONParser):
     def extract(
         cls, content: str, config: Optional[Dict] = None, filepath: str = None
     ) -> List[Dict[str, Any]]:
+        return list(cls.iter_records(content, config, filepath))
+
+    @classmethod
+    def iter_records(
+        cls, content: str, config: Optional[Dict] = None, filepath: str = None
+    ) -> Iterator[Dict[str, Any]]:
         config = config or {}
-        res = []
+        filter_callable = None
+        prefilter = None
         if "where" in config:
             filter_callable = make_filter(config["where"])
+            prefilter = make_raw_prefilter(config["where"])
+
+        counts = {
+            "lines_decoded": 0,  # plain json.loads
+            "lines_fallback": 0,  # needed the lenient chain
+            "lines_prefiltered": 0,  # rejected by the raw-text where check, never decoded
+            "lines_filtered": 0,  # decoded, rejected by where
+            "lines_skipped": 0,  # decoded to something other than an object
+        }
+        loads = jsonlib.loads
 
-        line_num = 0
-        for line in content.splitlines():
-            line_num += 1
+        # split on "\n" only; str.splitlines() also breaks on U+2028 etc. inside strings
+        for line_num, line in enumerate(io.StringIO(content, newline="\n"), 1):
             line = line.strip()
             if not line:
                 continue
+            if prefilter is not None and not prefilter(line):
+                counts["lines_prefiltered"] += 1
+                continue
+
             try:
-                obj = cls.basic_str_to_json(line)
-                if "where" in config and not filter_callable(obj):
-                    continue
-                obj["__line_numbers"] = [line_num, line_num]
-                res.append(obj)
-            except FileLevelError:
-                raise
-            except Exception:
+                obj = loads(line)
+                counts["lines_decoded"] += 1
+            except ValueError:
+                obj = cls.basic_str_to_json(line)  # FileLevelError fails the file
+                counts["lines_fallback"] += 1
+
+            if not isinstance(obj, dict):
+                counts["lines_skipped"] += 1
+                continue
+            if filter_callable is not None and not filter_callable(obj):
+                counts["lines_filtered"] += 1
                 continue
+            obj["__line_numbers"] = [line_num, line_num]
+            yield obj
 
-        return res
+        if config.get("__stats") is not None:
+            config["__stats"].update(counts)
@@ -3,51 +3,346 @@ import json
 import sys
 import traceback
 from datetime import datetime, timezone
-import uuid
-import hashlib
+from itertools import chain
+from queue import Empty, Full
 import python_core.utils.safe_file_utils as safefileutils
+import python_core.utils.reuse_utils as reuse_utils
+from python_core.utils.raw_codec import RawEncoder
+from python_core.utils.id_utils import new_id
 from python_core.utils.pyodide_utils import get_config_value
 
 
 try:
     from manifest import Manifest
-    from db_session import DatabaseSession
-    from extractors import get_parser
+    from db_session import DatabaseSession, deferred_indexes
+    from . import get_parser
     from python_core.errors import FileLevelError
 except ImportError:
     sys.path.append(os.path.dirname(__file__))
     from manifest import Manifest
-    from db_session import DatabaseSession
-    from extractors import get_parser
+    from db_session import DatabaseSession, deferred_indexes
+    from . import get_parser
     from python_core.errors import FileLevelError
 
 
-def _file_size_bytes(filepath: str, is_firefox: bool = False) -> int:
-    if is_firefox:
-        return safefileutils.getsize(filepath)
-    else:
-        stat = os.stat(filepath)
-        file_size_bytes = stat.st_size
-        return file_size_bytes
+RAW_DATA_BATCH_SIZE = 2000  # rows per executemany; bounds peak memory per file
+RAW_DATA_INSERT = "INSERT INTO raw_data (id, upload_id, file_id, data, line_numbers, encoding) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+UPLOADED_FILE_INSERT = "INSERT INTO uploaded_files (id, manifest_file_id, upload_id, opfs_filename, manifest_filename, file_hash, upload_timestamp, file_size_bytes, parse_status, raw_keys, config_digest) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _file_jobs(
+    manifest,
+    files: list,
+    tmp_storage_dir: str,
+    known_hashes: dict = None,
+    raw_encoding: str = None,
+) -> list:
+    """Picklable per-file work items for the files the manifest knows how to parse."""
+    known_hashes = known_hashes or {}
+    jobs = []
+    for opfs_filename in files:
+        file_cfg = manifest.get_file_cfg(opfs_filename)
+        manifest_file_id = file_cfg.get("id")
+        parser_cfg = file_cfg.get(
+            "parser", {}
+        )  # manifest YAML uses 'parser' not 'parser_config'
+        if not manifest_file_id or not parser_cfg or not parser_cfg.get("format"):
+            continue
+        digest = reuse_utils.config_digest(manifest, file_cfg)
+        jobs.append(
+            {
+                "opfs_filename": opfs_filename,
+                "opfs_filepath": os.path.join(tmp_storage_dir, opfs_filename),
+                "manifest_file_id": manifest_file_id,
+                "manifest_filename": file_cfg.get("path"),
+                "parser_cfg": parser_cfg,
+                "config_digest": digest,
+                "known_hashes": known_hashes.get((manifest_file_id, digest), set()),
+                "raw_encoding": raw_encoding,
+            }
+        )
+    return jobs
+
+
+def _parse_file(job: dict, batch_size: int):
+    """
+    Parses one file into writer messages: ("file", {digest, size, raw_keys}),
+    then ("rows", [(data, line_numbers, encoding), ...]) batches, then
+    ("done", parser_stats).
+    ("skip", None) means nothing to store, ("error", partial_error) a failure,
+    and ("reuse", {digest, size}) that this content was extracted before.
+    Records are serialized here so that in parallel mode the pool does the work.
+    """
+    opfs_filename = job["opfs_filename"]
+    fmt = job["parser_cfg"].get("format")
+    # print(f"[Extractor] Processing {opfs_filename} -> Source: {job['manifest_file_id']} (Format: {fmt})")
+    try:
+        parser = get_parser(fmt)
+        if not parser:
+            print(f"[Extractor] No parser found for format: {fmt}")
+            yield "skip", None
+            return
+
+        # one pass over the bytes for text, digest and size
+        ingested = safefileutils.ingest(job["opfs_filepath"])
+        if ingested.digest in job.get("known_hashes", ()):
+            yield "reuse", {"digest": ingested.digest, "size": ingested.size}
+            return
+        content = ingested.text
+        ingested.release()
+
+        # per-file context for the parser: decoder memo key + stats it reports back
+        parser_stats = {}
+        records = parser.iter_records(
+            content,
+            {
+                **job["parser_cfg"],
+                "__manifest_file_id": job["manifest_file_id"],
+                "__stats": parser_stats,
+            },
+            opfs_filename,
+        )
+        first = next(records, None)
+        if first is None:
+            print(f"  -> No records extracted from {opfs_filename}")
+            yield "skip", None
+            return
+
+        encoder = RawEncoder(job.get("raw_encoding"), first)
+        yield "file", {
+            "digest": ingested.digest,
+            "size": ingested.size,
+            "raw_keys": encoder.keys,
+        }
+        batch = []
+        for r in chain([first], records):
+            line_numbers = r.pop("__line_numbers", [1])
+            data, encoding = encoder.encode(r)
+            batch.append((data, json.dumps(line_numbers), encoding))
+            if len(batch) >= batch_size:
+                yield "rows", batch
+                batch = []
+        if batch:
+            yield "rows", batch
+        yield "done", parser_stats
+
+    except FileLevelError as e:
+        print(f"[Extractor] File-level parse error for {opfs_filename}: {e}")
+        yield "error", {"file": opfs_filename, "level": "error", "msg": str(e)}
+    except Exception as e:
+        print(f"[Extractor] Error processing {opfs_filename}: {e}")
+        traceback.print_exc()
+        yield "error", {"file": opfs_filename, "level": "error", "msg": str(e)}
+
+
+def _iter_sequential(jobs: list, batch_size: int):
+    for job in jobs:
+        for kind, payload in _parse_file(job, batch_size):
+            yield job["opfs_filename"], kind, payload
+
+
+_POOL_QUEUE = None  # set in each pool process by _pool_init
+_POOL_STOP = None
+
+
+def _pool_init(queue, stop) -> None:
+    global _POOL_QUEUE, _POOL_STOP
+    _POOL_QUEUE = queue
+    _POOL_STOP = stop
+    # everything a worker sends is read before shutdown; if the consumer left
+    # early, exiting must not wait on unread messages
+    queue.cancel_join_thread()
+
 
+def _pool_parse(job: dict, batch_size: int) -> None:
+    for kind, payload in _parse_file(job, batch_size):
+        message = (job["opfs_filename"], kind, payload)
+        while not _POOL_STOP.is_set():
+            try:
+                _POOL_QUEUE.put(message, timeout=0.5)
+                break
+            except Full:
+                continue
+        else:
+            return  # the consumer stopped reading
 
-def _file_hash(filepath: str, alg: str = "sha256", is_firefox: bool = False) -> str:
-    if is_firefox:
-        return safefileutils.file_hash(filepath, alg)
-    else:
-        with open(filepath, "rb") as f:
-            hash_object = hashlib.file_digest(f, alg)
-        return hash_object.hexdigest()
 
+def _iter_parallel(jobs: list, batch_size: int, workers: int):
+    """Parses files in a process pool; messages from all files arrive interleaved on one queue."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
 
-def _file_read(filepath: str, is_firefox: bool = False) -> str:
-    if is_firefox:
-        print(f"[Extractor] Reading file with Firefox workaround: {filepath}")
-        content = safefileutils.read_text(filepath)
-    else:
-        with open(filepath, "r", encoding="utf-8", errors="replace") as f:
-            content = f.read()
-    return content
+    queue = multiprocessing.Queue(maxsize=workers * 4)  # backpressure on fast parsers
+    stop = multiprocessing.Event()
+    pool = ProcessPoolExecutor(
+        max_workers=workers, initializer=_pool_init, initargs=(queue, stop)
+    )
+    futures = {}
+    try:
+        for job in jobs:
+            futures[pool.submit(_pool_parse, job, batch_size)] = job["opfs_filename"]
+        finished = set()
+        while len(finished) < len(jobs):
+            try:
+                name, kind, payload = queue.get(timeout=1.0)
+            except Empty:
+                # a worker that died (or failed outside _parse_file) never sends its last message
+                for future, job_name in futures.items():
+                    if job_name in finished or not future.done() or not future.exception():
+                        continue
+                    finished.add(job_name)
+                    error = {
+                        "file": job_name,
+                        "level": "error",
+                        "msg": f"Worker failed: {future.exception()}",
+                    }
+                    yield job_name, "error", error
+                continue
+            if kind in ("done", "skip", "error", "reuse"):
+                finished.add(name)
+            yield name, kind, payload
+    finally:
+        # also reached when the consumer stops early or raises: workers blocked
+        # on the full queue would keep shutdown(wait=True) from returning
+        stop.set()
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class _RawDataWriter:
+    """
+    The only user of the connection: applies _parse_file messages to
+    uploaded_files/raw_data. Each file's rows are committed on "done". On
+    "error" a file's rows are rolled back, or, when files are interleaved
+    (another file's commit may already have flushed them), deleted by file_id.
+    """
+
+    def __init__(
+        self,
+        conn,
+        upload_id: str,
+        ts: float,
+        jobs: list,
+        interleaved: bool,
+        batch_size: int = RAW_DATA_BATCH_SIZE,
+    ):
+        self.conn = conn
+        self.upload_id = upload_id
+        self.ts = ts
+        self.jobs = {job["opfs_filename"]: job for job in jobs}
+        self.interleaved = interleaved
+        self.batch_size = batch_size
+        self.file_ids = {}
+        self.row_counts = {}
+        self.closed = set()
+        self.partial_errors = []
+        self.file_stats = {}
+        self.reused = {}  # opfs_filename -> {source_upload_id, records}
+        reuse_utils.register(conn)
+
+    def handle(self, name: str, kind: str, payload) -> None:
+        if name in self.closed:
+            return
+
+        if kind == "file":
+            self.file_ids[name] = self._insert_file(name, payload, "success")
+            self.row_counts[name] = 0
+
+        elif kind == "reuse":
+            self.closed.add(name)
+            self._reuse(name, payload)
+
+        elif kind == "rows":
+            file_id = self.file_ids[name]
+            self.conn.executemany(
+                RAW_DATA_INSERT,
+                [
+                    (
+                        new_id(),
+                        self.upload_id,
+                        file_id,
+                        data,
+                        line_numbers,
+                        encoding,
+                    )
+                    for data, line_numbers, encoding in payload
+                ],
+            )
+            self.row_counts[name] += len(payload)
+
+        elif kind == "done":
+            self.closed.add(name)
+            self.conn.commit()
+            print(
+                f"[Extractor] Extracted {self.row_counts[name]} records from {self.jobs[name]['manifest_file_id']}"
+            )
+            if payload:
+                self.file_stats[name] = payload
+
+        elif kind == "error":
+            self.closed.add(name)
+            self._discard(name)
+            self.partial_errors.append(payload)
+
+        elif kind == "skip":
+            self.closed.add(name)
+
+    def _insert_file(self, name: str, info: dict, parse_status: str) -> str:
+        job = self.jobs[name]
+        file_id = new_id()
+        self.conn.execute(
+            UPLOADED_FILE_INSERT,
+            (
+                file_id,
+                job["manifest_file_id"],
+                self.upload_id,
+                name,
+                job["manifest_filename"],
+                info["digest"],
+                self.ts,
+                info["size"],
+                parse_status,
+                json.dumps(info["raw_keys"]) if info.get("raw_keys") else None,
+                job["config_digest"],
+            ),
+        )
+        return file_id
+
+    def _reuse(self, name: str, info: dict) -> None:
+        """Clones raw_data from the earlier extraction of identical content."""
+        job = self.jobs[name]
+        source = reuse_utils.find_source_file(
+            self.conn, info["digest"], job["manifest_file_id"], job["config_digest"]
+        )
+        if source is None:  # deleted since the hashes were listed; parse after all
+            self.closed.discard(name)
+            for kind, payload in _parse_file({**job, "known_hashes": ()}, self.batch_size):
+                self.handle(name, kind, payload)
+            return
+
+        source_file_id, source_upload_id = source
+        file_id = self._insert_file(name, info, "reused")
+        count = reuse_utils.clone_raw_data(
+            self.conn, source_file_id, file_id, self.upload_id
+        )
+        self.conn.commit()
+        self.reused[name] = {"source_upload_id": source_upload_id, "records": count}
+        print(
+            f"[Extractor] Reused {count} records for {job['manifest_file_id']} from upload {source_upload_id}"
+        )
+
+    def _discard(self, name: str) -> None:
+        """drop any batches already written for this file"""
+        file_id = self.file_ids.pop(name, None)
+        if not self.interleaved:
+            self.conn.rollback()
+        elif file_id:
+            self.conn.execute("DELETE FROM raw_data WHERE file_id = ?", (file_id,))
+            self.conn.execute("DELETE FROM uploaded_files WHERE id = ?", (file_id,))
+            self.conn.commit()
 
 
 def extract(
@@ -56,24 +351,42 @@ def extract(
     db_path: str = None,
     tmp_storage_dir: str = None,
     manifest_dir: str = None,
-    is_firefox: bool = False,
+    batch_size: int = RAW_DATA_BATCH_SIZE,
+    workers: int = 1,
+    raw_encoding: str = None,
+    bulk_load: bool = None,
 ) -> dict:
+    """
+    workers > 1 parses files in a process pool (headless CPython only; Pyodide
+    has no subprocesses) while this process stays the single SQLite writer.
+    raw_encoding ("columnar" or "columnar+zlib", see utils/raw_codec.py) stores
+    raw_data rows against a per-file key dictionary instead of as JSON objects.
+    bulk_load (default: the BULK_LOAD config value) runs the load as a
+    DatabaseSession bulk_load with deferred foreign keys, and into an empty
+    raw_data without its secondary indexes. A crash meanwhile can corrupt the
+    database, not just lose this upload.
+    """
 
     db_path = db_path or get_config_value("DB_PATH")
     tmp_storage_dir = tmp_storage_dir or get_config_value("TEMP_ZIP_DATA_STORAGE")
     manifest_dir = manifest_dir or get_config_value("MANIFESTS_DIR")
-    is_firefox = is_firefox or get_config_value("IS_FIREFOX")
+    raw_encoding = raw_encoding or get_config_value("RAW_DATA_ENCODING", default=None)
+    if bulk_load is None:
+        bulk_load = bool(get_config_value("BULK_LOAD", default=False))
 
     print(
         f"[Extractor] Extracting '{platform}' files from {tmp_storage_dir} using manifest from {manifest_dir}..."
     )
     ts = datetime.now(timezone.utc).timestamp()
-    upload_id = str(uuid.uuid4())
+    upload_id = new_id()
 
     try:
         manifest = Manifest(platform=platform, manifest_dir=manifest_dir)
+        RawEncoder(raw_encoding)  # reject an unknown encoding before touching the DB
 
-        with DatabaseSession(db_path) as conn:
+        with DatabaseSession(
+            db_path, bulk_load=bulk_load, defer_foreign_keys=bulk_load
+        ) as conn:
             if not safefileutils.exists(tmp_storage_dir):
                 print(
                     f"[Extractor] temp storage directory not found: {tmp_storage_dir}"
@@ -133,110 +446,42 @@ def extract(
                 "INSERT INTO uploads (id, platform, given_name, upload_timestamp, updated_at, color) VALUES (?, ?, ?, ?, ?, ?)",
                 (upload_id, platform, auto_name, ts, ts, assigned_color),
             )
-
-            partial_errors = []
-            for opfs_filename in files:
-                success = True
-                opfs_filepath = os.path.join(tmp_storage_dir, opfs_filename)
-
-                file_cfg = manifest.get_file_cfg(opfs_filename)
-
-                manifest_filename = file_cfg.get("path")
-                manifest_file_id = file_cfg.get("id")
-                parser_cfg = file_cfg.get(
-                    "parser", {}
-                )  # manifest YAML uses 'parser' not 'parser_config'
-                if (
-                    not manifest_file_id
-                    or not parser_cfg
-                    or not parser_cfg.get("format")
-                ):
-                    success = False
-                    continue
-
-                fmt = parser_cfg.get("format")
-                # print(f"[Extractor] Processing {opfs_filename} -> Source: {manifest_file_id} (Format: {fmt})")
-
-                try:
-                    parser = get_parser(fmt)
-                    if not parser:
-                        print(f"[Extractor] No parser found for format: {fmt}")
-                        success = False
-                        continue
-
-                    content = _file_read(opfs_filepath, is_firefox)
-
-                    records = parser.extract(content, parser_cfg, opfs_filename)
-                    if not records:
-                        print(f"  -> No records extracted from {opfs_filename}")
-                        success = False
-                        continue
-                    # print(f"  -> Extracted {len(records)} records. Inserting...")
-                    print(
-                        f"[Extractor] Extracted {len(records)} records from {manifest_file_id}"
-                    )
-
-                    # read into db
-                    file_id = str(uuid.uuid4())
-                    file_info = (
-                        file_id,
-                        manifest_file_id,
-                        upload_id,
-                        opfs_filename,
-                        manifest_filename,
-                        _file_hash(opfs_filepath, is_firefox=is_firefox),
-                        ts,
-                        _file_size_bytes(opfs_filepath, is_firefox=is_firefox),
-                        "success" if success else "failure",
-                    )
-                    conn.execute(
-                        "INSERT INTO uploaded_files (id, manifest_file_id, upload_id, opfs_filename, manifest_filename, file_hash, upload_timestamp, file_size_bytes, parse_status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                        file_info,
-                    )
-
-                    raw_data_rows = []
-                    for r in records:
-                        line_numbers = r.pop("__line_numbers", [1])
-                        raw_data_rows.append(
-                            (
-                                str(uuid.uuid4()),
-                                upload_id,
-                                file_id,
-                                json.dumps(r),
-                                json.dumps(line_numbers),
-                            )
-                        )
-                    conn.executemany(
-                        "INSERT INTO raw_data (id, upload_id, file_id, data, line_numbers) VALUES (?, ?, ?, ?, ?)",
-                        raw_data_rows,
-                    )
-                    conn.commit()
-
-                    row = conn.execute(
-                        "SELECT COUNT(*) as count FROM raw_data"
-                    ).fetchone()
-                    # print(f"  -> Total raw_data rows in DB: {row[0] if row else 'unknown'}")
-
-                except FileLevelError as e:
-                    print(
-                        f"[Extractor] File-level parse error for {opfs_filename}: {e}"
-                    )
-                    partial_errors.append(
-                        {"file": opfs_filename, "level": "error", "msg": str(e)}
-                    )
-                    success = False
-                except Exception as e:
-                    print(f"[Extractor] Error processing {opfs_filename}: {e}")
-                    traceback.print_exc()
-                    partial_errors.append(
-                        {"file": opfs_filename, "level": "error", "msg": str(e)}
-                    )
-                    success = False
+            conn.commit()  # per-file failures below roll back to this point
+
+            jobs = _file_jobs(
+                manifest,
+                files,
+                tmp_storage_dir,
+                reuse_utils.known_hashes(conn),
+                raw_encoding,
+            )
+            parallel = workers > 1 and len(jobs) > 1 and sys.platform != "emscripten"
+            writer = _RawDataWriter(
+                conn, upload_id, ts, jobs, interleaved=parallel, batch_size=batch_size
+            )
+            if parallel:
+                print(f"[Extractor] Parsing {len(jobs)} files with {workers} workers")
+                messages = _iter_parallel(jobs, batch_size, workers)
+            else:
+                messages = _iter_sequential(jobs, batch_size)
+            # with nothing to reuse, raw_data isn't read during the load, so an
+            # empty one gets its indexes built once at the end, not per row
+            reuse = any(j["known_hashes"] for j in jobs)
+            deferred = ("raw_data",) if bulk_load and not reuse else ()
+            with deferred_indexes(conn, deferred):
+                for name, kind, payload in messages:
+                    writer.handle(name, kind, payload)
 
             return {
                 "status": "success",
                 "upload_id": upload_id,
-                "partial_errors": partial_errors,
+                "partial_errors": writer.partial_errors,
+                "parser_stats": writer.file_stats,
+                "reuse_summary": {
+                    "files_reused": len(writer.reused),
+                    "records_cloned": sum(r["records"] for r in writer.reused.values()),
+                    "files": writer.reused,
+                },
             }
 
     except Exception as e:
@@ -8,27 +8,73 @@ from field_normalization.auth_related_events import treat_event_as_auth_device
 from python_core.utils.pyodide_utils import get_config_value
 
 
+def _normalize_row(row, platform, ua_parser, file_map, table=""):
+    attrs = row["attributes"] or {}
+    file_info = file_map.get(attrs.get("file_id"))
+    if attrs.get("user_agent_original") or attrs.get("user_agent_os_full"):
+        attrs.update(ua_parser.parse(attrs, file_info=file_info))
+    origin = determine_origin(platform, attrs, file_info=file_info)
+    attrs = normalize_geo_fields(attrs)
+    attrs = normalize_device_fields(attrs)
+
+    dct = {
+        "id": row["id"],
+        "attributes": json.dumps(attrs, sort_keys=True),
+        "origin": origin,
+    }
+    if table == "events":
+        dct["treat_as_auth_device"] = treat_event_as_auth_device(row)
+    return dct
+
+
 def _normalize(rows, platform, ua_parser, file_map, table=""):
-    updates = []
-    for row in rows:
-        attrs = row["attributes"] or {}
-        file_info = file_map.get(attrs.get("file_id"))
-        if attrs.get("user_agent_original") or attrs.get("user_agent_os_full"):
-            attrs.update(ua_parser.parse(attrs, file_info=file_info))
-        origin = determine_origin(platform, attrs, file_info=file_info)
-        attrs = normalize_geo_fields(attrs)
-        attrs = normalize_device_fields(attrs)
-
-        dct = {
-            "id": row["id"],
-            "attributes": json.dumps(attrs, sort_keys=True),
-            "origin": origin,
+    return [_normalize_row(row, platform, ua_parser, file_map, table) for row in rows]
+
+
+class RowNormalizer:
+    """
+    normalize() for rows semantic mapping still holds in memory (run's fused
+    mode), so they are inserted in final form instead of updated afterwards.
+    Returns the same {id, attributes, origin[, treat_as_auth_device]} updates.
+    """
+
+    def __init__(self, conn, upload_id: str):
+        upload = conn.execute(
+            "SELECT platform FROM uploads WHERE id = ?", (upload_id,)
+        ).fetchone()
+        self.platform = upload[0] if upload else None
+        self.file_map = {
+            r[0]: {"id": r[0], "manifest_file_id": r[1], "manifest_filename": r[2]}
+            for r in conn.execute(
+                "SELECT id, manifest_file_id, manifest_filename FROM uploaded_files WHERE upload_id = ?",
+                (upload_id,),
+            )
+        }
+        self.ua_parser = UserAgentParser()
+        self.count = 0
+
+    def device(self, row_id: str, attributes: dict) -> dict:
+        self.count += 1
+        row = {"id": row_id, "attributes": dict(attributes)}
+        return _normalize_row(row, self.platform, self.ua_parser, self.file_map)
+
+    def event(self, e) -> dict:
+        """e is a semantic_map EventRow; its own attributes stay unnormalized for merging."""
+        self.count += 1
+        row = {
+            "id": e.id,
+            "attributes": dict(e.attributes),
+            "action": e.event_action,
+            "category": e.event_category,
         }
-        if table == "events":
-            dct["treat_as_auth_device"] = treat_event_as_auth_device(row)
+        return _normalize_row(
+            row, self.platform, self.ua_parser, self.file_map, table="events"
+        )
+
 
-        updates.append(dct)
-    return updates
+def _all_reused(file_ids: str, reused_file_ids: set) -> bool:
+    file_ids = set(json.loads(file_ids or "[]"))
+    return bool(file_ids) and file_ids <= reused_file_ids
 
 
 def normalize(upload_id: str, db_path: str = None) -> dict:
@@ -52,6 +98,20 @@ def normalize(upload_id: str, db_path: str = None) -> dict:
             (upload_id,),
         ).fetchall()
         file_map = {uf["id"]: uf for uf in uploaded_files}
+        # rows semantic_map cloned for re-uploaded files were normalized with
+        # their source: all devices_raw of a reused file, and events drawn only
+        # from reused files
+        reused_file_ids = {
+            r["file_id"]
+            for r in conn.execute(
+                """
+                SELECT r.file_id FROM file_reuse r
+                JOIN uploaded_files f ON f.id = r.file_id
+                WHERE f.upload_id = ?
+                """,
+                (upload_id,),
+            )
+        }
 
         ua_parser = UserAgentParser()
 
@@ -60,12 +120,14 @@ def normalize(upload_id: str, db_path: str = None) -> dict:
 
         rows = conn.execute(
             """
-            SELECT id, attributes
+            SELECT id, file_id, attributes
             FROM devices_raw
             WHERE upload_id = ?
             """,
             (upload_id,),
         ).fetchall()
+        if reused_file_ids:
+            rows = [r for r in rows if r["file_id"] not in reused_file_ids]
 
         if rows:
             updates = _normalize(rows, platform, ua_parser, file_map, table="devices")
@@ -88,12 +150,14 @@ def normalize(upload_id: str, db_path: str = None) -> dict:
         print(f"[FieldNormalizeWorker] Normalizing events for upload_id={upload_id}")
         rows = conn.execute(
             """
-            SELECT id, attributes, event_action as action, event_category as category
+            SELECT id, file_ids, attributes, event_action as action, event_category as category
             FROM events
             WHERE upload_id = ?
             """,
             (upload_id,),
         ).fetchall()
+        if reused_file_ids:
+            rows = [r for r in rows if not _all_reused(r["file_ids"], reused_file_ids)]
 
         if rows:
             updates = _normalize(rows, platform, ua_parser, file_map, table="events")
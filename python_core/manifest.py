@@ -1,7 +1,66 @@
 import yaml
 import os
+import re
 import builtins
 import fnmatch
+import hashlib
+import python_core.utils.safe_file_utils as safefileutils
+
+
+_COMPILED = {}  # manifest yaml path -> (sha1 of its bytes, _CompiledManifest)
+
+
+class _PathMatcher:
+    """All `files` path globs as one regex; the first entry that matches wins, as before."""
+
+    def __init__(self, files: list):
+        self.files = files
+        self.entries = []
+        alternatives = []
+        for fs in files:
+            path = fs.get("path")
+            if not path:
+                continue
+            alternatives.append(
+                f"(?P<f{len(self.entries)}>{fnmatch.translate(path.lower())})"
+            )
+            self.entries.append(fs)
+        self.regex = re.compile("|".join(alternatives)) if alternatives else None
+
+    def match(self, name: str) -> dict:
+        m = self.regex.match(name) if self.regex else None
+        # each alternative ends in \Z, so the outermost group that closed last is the entry
+        return self.entries[int(m.lastgroup[1:])] if m else {}
+
+
+class _CompiledManifest:
+    def __init__(self, config: dict):
+        self.config = config
+        self.valid = None  # validate() result, filled in by the first Manifest that asks
+        self.view_index_map = {}
+        for i, v in enumerate(config.get("views", [])):
+            file_id = v.get("file", {}).get("id")
+            if file_id:
+                self.view_index_map.setdefault(file_id, []).append(i)
+        self.matcher = _PathMatcher(config.get("files", []))
+        self.view_plans = {}  # manifest file_id -> [ViewPlan], filled on demand
+        self.date_parsers = {}  # (file_id, source) -> DateParser shared by those plans
+
+
+def _compiled(path: str) -> _CompiledManifest:
+    """
+    Parsed and indexed manifest, shared by every Manifest in the process until
+    the YAML changes. Keyed on a hash of the bytes rather than mtime because
+    Firefox Pyodide can't os.stat().
+    """
+    raw = safefileutils.read_bytes(path)
+    digest = hashlib.sha1(raw).hexdigest()
+    cached = _COMPILED.get(path)
+    if cached and cached[0] == digest:
+        return cached[1]
+    compiled = _CompiledManifest(yaml.safe_load(raw.decode("utf-8")) or {})
+    _COMPILED[path] = (digest, compiled)
+    return compiled
 
 
 class Manifest:
@@ -10,23 +69,22 @@ class Manifest:
     ) -> None:
         manifest_dir = manifest_dir or getattr(builtins, "MANIFESTS_DIR", "/manifests")
         self.platform = platform
-        self.view_index_map = {}  # manifest file_id --> list of view indexes
-        self.config = {}
 
-        with open(
-            os.path.join(manifest_dir, f"{platform}.yaml"), "r", encoding="utf-8"
-        ) as f:
-            self.config = yaml.safe_load(f)
+        compiled = _compiled(os.path.join(manifest_dir, f"{platform}.yaml"))
+        # top-level copy so reassigning a section doesn't leak into the cache;
+        # the nested views/files entries are shared and must be treated as read-only
+        self.config = dict(compiled.config)
+        # manifest file_id --> list of view indexes
+        self.view_index_map = compiled.view_index_map
+        self._matcher = compiled.matcher
+        self._view_plans = compiled.view_plans
+        self.date_parsers = compiled.date_parsers
 
-        if validate and not self.validate():
-            raise ValueError(f"[Manifest] '{platform}' failed validation.")
-
-        for i, v in enumerate(self.config.get("views", [])):
-            file_id = v.get("file", {}).get("id")
-            if file_id:
-                if file_id not in self.view_index_map:
-                    self.view_index_map[file_id] = []
-                self.view_index_map[file_id].append(i)
+        if validate:
+            if compiled.valid is None:
+                compiled.valid = self.validate()
+            if not compiled.valid:
+                raise ValueError(f"[Manifest] '{platform}' failed validation.")
 
     def validate(self) -> bool:
         if "files" not in self.config:
@@ -65,11 +123,10 @@ class Manifest:
         if len(parts) > 1:
             clean_name = parts[1]  # Everything after the platform prefix
 
-        for fs in self.config.get("files", []):
-            path = fs.get("path")
-            if path and fnmatch.fnmatch(clean_name.lower(), path.lower()):
-                return fs
-        return {}
+        files = self.config.get("files", [])
+        if self._matcher.files is not files:  # section replaced after loading
+            self._matcher = _PathMatcher(files)
+        return self._matcher.match(clean_name.lower())
 
     def views(self, manifest_file_id: str) -> list:
         if manifest_file_id not in self.view_index_map:
@@ -78,3 +135,15 @@ class Manifest:
             )
         indexes = self.view_index_map.get(manifest_file_id, [])
         return [self.config.get("views", [])[i] for i in indexes]
+
+    def view_plans(self, manifest_file_id: str) -> list:
+        """views() compiled for semantic mapping, built once per manifest (see semantic_map/view_plan.py)."""
+        plans = self._view_plans.get(manifest_file_id)
+        if plans is None:
+            from semantic_map.view_plan import ViewPlan
+
+            plans = [
+                ViewPlan(v, self.date_parsers) for v in self.views(manifest_file_id)
+            ]
+            self._view_plans[manifest_file_id] = plans
+        return plans
@@ -4,33 +4,46 @@ import semantic_map.worker as semantic_map_worker
 from field_normalization import worker as norm_worker
 import device_grouping2.worker as device_grouping2_worker
 from semantic_map.worker import get_counts
+from python_core.utils.pyodide_utils import get_config_value
+from db_session import pipeline_session
 
 
-def run(platform: str, given_name: str) -> dict:
-    # 1. Extract
-    js.reportProgress("extract", 30)
-    extract_res = extractor_worker.extract(platform, given_name)
-    upload_id = extract_res.get("upload_id")
-    if not upload_id:
-        raise ValueError("Extraction failed to return an upload_id")
+def run(platform: str, given_name: str, fused: bool = None) -> dict:
+    """
+    fused (default: the FUSED_PIPELINE config value) normalizes events and
+    devices_raw while semantic mapping still holds them, so each row is
+    written once in final form and the separate normalize pass is skipped.
+    """
+    if fused is None:
+        fused = bool(get_config_value("FUSED_PIPELINE", default=False))
 
-    # 2. Semantic Map
-    js.reportProgress("semantic_map", 40)
-    semantic_map_worker.map(platform, upload_id)
+    # one connection (and on Firefox one OPFS mirror) for every stage
+    with pipeline_session():
+        # 1. Extract
+        js.reportProgress("extract", 30)
+        extract_res = extractor_worker.extract(platform, given_name)
+        upload_id = extract_res.get("upload_id")
+        if not upload_id:
+            raise ValueError("Extraction failed to return an upload_id")
 
-    # 3. Normalize
-    js.reportProgress("normalize", 60)
-    norm_worker.normalize(upload_id)
+        # 2. Semantic Map (+ normalize when fused)
+        js.reportProgress("semantic_map", 40)
+        semantic_map_worker.map(platform, upload_id, normalize=fused)
 
-    # 4. Group
-    js.reportProgress("group", 85)
-    device_grouping2_worker.group(upload_id)
+        # 3. Normalize
+        js.reportProgress("normalize", 60)
+        if not fused:
+            norm_worker.normalize(upload_id)
 
-    counts = get_counts(upload_id)
-    return {
-        "status": "success",
-        "upload_id": upload_id,
-        "events_count": counts.get("events_count", 0),
-        "devices_count": counts.get("devices_count", 0),
-        "partial_errors": extract_res.get("partial_errors", []),
-    }
+        # 4. Group
+        js.reportProgress("group", 85)
+        device_grouping2_worker.group(upload_id)
+
+        counts = get_counts(upload_id)
+        return {
+            "status": "success",
+            "upload_id": upload_id,
+            "events_count": counts.get("events_count", 0),
+            "devices_count": counts.get("devices_count", 0),
+            "partial_errors": extract_res.get("partial_errors", []),
+        }
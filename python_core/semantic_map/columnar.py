@@ -0,0 +1,194 @@
+"""
+Columnar mapping for tabular sources (CSV, csv_multi, HTML tables). Every row
+of such a file has the same flat keys, so instead of mapping record by record
+the rows are transposed into columns once: `where` filters become per-column
+masks, and each field (lookup, coalesce, regex, datetime conversion) is
+computed once per column and shared by every view that reads it. Rows
+stored with the columnar raw encoding are used without building dicts at all.
+
+Views with nested paths, and rows whose keys differ from the rest of their
+file, go through the per-record path in worker._generate_table_rows.
+"""
+
+import json
+from utils.misc import is_trivial
+from python_core.utils import raw_codec
+
+
+TABULAR_FORMATS = ("csv", "csv_multi", "html", "html_table", "html_ggl_subscriber_info")
+
+
+def is_tabular(manifest, manifest_file_id: str) -> bool:
+    for fs in manifest.config.get("files", []):
+        if fs.get("id") == manifest_file_id:
+            return fs.get("parser", {}).get("format") in TABULAR_FORMATS
+    return False
+
+
+class ColumnBlock:
+    """Rows of one uploaded file that share a key list, read column by column."""
+
+    def __init__(self, file_id: str, keys: tuple):
+        self.file_id = file_id
+        self.keys = keys
+        self._index = {k: i for i, k in enumerate(keys)}
+        self.raw_data_ids = []
+        self.rows = []  # value lists aligned with keys
+        self._columns = {}
+        self._lowered = {}
+        self._fields = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def records(self):
+        keys = self.keys
+        for raw_data_id, row in zip(self.raw_data_ids, self.rows):
+            yield raw_data_id, dict(zip(keys, row))
+
+    def column(self, key: str) -> list:
+        """Values of `key`, with None (and absent keys) as "" like a path lookup's default."""
+        col = self._columns.get(key)
+        if col is None:
+            i = self._index.get(key)
+            if i is None:
+                col = [""] * len(self.rows)
+            else:
+                col = ["" if r[i] is None else r[i] for r in self.rows]
+            self._columns[key] = col
+        return col
+
+    def lowered(self, key: str) -> list:
+        col = self._lowered.get(key)
+        if col is None:
+            col = self._lowered[key] = [str(v).lower() for v in self.column(key)]
+        return col
+
+    def field(self, f) -> list:
+        """FieldPlan.value for every row; f's sources must all be flat keys."""
+        signature = (
+            tuple(s.flat_key if s else None for s in f.sources),
+            f.coalesce,
+            f.regex.pattern if f.regex is not None else None,
+            f.is_date,
+        )
+        col = self._fields.get(signature)
+        if col is not None:
+            return col
+
+        n = len(self.rows)
+        columns = [self.column(s.flat_key) if s else [""] * n for s in f.sources]
+        if f.coalesce and columns:
+            col = [
+                next((v for v in values if not is_trivial(v)), "")
+                for values in zip(*columns)
+            ]
+        elif columns and f.sources[0]:
+            col = columns[0]
+        else:
+            col = [""] * n
+
+        if f.regex is not None:
+            memo = {}
+            out = []
+            for v in col:
+                if v:
+                    s = str(v)
+                    if s not in memo:
+                        match = f.regex.search(s)
+                        memo[s] = match.group(1).strip() if match else ""
+                    v = memo[s]
+                out.append(v)
+            col = out
+
+        if f.dates is not None:
+            col = [f.dates.unix_ms(v) for v in col]
+
+        self._fields[signature] = col
+        return col
+
+
+def build_blocks(rows: list):
+    """
+    Splits semantic_map cursor rows (id, file_id, data, manifest_file_id,
+    encoding, raw_keys) into ColumnBlocks keyed on (file_id, keys), plus the
+    rows that aren't flat dicts and must be mapped (and reported) per record.
+    """
+    blocks = {}
+    rest = []
+    for row in rows:
+        raw_data_id, file_id, data, _, encoding, raw_keys = row
+        try:
+            if encoding is None:
+                record = json.loads(data)
+                if not isinstance(record, dict):
+                    raise ValueError("not a record")
+                keys, values = tuple(record), list(record.values())
+            else:
+                keys = raw_codec.parse_keys(raw_keys)
+                values = raw_codec.decode_values(data, encoding)
+        except Exception:
+            rest.append(row)
+            continue
+        block = blocks.get((file_id, keys))
+        if block is None:
+            block = blocks[(file_id, keys)] = ColumnBlock(file_id, keys)
+        block.raw_data_ids.append(raw_data_id)
+        block.rows.append(values)
+    return list(blocks.values()), rest
+
+
+def is_columnar(plan) -> bool:
+    """False when the view's filter or a field needs a nested path."""
+    return plan.column_filter is not False and all(
+        s is None or s.flat_key is not None for f in plan.fields for s in f.sources
+    )
+
+
+def map_block(block: ColumnBlock, plans: list, emit) -> None:
+    """
+    Runs every plan over the block, calling emit(fields, file_id, raw_data_id)
+    per match. Columns are computed per plan up front; matches are emitted
+    row by row, each row's in plan order, as the per-record path does, so
+    deduplication sees the same event order either way.
+    """
+    mappers = []
+    records = None
+    for plan in plans:
+        if is_columnar(plan):
+            mappers.append(_column_mapper(block, plan))
+        else:
+            if records is None:
+                records = [record for _, record in block.records()]
+            mappers.append(_record_mapper(records, plan))
+
+    file_id = block.file_id
+    for i, raw_data_id in enumerate(block.raw_data_ids):
+        for mapper in mappers:
+            fields = mapper(i)
+            if fields is not None:
+                emit(fields, file_id, raw_data_id)
+
+
+def _column_mapper(block: ColumnBlock, plan):
+    mask = plan.column_filter(block) if plan.column_filter else None
+    columns = [(f.target, block.field(f)) for f in plan.fields]
+    static = plan.static
+
+    def map_row(i):
+        if mask is not None and not mask[i]:
+            return None
+        fields = dict(static)
+        for target, col in columns:
+            fields[target] = col[i]
+        return fields
+
+    return map_row
+
+
+def _record_mapper(records: list, plan):
+    def map_row(i):
+        record = records[i]
+        return plan.map(record) if plan.applies(record) else None
+
+    return map_row
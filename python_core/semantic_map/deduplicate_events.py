@@ -1,78 +1,186 @@
+from bisect import bisect_left, bisect_right
+from semantic_map.rows import EventRow
+
 DEFAULT_EVENT_ACTIONS_TO_EXCLUDE = []  # e.g. messages, potentially, which might be sent in quick succession
+DEFAULT_TOLERANCE_MS = 1000
+
+
+class EventDeduplicator:
+    """
+    Merges events of the same (event_kind, event_action) whose timestamps are
+    within the action's tolerance of an event already kept. Kept timestamps
+    are held per key in sorted arrays, so each lookup is a bisect to the
+    nearest neighbours rather than a scan, and events can be fed in any order
+    and in chunks: add() returns the events of a chunk that are new originals,
+    and take_merged() the ones from earlier chunks (or seeded from the
+    database) that have absorbed duplicates since and must be written back.
+
+    Events seeded as foreign (other uploads' events, for the cross-upload
+    pass) are never merged into or written back: an event matching one is
+    kept with duplicate_of set to its id, and takes its place for the rest
+    of the run, so the upload's own later duplicates merge into that event.
+    """
+
+    def __init__(
+        self,
+        tolerance_ms=DEFAULT_TOLERANCE_MS,
+        merge_conflict_policy="keep_original",  # or "log_conflict"
+        exclude=DEFAULT_EVENT_ACTIONS_TO_EXCLUDE,
+        tolerances: dict = None,  # event_action -> tolerance_ms
+    ):
+        self.tolerance_ms = tolerance_ms
+        self.merge_conflict_policy = merge_conflict_policy
+        self.exclude = set(exclude or [])
+        self.tolerances = dict(tolerances or {})
+        self._times = {}  # (kind, action) -> sorted timestamps of kept events
+        self._kept = {}  # (kind, action) -> kept events, aligned with _times
+        self._flushed = set()  # ids of kept events already handed out
+        self._merged = {}  # id -> flushed event that has absorbed duplicates
+        self._foreign = set()  # ids of seeded events of other uploads
+
+    @classmethod
+    def from_manifest(cls, manifest, **kwargs):
+        """
+        Settings from the manifest's optional top-level `dedup` section:
+        tolerance_ms, exclude (event actions never merged) and actions
+        (event_action -> tolerance_ms).
+        """
+        cfg = manifest.config.get("dedup") or {}
+        return cls(
+            tolerance_ms=cfg.get("tolerance_ms", DEFAULT_TOLERANCE_MS),
+            exclude=cfg.get("exclude", DEFAULT_EVENT_ACTIONS_TO_EXCLUDE),
+            tolerances=cfg.get("actions"),
+            **kwargs,
+        )
+
+    def tolerance(self, action) -> int:
+        return self.tolerances.get(action, self.tolerance_ms)
+
+    def add(self, event_rows: list) -> list:
+        """Deduplicates a chunk (sorted in place); returns its events that were kept."""
+        new_rows = []
+        event_rows.sort(key=lambda x: x.timestamp or 0)
+        for e in event_rows:
+            orig = self._match(e)
+            if orig is None:
+                self._keep(e)
+                new_rows.append(e)
+            elif orig.id in self._foreign:
+                e.duplicate_of = orig.id
+                self._drop(orig)
+                self._keep(e)
+                new_rows.append(e)
+            else:
+                self._merge(orig, e)
+        self._flushed.update(e.id for e in new_rows)
+        return new_rows
+
+    def seed(self, event_rows: list, foreign: bool = False) -> None:
+        """
+        Registers events that are already stored, so later chunks merge into
+        them, or with foreign, are marked as their duplicates.
+        """
+        for e in event_rows:
+            if e.id not in self._flushed:
+                self._keep(e)
+                self._flushed.add(e.id)
+                if foreign:
+                    self._foreign.add(e.id)
+
+    def take_merged(self) -> list:
+        """Stored events that absorbed duplicates since the last call."""
+        merged = list(self._merged.values())
+        self._merged.clear()
+        return merged
+
+    def _match(self, e: EventRow):
+        action = e.event_action
+        timestamp = e.timestamp
+        if action in self.exclude or not timestamp:
+            return None
+        key = (e.event_kind, action)
+        times = self._times.get(key)
+        if not times:
+            return None
+
+        # nearest kept timestamp on either side; ties go to the earlier event
+        i = bisect_left(times, timestamp)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(times):
+                diff = abs(times[j] - timestamp)
+                if best is None or diff < best[0]:
+                    best = (diff, j)
+        if best[0] > self.tolerance(action):
+            return None
+        return self._kept[key][best[1]]
+
+    def _keep(self, e: EventRow) -> None:
+        timestamp = e.timestamp
+        if e.event_action in self.exclude or not timestamp:
+            return
+        key = (e.event_kind, e.event_action)
+        times = self._times.setdefault(key, [])
+        kept = self._kept.setdefault(key, [])
+        i = bisect_right(times, timestamp)  # appends when fed in timestamp order
+        times.insert(i, timestamp)
+        kept.insert(i, e)
+
+    def _drop(self, e: EventRow) -> None:
+        key = (e.event_kind, e.event_action)
+        times = self._times[key]
+        kept = self._kept[key]
+        i = bisect_left(times, e.timestamp)
+        while kept[i] is not e:  # among events with the same timestamp
+            i += 1
+        del times[i]
+        del kept[i]
+
+    def _merge(self, orig_event: EventRow, e: EventRow) -> None:
+        """merge new event INTO original event"""
+        timestamp = e.timestamp
+        orig_event.raw_data_ids.extend(e.raw_data_ids)
+        orig_event.file_ids.extend(e.file_ids)
+        orig_event.extra_timestamps.append(timestamp)
+        orig_event.deduplicated = True
+
+        # merge attributes
+        new_attrs = e.attributes
+        orig_attrs = orig_event.attributes
+        for k, v in new_attrs.items():
+            if k not in orig_attrs:
+                orig_attrs[k] = v
+            elif orig_attrs[k] != v:
+                if self.merge_conflict_policy == "keep_original":
+                    continue
+                elif self.merge_conflict_policy == "log_conflict":
+                    # conflict - keep original but log the conflict in a special field
+                    conflict_key = f"_conflict_{k}"
+                    if conflict_key not in orig_attrs:
+                        orig_attrs[conflict_key] = []
+                    orig_attrs[conflict_key].append(
+                        {
+                            "original": orig_attrs[k],
+                            "new": v,
+                            "timestamp": timestamp,
+                        }
+                    )
+
+        if orig_event.id in self._flushed:
+            self._merged[orig_event.id] = orig_event
 
 
 def deduplicate_events(
-    event_rows: list[dict],  # event_rows, from semantic_map/worker.py
-    tolerance_ms=1000,
+    event_rows: list,  # EventRows, from semantic_map/worker.py
+    tolerance_ms=DEFAULT_TOLERANCE_MS,
     merge_conflict_policy="keep_original",  # or "log_conflict"
     exclude=DEFAULT_EVENT_ACTIONS_TO_EXCLUDE,
-) -> list[dict]:
-    seen_originals = {}
-    final_rows = []
-
-    event_rows.sort(key=lambda x: x.get("timestamp") or 0)
-
-    for e in event_rows:
-        action = e.get("event_action")
-        timestamp = e.get("timestamp", 0)
-
-        if action in exclude or timestamp == 0:
-            final_rows.append(e)
-            continue
-
-        kind = e.get("event_kind", "_unknown")
-        key = (kind, action)
-        is_dup = False
-
-        if key in seen_originals:
-            orig_event = seen_originals[key][
-                -1
-            ]  # optimization, need to test if works on all edge cases #TODO
-            orig_ts = orig_event.get("timestamp", 0)
-
-            if orig_ts != 0 and abs(orig_ts - timestamp) <= tolerance_ms:
-                is_dup = True
-
-                # merge new event INTO original event
-                for r_id in e.get("raw_data_ids", []):
-                    orig_event["raw_data_ids"].append(r_id)
-                for f_id in e.get("file_ids", []):
-                    orig_event["file_ids"].append(f_id)
-
-                orig_event["extra_timestamps"].append(timestamp)
-                orig_event["deduplicated"] = True
-
-                # merge attributes
-                new_attrs = e.get("attributes", {})
-                orig_attrs = orig_event.get("attributes", {})
-                for k, v in new_attrs.items():
-                    if k not in orig_attrs:
-                        orig_attrs[k] = v
-                    elif orig_attrs[k] != v:
-                        if merge_conflict_policy == "keep_original":
-                            continue
-                        elif merge_conflict_policy == "log_conflict":
-                            # conflict - keep original but log the conflict in a special field
-                            conflict_key = f"_conflict_{k}"
-                            if conflict_key not in orig_attrs:
-                                orig_attrs[conflict_key] = []
-                            orig_attrs[conflict_key].append(
-                                {
-                                    "original": orig_attrs[k],
-                                    "new": v,
-                                    "timestamp": timestamp,
-                                }
-                            )
-
-                orig_event["attributes"] = orig_attrs
-
-        if not is_dup:
-            if key not in seen_originals:
-                seen_originals[key] = []
-            seen_originals[key].append(e)
-            final_rows.append(e)
-
-    return final_rows
+    tolerances: dict = None,
+) -> list:
+    """All of event_rows at once; returns the kept events in timestamp order."""
+    return EventDeduplicator(
+        tolerance_ms, merge_conflict_policy, exclude, tolerances
+    ).add(event_rows)
 
 
 # ----------------------------------------------------
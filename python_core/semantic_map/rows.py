@@ -0,0 +1,158 @@
+"""
+Row types semantic mapping hands from _generate_table_rows through
+deduplication to the inserts. Columns are in a fixed order so the rows go to
+executemany as positional tuples, past DatabaseSession's dict serialization.
+
+An EventRow keeps the columns deduplication merges into (file_ids,
+raw_data_ids, attributes, extra_timestamps) as Python objects until params();
+event_category and event_type never change and are JSON text from the start.
+A devices_raw row is never touched again and is built as its final tuple.
+"""
+
+import json
+
+
+EVENT_COLUMNS = (
+    "id",
+    "upload_id",
+    "file_ids",
+    "raw_data_ids",
+    "timestamp",
+    "event_action",
+    "event_kind",
+    "event_category",
+    "event_type",
+    "event_type_msg",
+    "attributes",
+    "origin",
+    "treat_as_auth_device",
+    "deduplicated",
+    "extra_timestamps",
+    "duplicate_of",
+)
+
+DEVICE_COLUMNS = (
+    "id",
+    "upload_id",
+    "file_id",
+    "raw_data_id",
+    "entity_type",
+    "event_kind",
+    "attributes",
+    "origin",
+)
+
+
+def _insert(table: str, columns: tuple) -> str:
+    placeholders = ", ".join("?" * len(columns))
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+EVENTS_INSERT = _insert("events", EVENT_COLUMNS)
+DEVICES_RAW_INSERT = _insert("devices_raw", DEVICE_COLUMNS)
+
+
+def _json_text(value, empty: str = "[]") -> str:
+    """As the old _stringify: lists and dicts as JSON, anything else as empty."""
+    return json.dumps(value) if isinstance(value, (list, dict)) else empty
+
+
+class EventRow:
+    __slots__ = EVENT_COLUMNS
+
+    def __init__(
+        self,
+        id: str,
+        upload_id: str,
+        file_ids: list,
+        raw_data_ids: list,
+        timestamp=None,
+        event_action: str = None,
+        event_kind: str = "event",
+        event_category: list = None,
+        event_type: list = None,
+        event_type_msg: str = None,
+        attributes: dict = None,
+        origin: str = None,
+        treat_as_auth_device=0,
+        deduplicated: bool = False,
+        extra_timestamps: list = None,
+        duplicate_of: str = None,
+    ):
+        self.id = id
+        self.upload_id = upload_id
+        self.file_ids = file_ids
+        self.raw_data_ids = raw_data_ids
+        self.timestamp = timestamp
+        self.event_action = event_action
+        self.event_kind = event_kind
+        self.event_category = _json_text(event_category)
+        self.event_type = _json_text(event_type)
+        self.event_type_msg = event_type_msg
+        self.attributes = attributes if attributes is not None else {}
+        self.origin = origin
+        self.treat_as_auth_device = treat_as_auth_device
+        self.deduplicated = deduplicated
+        self.extra_timestamps = [] if extra_timestamps is None else extra_timestamps
+        self.duplicate_of = duplicate_of
+
+    def __repr__(self) -> str:
+        return f"EventRow({self.id}, {self.event_action} @ {self.timestamp})"
+
+    def params(self, normalized: dict = None) -> tuple:
+        """
+        Values for EVENTS_INSERT. `normalized` is a field_normalization update
+        for this row (attributes, origin, treat_as_auth_device) to insert in
+        place of the row's own.
+        """
+        if normalized is None:
+            attributes = json.dumps(self.attributes)
+            origin = self.origin
+            treat_as_auth_device = self.treat_as_auth_device
+        else:
+            attributes = normalized["attributes"]
+            origin = normalized["origin"]
+            treat_as_auth_device = normalized["treat_as_auth_device"]
+        return (
+            self.id,
+            self.upload_id,
+            json.dumps(self.file_ids),
+            json.dumps(self.raw_data_ids),
+            self.timestamp,
+            self.event_action,
+            self.event_kind,
+            self.event_category,
+            self.event_type,
+            self.event_type_msg,
+            attributes,
+            origin,
+            treat_as_auth_device,
+            self.deduplicated,
+            json.dumps(self.extra_timestamps),
+            self.duplicate_of,
+        )
+
+
+def device_row(
+    id: str,
+    upload_id: str,
+    file_id: str,
+    raw_data_id: str,
+    entity_type: str,
+    event_kind: str,
+    attributes,
+    origin: str = None,
+) -> tuple:
+    """Values for DEVICES_RAW_INSERT; attributes may already be JSON text."""
+    if not isinstance(attributes, str):
+        attributes = _json_text(attributes, "{}")
+    return (
+        id,
+        upload_id,
+        file_id,
+        raw_data_id,
+        entity_type,
+        event_kind,
+        attributes,
+        origin,
+    )
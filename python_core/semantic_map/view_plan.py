@@ -0,0 +1,125 @@
+"""
+A manifest view compiled for the per-record loop of semantic mapping: the
+`where` predicate, cleaned target names and static fields, coalesce source
+lists and compiled regexes are built once (Manifest.view_plans caches them
+per manifest) instead of for every record x view pair.
+"""
+
+import re
+from utils.misc import clean_target, is_trivial
+from utils.json_utils import compile_path
+from utils.filter_builder import make_filter, make_column_filter
+from utils.time_utils import DateParser
+
+
+DATE_TYPES = ("datetime", "timestamp", "date")
+
+
+def date_parser(parsers: dict, manifest_file_id: str, source) -> DateParser:
+    """
+    The DateParser of one (manifest file, source) field in `parsers`, shared by
+    every view reading that field. Manifest passes its compiled manifest's
+    dict, so the parsers live and go with the cached ViewPlans.
+    """
+    key = (manifest_file_id, repr(source))
+    parser = parsers.get(key)
+    if parser is None:
+        parser = parsers[key] = DateParser()
+    return parser
+
+
+def date_parse_stats(parsers: dict, reset: bool = False) -> dict:
+    """Per-field DateParser stats ("file_id:source" -> counts and learned format)."""
+    stats = {
+        f"{file_id}:{source}": dict(parser.stats)
+        for (file_id, source), parser in parsers.items()
+        if parser.stats["values"]
+    }
+    if reset:
+        for parser in parsers.values():
+            for k in parser.stats:
+                if k != "format":
+                    parser.stats[k] = 0
+    return stats
+
+
+class FieldPlan:
+    __slots__ = ("target", "sources", "coalesce", "regex", "dates")
+
+    def __init__(
+        self, f: dict, manifest_file_id: str = None, date_parsers: dict = None
+    ):
+        source = f.get("source")
+        self.target = clean_target(f.get("target"))
+        self.coalesce = (
+            isinstance(source, list) and f.get("transform", "").lower() == "coalesce"
+        )
+        if not isinstance(source, list):
+            source = [source]
+        elif not self.coalesce:
+            source = source[:1]  # without a transform only the first source is read
+        self.sources = tuple(  # PathAccessors; None for a missing source
+            compile_path(s) if isinstance(s, str) and s else None for s in source
+        )
+        self.regex = re.compile(f["regex"]) if f.get("regex") else None
+        self.dates = None
+        if f.get("type", "string") in DATE_TYPES:
+            parsers = {} if date_parsers is None else date_parsers  # unshared
+            self.dates = date_parser(parsers, manifest_file_id, source)
+
+    @property
+    def is_date(self) -> bool:
+        return self.dates is not None
+
+    def value(self, record: dict, default=""):
+        if self.coalesce:
+            val = default
+            for s in self.sources:
+                v = s.get(record) if s else ""
+                if not is_trivial(v):
+                    val = v
+                    break
+        elif self.sources and self.sources[0]:
+            val = self.sources[0].get(record, default)
+        else:  # no or empty source
+            val = default
+
+        if self.regex is not None and val:
+            match = self.regex.search(str(val))
+            val = match.group(1).strip() if match else default
+
+        if self.dates is not None:
+            val = self.dates.unix_ms(val)
+        return val
+
+
+class ViewPlan:
+    __slots__ = ("view", "predicate", "column_filter", "static", "fields")
+
+    def __init__(self, view: dict, date_parsers: dict = None):
+        self.view = view
+        where = view.get("file", {}).get("where", {})
+        self.predicate = make_filter(where) if where else None
+        # for columnar.py: None without a where, False if it can't run on columns
+        self.column_filter = (make_column_filter(where) or False) if where else None
+
+        if "static" not in view:
+            print(f"[ViewPlan] No static fields defined in view: {view}")
+        self.static = {clean_target(k): v for k, v in view.get("static", {}).items()}
+
+        if "fields" not in view:
+            print(f"[ViewPlan] No dynamic fields defined in view: {view}")
+        file_id = view.get("file", {}).get("id")
+        self.fields = [
+            FieldPlan(f, file_id, date_parsers) for f in view.get("fields", [])
+        ]
+
+    def applies(self, record: dict) -> bool:
+        return self.predicate is None or self.predicate(record)
+
+    def map(self, record: dict, default="") -> dict:
+        """Static fields overlaid with the record's dynamic fields."""
+        out = dict(self.static)
+        for f in self.fields:
+            out[f.target] = f.value(record, default)
+        return out
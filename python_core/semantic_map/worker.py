@@ -1,31 +1,143 @@
 import json
 from itertools import groupby
-import uuid
 import traceback
 from manifest import Manifest
 from db_session import DatabaseSession
-import semantic_map.map_utils as map_utils
 import semantic_map.action_message_builder as amb
-from semantic_map.deduplicate_events import deduplicate_events
+from semantic_map.deduplicate_events import EventDeduplicator
 from python_core.utils.pyodide_utils import get_config_value
-
-
-def _generate_table_rows(cursor_rows: list, manifest: Manifest, upload_id):
+from python_core.utils.raw_codec import decode as decode_raw
+from python_core.utils.id_utils import new_id
+import semantic_map.columnar as columnar
+from semantic_map.rows import (
+    EventRow,
+    EVENTS_INSERT,
+    DEVICES_RAW_INSERT,
+    DEVICE_COLUMNS,
+    device_row,
+)
+from semantic_map.view_plan import date_parse_stats
+import python_core.utils.reuse_utils as reuse_utils
+
+
+MAP_CHUNK_SIZE = 5000  # raw_data rows held in memory at a time
+_DEVICE_RAW_DATA_ID = DEVICE_COLUMNS.index("raw_data_id")
+
+# a merged event (always one of this upload's) gets normalized again
+EVENTS_MERGE_UPDATE = """
+UPDATE events SET file_ids = ?, raw_data_ids = ?, attributes = ?, extra_timestamps = ?, deduplicated = 1,
+    origin = NULL
+WHERE id = ?
+"""
+# the same for fused runs, where the merged event is normalized on the spot
+EVENTS_NORMALIZED_MERGE_UPDATE = """
+UPDATE events SET file_ids = ?, raw_data_ids = ?, attributes = ?, extra_timestamps = ?, deduplicated = 1,
+    origin = ?, treat_as_auth_device = ?
+WHERE id = ?
+"""
+
+
+def _generate_table_rows(
+    cursor_rows: list, manifest: Manifest, upload_id, normalizer=None
+):
     event_rows = []
     auth_device_rows = []
 
+    def emit(fields: dict, file_id: str, raw_data_id: str) -> None:
+        event_kind = fields.pop("event_kind", None)
+
+        # EVENTS
+        if event_kind == "event":
+            event_action = fields.pop("event_action", None)
+            event_category = fields.pop("event_category", [])
+            event_type = fields.pop("event_type", [])
+            timestamp = fields.pop("timestamp", None)
+
+            event_rows.append(
+                EventRow(
+                    new_id(),
+                    upload_id,
+                    [file_id],
+                    [raw_data_id],
+                    timestamp,
+                    event_action,
+                    event_kind,
+                    event_category,
+                    event_type,
+                    amb.message(event_action, **fields),
+                    fields,
+                )
+            )
+
+        # AUTH/DEVICE ENTITIES
+        elif event_kind == "asset" or event_kind == "entity":
+            entity_type = fields.pop("entity_type", None)
+            # Pop event_category and event_type from fields before storing as attributes
+            fields.pop("event_category", [])
+            fields.pop("event_type", [])
+            if entity_type in (
+                "authenticated_device",
+                "trusted_cookie",
+                "session",
+                "app_registration",
+                "hardware_registration",
+                "passkey_registration",
+                "platform_inferred_device",
+            ):
+                row_id = new_id()
+                origin = None
+                if normalizer is not None:
+                    normalized = normalizer.device(row_id, fields)
+                    fields, origin = normalized["attributes"], normalized["origin"]
+                auth_device_rows.append(
+                    device_row(
+                        row_id,
+                        upload_id,
+                        file_id,
+                        raw_data_id,
+                        entity_type,
+                        event_kind,
+                        fields,
+                        origin,
+                    )
+                )
+        else:
+            print(
+                f"[SemanticMapWorker] Unhandled event_kind '{event_kind}' for raw_data_id {raw_data_id}"
+            )
+
     for manifest_file_id, group in groupby(cursor_rows, key=lambda x: x[3]):
         group_list = list(group)
-        views = manifest.views(manifest_file_id)
-        if not views:
+        plans = manifest.view_plans(manifest_file_id)
+        if not plans:
             print(
                 f"[SemanticMapWorker] No views for manifest_file_id: {manifest_file_id}"
             )
             continue
 
-        for raw_data_id, file_id, raw_data, _manifest_file_id in group_list:
+        # rows the column path mapped, emitted below in raw_data order so both
+        # paths hand deduplication the same sequence
+        column_mapped = None
+        if columnar.is_tabular(manifest, manifest_file_id):
+            blocks, rest = columnar.build_blocks(group_list)
+            rest_ids = {r[0] for r in rest}
+            column_mapped = {}
+            for block in blocks:
+                columnar.map_block(
+                    block,
+                    plans,
+                    lambda fields, _, raw_data_id: column_mapped.setdefault(
+                        raw_data_id, []
+                    ).append(fields),
+                )
+
+        for raw_data_id, file_id, raw_data, _, encoding, raw_keys in group_list:
+            if column_mapped is not None and raw_data_id not in rest_ids:
+                for fields in column_mapped.get(raw_data_id, ()):
+                    emit(fields, file_id, raw_data_id)
+                continue
             try:
-                record = json.loads(raw_data)
+                record = decode_raw(raw_data, encoding, raw_keys)
             except Exception as e:
                 print(
                     f"[SemanticMapWorker] JSON parse error for raw_data_id {raw_data_id}: {e}"
@@ -39,103 +151,92 @@ def _generate_table_rows(cursor_rows: list, manifest: Manifest, upload_id):
                 print(f"Raw data content: {raw_data[:200]}...")
                 continue
 
-            view_indices = list(map_utils.view_indexes_to_apply(record, views))
-
-            for vindex in view_indices:
-                fields = map_utils.fields(record, views[vindex])
-                event_kind = fields.pop("event_kind", None)
-
-                shared = {
-                    "id": str(uuid.uuid4()),
-                    "upload_id": upload_id,
-                    "file_ids": [file_id],
-                    "raw_data_ids": [raw_data_id],
-                }
-
-                # EVENTS
-                if event_kind == "event":
-                    event_action = fields.pop("event_action", None)
-                    event_category = fields.pop("event_category", [])
-                    event_type = fields.pop("event_type", [])
-
-                    event_rows.append(
-                        shared
-                        | {
-                            "timestamp": fields.pop("timestamp", None),
-                            "event_action": event_action,
-                            "event_kind": event_kind,
-                            "event_category": event_category,
-                            "event_type": event_type,
-                            "event_type_msg": amb.message(event_action, **fields),
-                            "attributes": fields,
-                            "deduplicated": False,  # taken care of in deduplication step
-                            "extra_timestamps": [],  # ^^
-                        }
-                    )
-
-                # AUTH/DEVICE ENTITIES
-                elif event_kind == "asset" or event_kind == "entity":
-                    entity_type = fields.pop("entity_type", None)
-                    # Pop event_category and event_type from fields before storing as attributes
-                    fields.pop("event_category", [])
-                    fields.pop("event_type", [])
-                    if entity_type in (
-                        "authenticated_device",
-                        "trusted_cookie",
-                        "session",
-                        "app_registration",
-                        "hardware_registration",
-                        "passkey_registration",
-                        "platform_inferred_device",
-                    ):
-                        auth_device_rows.append(
-                            {
-                                "id": str(uuid.uuid4()),
-                                "upload_id": upload_id,
-                                "file_id": file_id,
-                                "raw_data_id": raw_data_id,
-                                "entity_type": entity_type,
-                                "event_kind": event_kind,
-                                "attributes": fields,
-                            }
-                        )
-                else:
-                    print(
-                        f"[SemanticMapWorker] Unhandled event_kind '{event_kind}' for raw_data_id {raw_data_id}"
-                    )
-                    continue
+            for plan in plans:
+                if plan.applies(record):
+                    emit(plan.map(record), file_id, raw_data_id)
 
     return event_rows, auth_device_rows  # add more as we create more tables
 
 
-def _stringify(rows: list[dict]) -> list[dict]:
-    list_keys = [
-        "raw_data_ids",
-        "file_ids",
-        "extra_timestamps",
-        "event_category",
-        "event_type",
-    ]
-    dict_keys = ["attributes"]
-    for r in rows:
-        for k in list_keys:
-            if k in r:
-                r[k] = (
-                    json.dumps(r[k])
-                    if isinstance(r[k], (list, dict))
-                    else json.dumps([])
-                )
-        for k in dict_keys:
-            if k in r:
-                r[k] = (
-                    json.dumps(r[k])
-                    if isinstance(r[k], (list, dict))
-                    else json.dumps({})
-                )
-    return rows
-
-
-def map(platform, upload_id, db_path=None, manifest_dir=None):
+def _iter_raw_chunks(conn, upload_id: str, chunk_size: int):
+    """
+    Yields the upload's raw_data as cursor-row lists of at most chunk_size,
+    one uploaded file after another (files of the same manifest entry
+    together) and in insertion order within a file, so every chunk belongs to
+    a single file and its views are looked up once.
+    """
+    files = conn.execute(
+        """
+        SELECT id, manifest_file_id, raw_keys FROM uploaded_files
+        WHERE upload_id = ?
+        ORDER BY manifest_file_id, id
+        """,
+        (upload_id,),
+    ).fetchall()
+    for file_id, manifest_file_id, raw_keys in files:
+        cursor = conn.execute(
+            "SELECT id, data, encoding FROM raw_data WHERE file_id = ? ORDER BY rowid",
+            (file_id,),
+        )
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            yield [
+                (raw_data_id, file_id, data, manifest_file_id, encoding, raw_keys)
+                for raw_data_id, data, encoding in chunk
+            ]
+
+
+def _stored_neighbours(
+    conn, platform: str, upload_id: str, event_rows: list, dedup: EventDeduplicator
+) -> list:
+    """
+    Events of earlier uploads of the same platform that the chunk's events
+    could be duplicates of: one idx_events_kind_action_ts range scan per
+    (event_kind, event_action), widened by that action's tolerance. Only what
+    matching needs is read; these events are never written to.
+    """
+    ranges = {}
+    for e in event_rows:
+        ts = e.timestamp
+        if not ts or e.event_action in dedup.exclude:
+            continue
+        key = (e.event_kind, e.event_action)
+        lo, hi = ranges.get(key, (ts, ts))
+        ranges[key] = (min(lo, ts), max(hi, ts))
+
+    stored = []
+    for (kind, action), (lo, hi) in ranges.items():
+        tolerance = dedup.tolerance(action)
+        cursor = conn.execute(
+            """
+            SELECT e.id, e.upload_id, e.timestamp
+            FROM events e JOIN uploads u ON e.upload_id = u.id
+            WHERE e.event_kind = ? AND e.event_action = ? AND e.timestamp BETWEEN ? AND ?
+                AND e.upload_id != ? AND u.platform = ?
+            """,
+            (kind, action, lo - tolerance, hi + tolerance, upload_id, platform),
+        )
+        for row in cursor:
+            stored.append(EventRow(row[0], row[1], [], [], row[2], action, kind))
+    return stored
+
+
+def map(
+    platform,
+    upload_id,
+    db_path=None,
+    manifest_dir=None,
+    chunk_size: int = MAP_CHUNK_SIZE,
+    across_uploads: bool = None,
+    normalize: bool = False,
+):
+    """
+    Maps the upload's raw_data to events and devices_raw. With normalize
+    (run's fused mode) rows are normalized before they are written, so
+    field_normalization.normalize() has nothing left to do for the upload.
+    """
 
     db_path = db_path or get_config_value("DB_PATH")
     manifest_dir = manifest_dir or get_config_value("MANIFESTS_DIR")
@@ -149,83 +250,120 @@ def map(platform, upload_id, db_path=None, manifest_dir=None):
         with DatabaseSession(db_path) as conn:
             print(f"[SemanticMapWorker] Database connection opened: {type(conn)}")
 
-            print(f"[SemanticMapWorker] Executing query for upload_id: {upload_id}")
-            cursor = conn.execute(
-                """
-                SELECT 
-                    r.id, 
-                    r.file_id, 
-                    r.data, 
-                    f.manifest_file_id
-                FROM raw_data r
-                JOIN uploaded_files f ON r.file_id = f.id
-                WHERE r.upload_id = ?
-                ORDER BY r.id ASC
-                """,
-                (upload_id,),
-            )
-
-            if cursor is None:
-                raise RuntimeError("Database cursor is None after execute()")
-
-            print(f"[SemanticMapWorker] Cursor obtained: {type(cursor)}")
-
-            rows = cursor.fetchall()
-            print(
-                f"[SemanticMapWorker] Fetched {len(rows) if rows else 0} rows from raw_data"
-            )
-
-            if not rows:
+            # files reused from an earlier upload: clone what they mapped to there
+            cloned_events = []
+            remap_raw_ids = set()
+            reuse = reuse_utils.reused_files(conn, upload_id)
+            if reuse:
+                reuse_utils.register(conn)
+                cloned_events, remap_raw_ids = reuse_utils.clone_mapped_rows(
+                    conn, upload_id, reuse
+                )
+            reused_file_ids = set(reuse.values())
+
+            dedup = EventDeduplicator.from_manifest(manifest)
+            normalizer = None
+            if normalize:
+                from field_normalization.worker import RowNormalizer
+
+                normalizer = RowNormalizer(conn, upload_id)
+            if across_uploads is None:
+                across_uploads = get_config_value("DEDUP_ACROSS_UPLOADS", default=False)
+
+            # clones go in first so new files can still merge into them
+            if cloned_events:
+                conn.executemany(EVENTS_INSERT, [e.params() for e in cloned_events])
+                dedup.seed(cloned_events)
+
+            # raw rows stay bounded by the chunk size; events and devices are
+            # written per chunk, and earlier events that later ones merge into
+            # are updated at the end
+            raw_count = 0
+            mapped_count = 0
+            event_count = 0
+            duplicate_count = 0  # of events in earlier uploads
+            device_count = 0
+            for rows in _iter_raw_chunks(conn, upload_id, chunk_size):
+                if reused_file_ids:
+                    rows = [
+                        r
+                        for r in rows
+                        if r[1] not in reused_file_ids or r[0] in remap_raw_ids
+                    ]
+                raw_count += len(rows)
+                chunk_events, chunk_devices = _generate_table_rows(
+                    rows, manifest, upload_id, normalizer
+                )
+                mapped_count += len(chunk_events)
+                if across_uploads:
+                    dedup.seed(
+                        _stored_neighbours(
+                            conn, platform, upload_id, chunk_events, dedup
+                        ),
+                        foreign=True,
+                    )
+                kept = dedup.add(chunk_events)
+                if kept:
+                    conn.executemany(
+                        EVENTS_INSERT,
+                        [
+                            e.params(normalizer.event(e) if normalizer else None)
+                            for e in kept
+                        ],
+                    )
+                    event_count += len(kept)
+                    duplicate_count += sum(1 for e in kept if e.duplicate_of)
+                if remap_raw_ids:
+                    # devices of reused files' rows were all cloned
+                    chunk_devices = [
+                        d
+                        for d in chunk_devices
+                        if d[_DEVICE_RAW_DATA_ID] not in remap_raw_ids
+                    ]
+                if chunk_devices:
+                    conn.executemany(DEVICES_RAW_INSERT, chunk_devices)
+                    device_count += len(chunk_devices)
+
+            if not raw_count and not cloned_events:
                 print(
                     f"[SemanticMapWorker] No raw_data found for upload_id: {upload_id}"
                 )
                 return
 
-            event_rows, auth_device_rows = _generate_table_rows(
-                rows, manifest, upload_id
-            )
+            merged = dedup.take_merged()
+            updates = []
+            normalized_updates = []
+            for e in merged:
+                ids = (json.dumps(e.file_ids), json.dumps(e.raw_data_ids))
+                extra_timestamps = json.dumps(e.extra_timestamps)
+                if normalizer:
+                    n = normalizer.event(e)
+                    normalized_updates.append(
+                        (*ids, n["attributes"], extra_timestamps)
+                        + (n["origin"], n["treat_as_auth_device"], e.id)
+                    )
+                else:
+                    updates.append(
+                        (*ids, json.dumps(e.attributes), extra_timestamps, e.id)
+                    )
+            conn.executemany(EVENTS_MERGE_UPDATE, updates)
+            conn.executemany(EVENTS_NORMALIZED_MERGE_UPDATE, normalized_updates)
             print(
-                f"[SemanticMapWorker] Generated {len(event_rows)} event rows and {len(auth_device_rows)} auth device rows"
+                f"[SemanticMapWorker] Mapped {raw_count} raw_data rows to {mapped_count} event rows, {event_count} after deduplication ({len(merged)} earlier events updated, {duplicate_count} duplicates of earlier uploads' events), and {device_count} auth device rows"
             )
 
-            event_rows = deduplicate_events(event_rows)
+            conn.commit()
             print(
-                f"[SemanticMapWorker] After deduplication: {len(event_rows)} event rows"
+                f"[SemanticMapWorker] Mapping completed for upload_id: {upload_id}. Inserted {event_count} events ({len(cloned_events)} more cloned) and {device_count} auth/device entities."
             )
-
-            event_rows = _stringify(event_rows)
-            auth_device_rows = _stringify(auth_device_rows)
-
-            # Insert into events table
-            if event_rows:
-                print(f"[SemanticMapWorker] Inserting {len(event_rows)} events...")
-                conn.executemany(
-                    """
-                    INSERT INTO events (id, upload_id, file_ids, raw_data_ids, timestamp, event_action, event_kind, event_category, event_type, event_type_msg, attributes, deduplicated, extra_timestamps)
-                    VALUES (:id, :upload_id, :file_ids, :raw_data_ids, :timestamp, :event_action, :event_kind, :event_category, :event_type, :event_type_msg, :attributes, :deduplicated, :extra_timestamps)
-                    """,
-                    event_rows,
-                )
-                print(f"[SemanticMapWorker] Events inserted successfully")
-
-            # Insert into auth_device table
-            if auth_device_rows:
+            if normalizer:
                 print(
-                    f"[SemanticMapWorker] Inserting {len(auth_device_rows)} auth devices..."
+                    f"[SemanticMapWorker] Normalized {normalizer.count} rows while mapping"
                 )
-                conn.executemany(
-                    """
-                    INSERT INTO devices_raw (id, upload_id, file_id, raw_data_id, entity_type, event_kind, attributes)
-                    VALUES (:id, :upload_id, :file_id, :raw_data_id, :entity_type, :event_kind, :attributes)
-                    """,
-                    auth_device_rows,
-                )
-                print(f"[SemanticMapWorker] Auth devices inserted successfully")
-
-            conn.commit()
-            print(
-                f"[SemanticMapWorker] Mapping completed for upload_id: {upload_id}. Inserted {len(event_rows)} events and {len(auth_device_rows)} auth/device entities."
-            )
+            for field, stats in date_parse_stats(
+                manifest.date_parsers, reset=True
+            ).items():
+                print(f"[SemanticMapWorker] Dates {field}: {stats}")
 
     except Exception as e:
         print(f"[SemanticMapWorker] Fatal Database Error: {type(e).__name__}: {e}")
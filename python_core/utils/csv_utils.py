@@ -0,0 +1,78 @@
+"""
+Single-pass CSV engine shared by the CSV-family parsers. Built on the stdlib
+csv reader so records and their source line spans come out of one sweep,
+without pandas. Values are always strings; short rows are padded with "".
+"""
+
+import csv
+from typing import Iterable, Iterator, List, Dict, Tuple
+
+
+def header_keys(cells: List[str]) -> List[str]:
+    """Column names for a header row, pandas-style: BOM stripped, blanks become
+    'Unnamed: i', repeated names get '.1', '.2' suffixes."""
+    keys = []
+    seen = {}
+    for i, cell in enumerate(cells):
+        key = cell.lstrip("\ufeff") if i == 0 else cell
+        if key == "":
+            key = f"Unnamed: {i}"
+        if key in seen:
+            seen[key] += 1
+            new_key = f"{key}.{seen[key]}"
+            while new_key in seen:
+                seen[key] += 1
+                new_key = f"{key}.{seen[key]}"
+            seen[new_key] = 0
+            key = new_key
+        else:
+            seen[key] = 0
+        keys.append(key)
+    return keys
+
+
+def row_to_record(headers: List[str], cells: List[str]) -> Dict[str, str]:
+    """Zips a row onto its headers. Missing cells become "", extra cells 'Column_i'."""
+    record = {}
+    for i, cell in enumerate(cells):
+        record[headers[i] if i < len(headers) else f"Column_{i}"] = cell
+    for key in headers[len(cells) :]:
+        record[key] = ""
+    return record
+
+
+def _is_blank(row: List[str]) -> bool:
+    return not row or (len(row) == 1 and not row[0].strip())
+
+
+def iter_csv_records(
+    lines: Iterable[str], first_line: int = 1, bad_lines: list = None
+) -> Iterator[Tuple[Dict[str, str], List[int]]]:
+    """
+    Yields (record, [start_line, end_line]) for every data row. `lines` must keep
+    their line endings (e.g. io.StringIO(s, newline="")) so quoted multiline
+    values survive; `first_line` is the 1-indexed source line of lines[0].
+    Rows with more fields than the header are skipped and described in bad_lines.
+    """
+    reader = csv.reader(lines)
+    headers = None
+    consumed = 0  # reader.line_num after the previous row
+
+    for row in reader:
+        start = first_line + consumed
+        consumed = reader.line_num
+        if _is_blank(row):
+            continue
+
+        if headers is None:
+            headers = header_keys(row)
+            continue
+
+        if len(row) > len(headers):
+            if bad_lines is not None:
+                bad_lines.append(
+                    f"Malformed or ragged line skipped: {','.join(row[:5])}..."
+                )
+            continue
+
+        yield row_to_record(headers, row), [start, first_line + consumed - 1]
@@ -1,5 +1,6 @@
-from typing import Callable
-from utils.json_utils import get_value_at_path  # nested json traversal
+import re
+from typing import Callable, Optional
+from utils.json_utils import compile_path  # nested json traversal
 
 
 OP_MAPPING = {
@@ -27,26 +28,18 @@ def _filter_leaf(source: str, op: str, value: str, default=True) -> Callable:
         print(f"Filter condition missing 'op'. Defaulting to equality check.")
         op = "=="
 
+    get = compile_path(source).get
+    value = value.lower()
     if op in OP_MAPPING["eq"]:
-        return lambda dct: (
-            str(get_value_at_path(dct, source)).lower() == str(value).lower()
-        )
+        return lambda dct: str(get(dct)).lower() == value
     if op in OP_MAPPING["ne"]:
-        return lambda dct: (
-            str(get_value_at_path(dct, source)).lower() != str(value).lower()
-        )
+        return lambda dct: str(get(dct)).lower() != value
     if op in OP_MAPPING["contains"]:
-        return lambda dct: (
-            str(value).lower() in str(get_value_at_path(dct, source)).lower()
-        )
+        return lambda dct: value in str(get(dct)).lower()
     if op in OP_MAPPING["startswith"]:
-        return lambda dct: (
-            str(get_value_at_path(dct, source)).lower().startswith(str(value).lower())
-        )
+        return lambda dct: str(get(dct)).lower().startswith(value)
     if op in OP_MAPPING["endswith"]:
-        return lambda dct: (
-            str(get_value_at_path(dct, source)).lower().endswith(str(value).lower())
-        )
+        return lambda dct: str(get(dct)).lower().endswith(value)
 
     print(f"Unsupported operator in filter config: {op}")
     return lambda dct: default
@@ -94,3 +87,122 @@ def make_filter(where: dict, default=True):
 
     print(f"Invalid filter config: {where}.")
     return lambda dct: default
+
+
+def _column_leaf(source, op, value, default=True) -> Optional[Callable]:
+    if not isinstance(source, str):
+        return lambda block: [default] * len(block)
+    key = compile_path(source).flat_key
+    if key is None:
+        return None  # nested path; tabular columns are flat
+    value = "" if value is None else str(value).lower()
+    if op is None or op in OP_MAPPING["eq"]:
+        return lambda block: [v == value for v in block.lowered(key)]
+    if op in OP_MAPPING["ne"]:
+        return lambda block: [v != value for v in block.lowered(key)]
+    if op in OP_MAPPING["contains"]:
+        return lambda block: [value in v for v in block.lowered(key)]
+    if op in OP_MAPPING["startswith"]:
+        return lambda block: [v.startswith(value) for v in block.lowered(key)]
+    if op in OP_MAPPING["endswith"]:
+        return lambda block: [v.endswith(value) for v in block.lowered(key)]
+    return lambda block: [default] * len(block)
+
+
+def make_column_filter(where: dict, default=True) -> Optional[Callable]:
+    """
+    make_filter for a whole column block at once (semantic_map/columnar.py):
+    returns a callable on the block giving one bool per row, or None when the
+    config uses a nested path and has to be run record by record. Leaves read
+    block.lowered(key), each cell's str().lower() computed once per column.
+    """
+    if where is None or not isinstance(where, dict):
+        return lambda block: [default] * len(block)
+
+    if all(k in where.keys() for k in ["source", "op", "value"]):
+        return _column_leaf(where["source"], where["op"], where["value"], default)
+
+    conditions = where.get("conditions")
+    logic = str(where.get("logic", "")).lower()
+    if (
+        "logic" not in where.keys()
+        or not isinstance(conditions, list)
+        or logic not in ("all", "any")
+        or not all(
+            isinstance(cond, dict)
+            and all(k in cond.keys() for k in ["source", "op", "value"])
+            for cond in conditions
+        )
+    ):
+        return lambda block: [default] * len(block)
+
+    leaves = [
+        _column_leaf(c["source"], c["op"], c["value"], default) for c in conditions
+    ]
+    if any(leaf is None for leaf in leaves):
+        return None
+    combine = any if logic == "any" else all
+    if not leaves:
+        return lambda block: [combine(())] * len(block)
+    return lambda block: [
+        combine(row) for row in zip(*(leaf(block) for leaf in leaves))
+    ]
+
+
+# values that serialize verbatim inside a JSON string, so a raw-text search can't miss them
+_PUSHDOWN_SAFE = re.compile(r"[A-Za-z0-9 _\-.:@]+")
+
+
+def _raw_leaf(source: str, op: str, value) -> Optional[Callable]:
+    """Substring precheck on the undecoded line for one condition, or None if it can't be pushed down."""
+    if (
+        not isinstance(source, str)
+        or value is None
+        or isinstance(value, (int, float, bool))
+    ):
+        return None
+    value = str(value)
+    if not _PUSHDOWN_SAFE.fullmatch(value) or value.replace(".", "").isdigit():
+        return None  # numbers may be written differently than they compare
+    if op is None or any(
+        op in OP_MAPPING[k] for k in ("eq", "contains", "startswith", "endswith")
+    ):
+        return re.compile(re.escape(value), re.IGNORECASE).search
+    return None
+
+
+def make_raw_prefilter(where: dict) -> Optional[Callable]:
+    """
+    Cheap line-level precheck for a `where` config (same shapes as make_filter):
+    returns a callable on the raw JSON text that is False only when the record
+    cannot match, or None if nothing can be pushed down. eq/contains/startswith/
+    endswith values must appear (case-insensitively) somewhere in the line.
+    Always run the real filter on records that pass.
+    """
+    if where is None or not isinstance(where, dict):
+        return None
+
+    if all(k in where.keys() for k in ["source", "op", "value"]):
+        return _raw_leaf(where["source"], where["op"], where["value"])
+
+    conditions = where.get("conditions")
+    logic = str(where.get("logic", "")).lower()
+    if not isinstance(conditions, list) or logic not in ("all", "any"):
+        return None
+    if not all(
+        isinstance(cond, dict)
+        and all(k in cond.keys() for k in ["source", "op", "value"])
+        for cond in conditions
+    ):
+        return None
+
+    leaves = [_raw_leaf(c["source"], c["op"], c["value"]) for c in conditions]
+    if logic == "all":
+        leaves = [leaf for leaf in leaves if leaf is not None]
+        if not leaves:
+            return None
+        return lambda line, c=leaves: all(leaf(line) for leaf in c)
+
+    if not leaves or any(leaf is None for leaf in leaves):
+        return None  # one unpushable branch could match anything
+    return lambda line, c=leaves: any(leaf(line) for leaf in c)
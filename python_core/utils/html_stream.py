@@ -0,0 +1,80 @@
+"""
+Building blocks for the event-driven HTML parsers. Google Takeout pages can be
+hundreds of MB, and a BeautifulSoup tree is many times that, so extractors
+subclass StrippedTextParser and emit records as the closing tags go by.
+"""
+
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, List
+
+
+FEED_CHUNK = 1 << 20  # chars handed to the HTML tokenizer at a time
+
+
+class StrippedTextParser(HTMLParser):
+    """
+    HTMLParser that reports text the way BeautifulSoup's stripped_strings does:
+    one stripped, non-empty string per text node (split at tags and comments,
+    even when a node arrives across feed() chunks), ignoring <script>/<style>.
+    Subclasses override on_text() and flush via _flush_text() at each tag, and
+    queue finished records in self._records for drain().
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._records = []
+        self._text = []  # pending text node
+        self._skip_text = 0  # inside <script>/<style>
+
+    def on_text(self, text: str) -> None:
+        pass
+
+    def drain(self) -> List[Dict[str, Any]]:
+        records, self._records = self._records, []
+        return records
+
+    def _flush_text(self):
+        if not self._text:
+            return
+        text = "".join(self._text).strip()
+        self._text = []
+        if text and not self._skip_text:
+            self.on_text(text)
+
+    def handle_data(self, data):
+        self._text.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in ("script", "style"):
+            self._skip_text += 1
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag in ("script", "style"):
+            self._skip_text = max(0, self._skip_text - 1)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+
+
+def attr_value(attrs: list, name: str, default=None):
+    """Last value of an attribute in HTMLParser's (name, value) list; valueless attributes give ""."""
+    value = default
+    for k, v in attrs:
+        if k == name:
+            value = v if v is not None else ""
+    return value
+
+
+def iter_parsed(parser: StrippedTextParser, content: str) -> Iterator[Dict[str, Any]]:
+    """Feeds `content` in FEED_CHUNK slices, yielding records as soon as the parser finishes them."""
+    for i in range(0, len(content), FEED_CHUNK):
+        parser.feed(content[i : i + FEED_CHUNK])
+        yield from parser.drain()
+    parser.close()
+    yield from parser.drain()
@@ -0,0 +1,70 @@
+"""
+Row ids for uploads, uploaded_files, raw_data, events and devices_raw. ULIDs:
+26 Crockford base32 chars, a 48-bit millisecond timestamp followed by 80
+random bits, so they sort by creation time. Rows inserted together get
+neighbouring keys: inserts append to the primary key index, and a per-upload
+scan ordered by id is a range walk, not a random B-tree lookup per row.
+
+Ids are still TEXT, so the uuid4 ids of rows written before this scheme stay
+valid next to them and need no rewrite.
+"""
+
+import os
+import time
+import uuid
+import hashlib
+
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_PAIRS = [a + b for a in _CROCKFORD for b in _CROCKFORD]  # 10 bits -> 2 chars
+
+TIME_CHARS = 10
+ID_LENGTH = 26
+_RANDOM_BITS = 80
+
+_last_ms = -1
+_last_time = ""
+_last_random = 0
+
+
+def _encode(value: int, chars: int) -> str:
+    """Big-endian Crockford base32 of the low 5 * chars bits; chars must be even."""
+    return "".join(
+        _PAIRS[(value >> shift) & 0x3FF] for shift in range(5 * chars - 10, -1, -10)
+    )
+
+
+def new_id() -> str:
+    """
+    A ULID. Within one millisecond (or if the clock steps back) the random
+    part is incremented instead of redrawn, so ids from this process never
+    go backwards.
+    """
+    global _last_ms, _last_time, _last_random
+    ms = time.time_ns() // 1_000_000
+    if ms > _last_ms:
+        _last_ms = ms
+        _last_time = _encode(ms, TIME_CHARS)
+        _last_random = int.from_bytes(os.urandom(_RANDOM_BITS // 8), "big")
+    else:
+        _last_random += 1
+        if _last_random >> _RANDOM_BITS:
+            _last_ms += 1
+            _last_time = _encode(_last_ms, TIME_CHARS)
+            _last_random = 0
+    return _last_time + _encode(_last_random, _RANDOM_BITS // 5)
+
+
+def derived_id(namespace_id: str, old_id: str) -> str:
+    """
+    Deterministic id for the copy of `old_id` made under `namespace_id` (the
+    new parent row). A ULID namespace lends its time prefix, so copies sort
+    with the parent's other rows; a uuid namespace (rows from before ULIDs)
+    gets uuid5, as copies always did.
+    """
+    if len(namespace_id) == ID_LENGTH:
+        digest = hashlib.sha1(f"{namespace_id}:{old_id}".encode("utf-8")).digest()
+        return namespace_id[:TIME_CHARS] + _encode(
+            int.from_bytes(digest[:10], "big"), _RANDOM_BITS // 5
+        )
+    return str(uuid.uuid5(uuid.UUID(namespace_id), old_id))
@@ -0,0 +1,147 @@
+"""
+Incremental reader for the `json_root` of a JSON document. Walks the text with
+a small structural scanner, skipping sibling subtrees without building them,
+and decodes only the elements of the root array, one at a time, with the
+stdlib decoder. Pure Python, so it runs in Pyodide.
+
+Strict JSON only: anything the scanner does not expect raises ValueError, and
+callers fall back to a full (lenient) parse.
+"""
+
+import re
+import json
+from json.decoder import scanstring
+from typing import Any, Iterator, Tuple
+from python_core.utils.json_utils import PATH_REGEX
+
+
+_WS = re.compile(r"[ \t\n\r]*")
+_STRING_BODY = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)  # after the opening quote
+_SCALAR = re.compile(r"[^,\]}\s]+")
+_STRUCT = re.compile(r'["\[\]{}]')
+_decoder = json.JSONDecoder()
+
+
+class JSONStreamError(ValueError):
+    pass
+
+
+def _skip_ws(s: str, pos: int) -> int:
+    return _WS.match(s, pos).end()
+
+
+def _skip_string(s: str, pos: int) -> int:
+    m = _STRING_BODY.match(s, pos + 1)
+    if not m:
+        raise JSONStreamError(f"Unterminated string at {pos}")
+    return m.end()
+
+
+def _skip_value(s: str, pos: int) -> int:
+    """Returns the index just past the value starting at pos, without decoding it."""
+    c = s[pos : pos + 1]
+    if c == '"':
+        return _skip_string(s, pos)
+    if c in ("[", "{"):
+        depth = 0
+        while True:
+            m = _STRUCT.search(s, pos)
+            if not m:
+                raise JSONStreamError(f"Unclosed container at {pos}")
+            c = m.group()
+            if c == '"':
+                pos = _skip_string(s, m.start())
+                continue
+            pos = m.end()
+            depth += 1 if c in "[{" else -1
+            if depth == 0:
+                return pos
+    m = _SCALAR.match(s, pos)
+    if not m:
+        raise JSONStreamError(f"Expected a value at {pos}")
+    return m.end()
+
+
+def _after_member(s: str, pos: int, close: str) -> int:
+    """Consumes the separator after a member; returns the next member's index or None at `close`."""
+    pos = _skip_ws(s, pos)
+    c = s[pos : pos + 1]
+    if c == ",":
+        return _skip_ws(s, pos + 1)
+    if c == close:
+        return None
+    raise JSONStreamError(f"Expected ',' or '{close}' at {pos}")
+
+
+def _find_key(s: str, pos: int, key: str) -> int:
+    """pos is at '{'. Returns the index of the value for `key`, or None if absent."""
+    pos = _skip_ws(s, pos + 1)
+    if s.startswith("}", pos):
+        return None
+    while pos is not None:
+        if not s.startswith('"', pos):
+            raise JSONStreamError(f"Expected a key at {pos}")
+        name, pos = scanstring(s, pos + 1)
+        pos = _skip_ws(s, pos)
+        if not s.startswith(":", pos):
+            raise JSONStreamError(f"Expected ':' at {pos}")
+        pos = _skip_ws(s, pos + 1)
+        if name == key:
+            return pos
+        pos = _after_member(s, _skip_value(s, pos), "}")
+    return None
+
+
+def _find_index(s: str, pos: int, idx: int) -> int:
+    """pos is at '['. Returns the index of element `idx`, or None if out of range."""
+    pos = _skip_ws(s, pos + 1)
+    if s.startswith("]", pos):
+        return None
+    i = 0
+    while pos is not None:
+        if i == idx:
+            return pos
+        pos = _after_member(s, _skip_value(s, pos), "]")
+        i += 1
+    return None
+
+
+def _iter_array(s: str, pos: int) -> Iterator[Tuple[Any, int, int]]:
+    pos = _skip_ws(s, pos + 1)
+    if s.startswith("]", pos):
+        return
+    while pos is not None:
+        obj, end = _decoder.raw_decode(s, pos)
+        yield obj, pos, end
+        pos = _after_member(s, end, "]")
+
+
+def iter_json_root(s: str, json_root: str = None) -> Iterator[Tuple[Any, int, int]]:
+    """
+    Yields (value, start, end) for each element of the array at `json_root`
+    (same path syntax as get_value_at_path; "[]" markers are ignored), where
+    start/end are character offsets into `s`. A non-array root is yielded as a
+    single value; a path that does not resolve yields nothing.
+    """
+    pos = _skip_ws(s, 0)
+    path = (json_root or "").replace("[]", "")
+
+    for match in PATH_REGEX.finditer(path):
+        quoted_key, list_idx, simple_key = match.groups()
+        c = s[pos : pos + 1]
+        if list_idx:
+            if c != "[":
+                return
+            pos = _find_index(s, pos, int(list_idx))
+        elif quoted_key or simple_key:
+            if c != "{":
+                return
+            pos = _find_key(s, pos, quoted_key or simple_key)
+        if pos is None:
+            return
+
+    if s.startswith("[", pos):
+        yield from _iter_array(s, pos)
+    else:
+        obj, end = _decoder.raw_decode(s, pos)
+        yield obj, pos, end
@@ -1,5 +1,6 @@
 import re
 import logging
+from functools import lru_cache
 
 # regex
 # '([^']*)'   -> Captures quoted keys: 'Device ID'
@@ -8,53 +9,78 @@ import logging
 PATH_REGEX = re.compile(r"'([^']*)'|\[(\d+)\]|([^.\[\]]+)")
 
 
-def get_value_at_path(data, path, default=""):
+class PathAccessor:
     """
-    Traverses a dictionary/list structure using a dot-notation path.
-
-    Supports:
-    - Dot notation: "session.ip"
-    - List indexing: "tokens[0].id"
-    - Quoted keys (single quotes): "'Device ID'.timestamp"
-    - Mixed usage: "items[0].'User Info'.id"
+    A get_value_at_path path parsed once. Paths that are a single plain key,
+    by far the most common in manifests, skip the step loop entirely.
     """
-    if data is None or not path:
-        return default
 
-    try:
-        current = data
+    __slots__ = ("path", "steps", "flat_key")
 
-        # Iterates over all matches in the path string
+    def __init__(self, path: str):
+        self.path = path
+        steps = []
         for match in PATH_REGEX.finditer(path):
             quoted_key, list_idx, simple_key = match.groups()
-
             if quoted_key:
-                # dict key in quotes ('Device ID')
-                if isinstance(current, dict):
-                    current = current.get(quoted_key)
-                else:
-                    return default
-
+                steps.append((False, quoted_key))
             elif list_idx:
-                # Clist index ([0])
-                idx = int(list_idx)
-                if isinstance(current, list) and 0 <= idx < len(current):
-                    current = current[idx]
-                else:
-                    return default
-
+                steps.append((True, int(list_idx)))
             elif simple_key:
-                # simple dict key
-                if isinstance(current, dict):
-                    current = current.get(simple_key)
+                steps.append((False, simple_key))
+        self.steps = tuple(steps)
+        self.flat_key = steps[0][1] if len(steps) == 1 and not steps[0][0] else None
+
+    def get(self, data, default=""):
+        if data is None:
+            return default
+
+        key = self.flat_key
+        if key is not None:
+            if isinstance(data, dict):
+                current = data.get(key)
+                return default if current is None else current
+            return default
+
+        current = data
+        for is_index, key in self.steps:
+            if is_index:
+                if isinstance(current, list) and key < len(current):
+                    current = current[key]
                 else:
                     return default
-
+            elif isinstance(current, dict):
+                current = current.get(key)
+            else:
+                return default
             if current is None:
                 return default
-
         return current
 
+
+@lru_cache(maxsize=4096)
+def compile_path(path: str) -> PathAccessor:
+    """Cached PathAccessor for a path; manifests reuse a small set of them for every record."""
+    return PathAccessor(path)
+
+
+def get_value_at_path(data, path, default=""):
+    """
+    Traverses a dictionary/list structure using a dot-notation path.
+
+    Supports:
+    - Dot notation: "session.ip"
+    - List indexing: "tokens[0].id"
+    - Quoted keys (single quotes): "'Device ID'.timestamp"
+    - Mixed usage: "items[0].'User Info'.id"
+
+    Hot loops should hold on to compile_path(path) instead.
+    """
+    if data is None or not path:
+        return default
+
+    try:
+        return compile_path(path).get(data, default)
     except Exception as e:
         logging.getLogger(__name__).debug(f"Error traversing path {path}: {e}")
         return default
@@ -0,0 +1,45 @@
+"""
+Offset -> line lookups for a file's text, so parsers can stamp each record
+with its real source span instead of allocating content.splitlines() just to
+count lines. Offsets are str indices (what json's raw_decode and friends
+report); lines are 1-indexed and split on "\\n" only.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import List
+
+
+class LineIndex:
+    def __init__(self, text: str):
+        self._text = text
+        self._newlines = None  # built on first lookup; total_lines doesn't need it
+
+    @property
+    def total_lines(self) -> int:
+        text = self._text
+        if not text:
+            return 1
+        return text.count("\n") + (0 if text.endswith("\n") else 1)
+
+    @property
+    def full_span(self) -> List[int]:
+        return [1, self.total_lines]
+
+    def _build(self) -> array:
+        newlines = array("I")
+        find = self._text.find
+        i = find("\n")
+        while i != -1:
+            newlines.append(i)
+            i = find("\n", i + 1)
+        self._newlines = newlines
+        return newlines
+
+    def line_of(self, offset: int) -> int:
+        newlines = self._newlines if self._newlines is not None else self._build()
+        return bisect_left(newlines, offset) + 1
+
+    def span(self, start: int, end: int) -> List[int]:
+        """[first_line, last_line] of text[start:end]."""
+        return [self.line_of(start), self.line_of(max(start, end - 1))]
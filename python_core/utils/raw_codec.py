@@ -0,0 +1,91 @@
+"""
+Storage formats for raw_data.data, recorded per row in raw_data.encoding:
+
+  NULL             json.dumps(record)
+  "columnar"       json.dumps of the record's values, in the order of the
+                   file's key dictionary (uploaded_files.raw_keys)
+  "columnar+zlib"  the same array, zlib-compressed (BLOB)
+
+CSV and HTML-table rows all share one set of headers, so the dictionary saves
+repeating them in every row. Rows whose keys differ from the dictionary are
+stored as plain JSON, which is why the encoding is per row and not per file.
+webapp/src/database/queries/raw_data.js mirrors decode().
+"""
+
+import json
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+COLUMNAR = "columnar"
+COLUMNAR_ZLIB = "columnar+zlib"
+ENCODINGS = (None, COLUMNAR, COLUMNAR_ZLIB)
+
+ZLIB_MIN_CHARS = 128  # shorter arrays grow rather than shrink under zlib
+ZLIB_LEVEL = 6
+
+
+class RawEncoder:
+    """Encodes one file's records; the key dictionary comes from its first record."""
+
+    def __init__(self, encoding: Optional[str] = None, first_record: Dict = None):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown raw_data encoding: {encoding}")
+        self.encoding = encoding
+        self.keys = None
+        if encoding and first_record:
+            self.keys = [k for k in first_record if k != "__line_numbers"]
+
+    def encode(self, record: Dict) -> Tuple[Union[str, bytes], Optional[str]]:
+        """Returns (data, encoding) for a record that has had __line_numbers popped."""
+        keys = self.keys
+        if keys is None or len(record) != len(keys):
+            return json.dumps(record), None
+        try:
+            values = [record[k] for k in keys]
+        except KeyError:
+            return json.dumps(record), None
+
+        data = json.dumps(values)
+        if self.encoding == COLUMNAR_ZLIB and len(data) >= ZLIB_MIN_CHARS:
+            return zlib.compress(data.encode("utf-8"), ZLIB_LEVEL), COLUMNAR_ZLIB
+        return data, COLUMNAR
+
+
+@lru_cache(maxsize=256)
+def _parse_keys(raw_keys: str) -> Tuple[str, ...]:
+    return tuple(json.loads(raw_keys))
+
+
+def decode(
+    data: Union[str, bytes],
+    encoding: Optional[str] = None,
+    raw_keys: Union[str, List[str], None] = None,
+) -> Any:
+    """
+    Inverse of RawEncoder.encode. raw_keys is the file's uploaded_files.raw_keys,
+    either as stored (JSON text) or already parsed.
+    """
+    if encoding is None:
+        return json.loads(data)
+    keys = parse_keys(raw_keys)
+    if keys is None:
+        raise ValueError(f"raw_data encoded as {encoding} but its file has no raw_keys")
+    return dict(zip(keys, decode_values(data, encoding)))
+
+
+def decode_values(data: Union[str, bytes], encoding: str) -> List[Any]:
+    """The positional value array of a columnar row, without building the dict."""
+    if encoding == COLUMNAR_ZLIB:
+        data = zlib.decompress(data).decode("utf-8")
+    elif encoding != COLUMNAR:
+        raise ValueError(f"Unknown raw_data encoding: {encoding}")
+    return json.loads(data)
+
+
+def parse_keys(raw_keys: Union[str, List[str], None]) -> Optional[Tuple[str, ...]]:
+    """uploaded_files.raw_keys as a tuple, parsing stored JSON text once per distinct value."""
+    if isinstance(raw_keys, str):
+        return _parse_keys(raw_keys)
+    return tuple(raw_keys) if raw_keys is not None else None
@@ -0,0 +1,188 @@
+"""
+Content-addressed reuse of earlier uploads. A file whose sha256 was already
+extracted with the same config (manifest file id and config_digest) is not
+parsed again: its raw_data is cloned from the earlier copy (recorded in
+file_reuse), and semantic_map clones the events/devices_raw those rows
+produced instead of mapping them again.
+
+Cloned rows get ids derived from (new parent id, old id) by id_utils.derived_id,
+so the raw_data_ids of cloned events can be rewritten without a lookup table.
+"""
+
+import json
+import hashlib
+from python_core.utils.id_utils import derived_id
+from semantic_map.rows import EventRow
+
+
+REUSABLE_STATUSES = ("success", "reused")
+_STATUS_PLACEHOLDERS = ", ".join("?" * len(REUSABLE_STATUSES))
+
+# bump when parser, mapping or normalization code changes the rows a file
+# produces, so copies made by the old code are parsed again instead of cloned
+REUSE_VERSION = 1
+
+
+def config_digest(manifest, file_cfg: dict) -> str:
+    """
+    sha256 of what a file's rows are derived from: its manifest `files` entry
+    (parser config), the views that map it, and REUSE_VERSION. Stored as
+    uploaded_files.config_digest; content is only reused under an equal digest.
+    """
+    views = manifest.config.get("views", [])
+    indexes = manifest.view_index_map.get(file_cfg.get("id"), [])
+    config = {
+        "version": REUSE_VERSION,
+        "file": file_cfg,
+        "views": [views[i] for i in indexes],
+    }
+    text = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def register(conn) -> None:
+    """Makes derived_id available to SQL as reuse_id(namespace_id, old_id)."""
+    conn.create_function("reuse_id", 2, derived_id, deterministic=True)
+
+
+def known_hashes(conn) -> dict:
+    """(manifest_file_id, config_digest) -> set of file hashes that can be reused."""
+    known = {}
+    for manifest_file_id, digest, file_hash in conn.execute(
+        f"""
+        SELECT DISTINCT manifest_file_id, config_digest, file_hash FROM uploaded_files
+        WHERE config_digest IS NOT NULL AND parse_status IN ({_STATUS_PLACEHOLDERS})
+        """,
+        REUSABLE_STATUSES,
+    ):
+        known.setdefault((manifest_file_id, digest), set()).add(file_hash)
+    return known
+
+
+def find_source_file(conn, file_hash: str, manifest_file_id: str, digest: str):
+    """Most recent earlier extraction of the same content and config, or None."""
+    row = conn.execute(
+        f"""
+        SELECT id, upload_id FROM uploaded_files
+        WHERE file_hash = ? AND manifest_file_id = ? AND config_digest = ?
+          AND parse_status IN ({_STATUS_PLACEHOLDERS})
+        ORDER BY upload_timestamp DESC
+        LIMIT 1
+        """,
+        (file_hash, manifest_file_id, digest, *REUSABLE_STATUSES),
+    ).fetchone()
+    return row if row else None
+
+
+def clone_raw_data(conn, source_file_id: str, file_id: str, upload_id: str) -> int:
+    conn.execute(
+        "INSERT INTO file_reuse (file_id, source_file_id) VALUES (?, ?)",
+        (file_id, source_file_id),
+    )
+    conn.execute(
+        "UPDATE uploaded_files SET raw_keys = (SELECT raw_keys FROM uploaded_files WHERE id = ?) WHERE id = ?",
+        (source_file_id, file_id),
+    )
+    cursor = conn.execute(
+        """
+        INSERT INTO raw_data (id, upload_id, file_id, data, line_numbers, encoding)
+        SELECT reuse_id(?, id), ?, ?, data, line_numbers, encoding
+        FROM raw_data WHERE file_id = ?
+        """,
+        (file_id, upload_id, file_id, source_file_id),
+    )
+    return cursor.rowcount
+
+
+def reused_files(conn, upload_id: str) -> dict:
+    """source_file_id -> file_id for every reused file of an upload."""
+    return dict(
+        conn.execute(
+            """
+            SELECT r.source_file_id, r.file_id
+            FROM file_reuse r
+            JOIN uploaded_files f ON f.id = r.file_id
+            WHERE f.upload_id = ?
+            """,
+            (upload_id,),
+        ).fetchall()
+    )
+
+
+def clone_mapped_rows(conn, upload_id: str, reuse: dict):
+    """
+    Clones devices_raw of the source files and returns (events, remap_raw_ids):
+    EventRows (origin and treat_as_auth_device carried over) for every source
+    event built only from reused files, and the new raw_data ids that still
+    have to be mapped because their event also drew on other files. Their
+    devices are among the clones, so map() only takes their events.
+    """
+    devices = 0
+    for source_file_id, file_id in reuse.items():
+        devices += conn.execute(
+            """
+            INSERT INTO devices_raw (id, upload_id, file_id, raw_data_id, entity_type, event_kind, event_category, attributes, origin)
+            SELECT reuse_id(?, id), ?, ?, reuse_id(?, raw_data_id), entity_type, event_kind, event_category, attributes, origin
+            FROM devices_raw WHERE file_id = ?
+            """,
+            (upload_id, upload_id, file_id, file_id, source_file_id),
+        ).rowcount
+
+    placeholders = ",".join("?" * len(reuse))
+    source_uploads = [
+        r[0]
+        for r in conn.execute(
+            f"SELECT DISTINCT upload_id FROM uploaded_files WHERE id IN ({placeholders})",
+            list(reuse),
+        )
+    ]
+
+    events = []
+    remap_raw_ids = set()
+    for source_upload_id in source_uploads:
+        cursor = conn.execute(
+            """
+            SELECT id, file_ids, raw_data_ids, timestamp, event_action, event_kind, event_category,
+                   event_type, event_type_msg, attributes, origin, treat_as_auth_device,
+                   deduplicated, extra_timestamps, duplicate_of
+            FROM events WHERE upload_id = ?
+            """,
+            (source_upload_id,),
+        )
+        for row in cursor:
+            file_ids = json.loads(row[1] or "[]")
+            raw_data_ids = json.loads(row[2] or "[]")
+            if not any(f in reuse for f in file_ids):
+                continue
+            # file_ids and raw_data_ids grow in step when events are deduplicated
+            pairs = list(zip(file_ids, raw_data_ids))
+            if not all(f in reuse for f in file_ids):
+                remap_raw_ids.update(
+                    derived_id(reuse[f], r) for f, r in pairs if f in reuse
+                )
+                continue
+            event = EventRow(
+                derived_id(upload_id, row[0]),
+                upload_id,
+                [reuse[f] for f in file_ids],
+                [derived_id(reuse[f], r) for f, r in pairs],
+                row[3],
+                row[4],
+                row[5],
+                event_type_msg=row[8],
+                attributes=json.loads(row[9] or "{}"),
+                origin=row[10],
+                treat_as_auth_device=row[11],
+                deduplicated=bool(row[12]),
+                extra_timestamps=json.loads(row[13] or "[]"),
+                duplicate_of=row[14],
+            )
+            # never merged into, so the stored JSON text is reused as is
+            event.event_category = row[6] or "[]"
+            event.event_type = row[7] or "[]"
+            events.append(event)
+
+    print(
+        f"[Reuse] Cloned {len(events)} events and {devices} devices from {len(reuse)} reused files"
+    )
+    return events, remap_raw_ids
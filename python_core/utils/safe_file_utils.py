@@ -82,3 +82,67 @@ def file_hash(filepath: str, alg: str = "sha256") -> str:
 
     os.close(fd)
     return hash_object.hexdigest()
+
+
+class IngestedFile:
+    """
+    A file read once via os.read: the sha digest and byte length are computed
+    in the same chunked pass that fills the buffer, so extraction never has to
+    reopen the file. `view` exposes the raw bytes for byte-level parsers; `text`
+    decodes them (newlines normalized to "\\n", as text-mode open() would).
+    """
+
+    def __init__(self, path: str, alg: str = "sha256", chunk_size: int = 65536):
+        hash_object = hashlib.new(alg)
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.lseek(fd, 0, os.SEEK_END)
+            os.lseek(fd, 0, os.SEEK_SET)
+
+            buf = bytearray(size)
+            mv = memoryview(buf)
+            bytes_read = 0
+            while bytes_read < size:
+                chunk = os.read(fd, min(chunk_size, size - bytes_read))
+                if not chunk:
+                    break
+                hash_object.update(chunk)
+                mv[bytes_read : bytes_read + len(chunk)] = chunk
+                bytes_read += len(chunk)
+            mv.release()
+        finally:
+            os.close(fd)
+
+        if bytes_read < size:  # file shrank underneath us
+            del buf[bytes_read:]
+
+        self.path = path
+        self.digest = hash_object.hexdigest()
+        self.size = bytes_read
+        self._buf = buf
+        self._text = None
+
+    @property
+    def view(self) -> memoryview:
+        if self._buf is None:
+            raise ValueError(f"Bytes of {self.path} were already released")
+        return memoryview(self._buf)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            if self._buf is None:
+                raise ValueError(f"Bytes of {self.path} were already released")
+            text = self._buf.decode("utf-8", errors="replace")
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            self._text = text
+        return self._text
+
+    def release(self) -> None:
+        """Drops the raw byte buffer once the caller only needs text/digest/size."""
+        self._buf = None
+
+
+def ingest(path: str, alg: str = "sha256") -> IngestedFile:
+    return IngestedFile(path, alg)
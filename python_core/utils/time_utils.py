@@ -13,6 +13,34 @@ import logging
 JAN_1_2000_UNIX = 946702800
 JAN_1_2050_UNIX = 2524608000
 
+ISO_FORMAT = "iso"  # datetime.fromisoformat: every ISO 8601 variant (fractions, Z, offsets) at once
+
+# strptime formats DateParser tries while learning a field; the first that fits all samples wins
+CANDIDATE_FORMATS = (
+    ISO_FORMAT,
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S %Z",
+    "%Y-%m-%d %H:%M:%S.%f %Z",
+    "%Y-%m-%d",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y",
+    "%b %d, %Y, %I:%M:%S %p",
+    "%b %d, %Y %I:%M:%S %p",
+    "%b %d, %Y, %I:%M:%S %p %Z",
+    "%d %b %Y, %H:%M:%S",
+    "%d %b %Y %H:%M:%S",
+    "%a, %d %b %Y %H:%M:%S %z",
+    "%a %b %d %H:%M:%S %Z %Y",
+)
+
 
 def extract_dates(
     df: pd.DataFrame,
@@ -142,3 +170,93 @@ def unix_ms(dt: datetime) -> int:
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=pytz.UTC)
     return int(dt.timestamp() * 1000)
+
+
+# --------
+
+
+class DateParser:
+    """
+    unix_ms(parse_date(value)) for one field, learned from its own values.
+    The first LEARN_SAMPLES distinct strings are parsed with dateutil, and the
+    CANDIDATE_FORMATS that give the same instant for every one of them survive.
+    After that the first survivor is used through strptime, with dateutil only
+    for values it doesn't fit. Results are memoized per string (exports repeat
+    the same timestamps across rows and views).
+    """
+
+    LEARN_SAMPLES = 5
+    MEMO_SIZE = 8192
+
+    def __init__(self):
+        self.format = None
+        self._candidates = list(CANDIDATE_FORMATS)
+        self._memo = {}
+        self.stats = {
+            "values": 0,
+            "memo_hits": 0,
+            "learned": 0,  # parsed with dateutil while learning
+            "fast": 0,  # strptime with the learned format
+            "fallback": 0,  # dateutil, after learning
+            "failed": 0,  # no date in the value
+            "format": None,
+        }
+
+    def unix_ms(self, value) -> int:
+        self.stats["values"] += 1
+        s = str(value)
+        ms = self._memo.get(s)
+        if ms is not None:
+            self.stats["memo_hits"] += 1
+            return ms
+
+        ms = self._parse(s)
+        if len(self._memo) >= self.MEMO_SIZE:
+            self._memo.clear()
+        self._memo[s] = ms
+        return ms
+
+    def _parse(self, s: str) -> int:
+        text = s.strip()
+        if self.format is not None and text and not text.isdigit():
+            try:
+                ms = _strptime_ms(text, self.format)
+                self.stats["fast"] += 1
+                return ms
+            except ValueError:
+                pass
+
+        ms = unix_ms(parse_date(s))
+        if ms == 0:
+            self.stats["failed"] += 1
+        elif self.format is not None or text.isdigit() or not self._candidates:
+            self.stats["fallback"] += 1
+        else:
+            self.stats["learned"] += 1
+            self._learn(text, ms)
+        return ms
+
+    def _learn(self, text: str, ms: int) -> None:
+        survivors = []
+        for fmt in self._candidates:
+            try:
+                if _strptime_ms(text, fmt) == ms:
+                    survivors.append(fmt)
+            except ValueError:
+                continue
+        self._candidates = survivors
+        if not survivors:
+            self.stats["format"] = "dateutil"  # nothing fits; stay on the slow path
+        elif self.stats["learned"] >= self.LEARN_SAMPLES:
+            self.format = self.stats["format"] = survivors[0]
+
+
+def _strptime_ms(text: str, fmt: str) -> int:
+    """unix_ms of text in a known format; naive values are UTC as in parse_date's default."""
+    if fmt == ISO_FORMAT:
+        dt = datetime.fromisoformat(text)
+    else:
+        dt = datetime.strptime(text, fmt)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=pytz.UTC)
+    return int(dt.timestamp() * 1000)
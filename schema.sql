@@ -1,3 +1,9 @@
+-- schema_version: 3
+-- Bump the version with every change here; changes that CREATE ... IF NOT EXISTS
+-- can't make on an existing database (new columns, ...) also need a step in
+-- MIGRATIONS (python_core/db_session.py and webapp/src/database/sqlite-worker.js).
+-- Databases at this version skip this file.
+
 CREATE TABLE IF NOT EXISTS uploads (
     id TEXT PRIMARY KEY, 
     given_name TEXT,         
@@ -17,6 +23,8 @@ CREATE TABLE IF NOT EXISTS uploaded_files ( -- filled during extraction step
     upload_timestamp REAL,        
     file_size_bytes INTEGER,
     parse_status TEXT,
+    raw_keys JSONTEXT,  -- key dictionary for this file's columnar raw_data rows (see python_core/utils/raw_codec.py)
+    config_digest TEXT,  -- manifest entry + views this file was extracted and mapped with (see python_core/utils/reuse_utils.py)
     FOREIGN KEY(upload_id) REFERENCES uploads(id) ON DELETE CASCADE
 );
 
@@ -25,13 +33,26 @@ CREATE TABLE IF NOT EXISTS raw_data ( -- filled during extraction step
     id TEXT PRIMARY KEY,
     upload_id TEXT,
     file_id TEXT,             
-    data JSONTEXT,
+    data JSONTEXT,  -- JSON object, or a positional value array (possibly zlib BLOB) per encoding
     line_numbers JSONTEXT,  -- JSON list of line numbers where this record appears in the source file (1-indexed)
+    encoding TEXT,  -- NULL (plain JSON), 'columnar' or 'columnar+zlib'
     FOREIGN KEY(upload_id) REFERENCES uploads(id) ON DELETE CASCADE,
     FOREIGN KEY(file_id) REFERENCES uploaded_files(id) ON DELETE CASCADE
 );
 
 
+CREATE TABLE IF NOT EXISTS file_reuse ( -- filled during extraction when a file's content was already parsed before
+    file_id TEXT PRIMARY KEY,  -- the new uploaded_files row (parse_status 'reused')
+    source_file_id TEXT,       -- the earlier uploaded_files row its raw_data was cloned from
+    FOREIGN KEY(file_id) REFERENCES uploaded_files(id) ON DELETE CASCADE,
+    FOREIGN KEY(source_file_id) REFERENCES uploaded_files(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_hash ON uploaded_files(file_hash, manifest_file_id);
+CREATE INDEX IF NOT EXISTS idx_raw_data_file_id ON raw_data(file_id);
+CREATE INDEX IF NOT EXISTS idx_raw_data_upload_id ON raw_data(upload_id, id);  -- ids are time-ordered ULIDs
+
+
 
 CREATE TABLE IF NOT EXISTS events ( -- filled during semantic map
     id TEXT PRIMARY KEY,
@@ -56,10 +77,15 @@ CREATE TABLE IF NOT EXISTS events ( -- filled during semantic map
     --
     deduplicated BOOLEAN DEFAULT 0,
     extra_timestamps JSONTEXT DEFAULT "[]",
+    duplicate_of TEXT REFERENCES events(id) ON DELETE SET NULL,  -- earlier upload's event this one repeats (cross-upload deduplication)
     --
     FOREIGN KEY(upload_id) REFERENCES uploads(id) ON DELETE CASCADE
 );
 
+CREATE INDEX IF NOT EXISTS idx_events_upload_id ON events(upload_id, id);
+CREATE INDEX IF NOT EXISTS idx_events_kind_action_ts ON events(event_kind, event_action, timestamp);  -- cross-upload deduplication
+CREATE INDEX IF NOT EXISTS idx_events_duplicate_of ON events(duplicate_of) WHERE duplicate_of IS NOT NULL;  -- ON DELETE SET NULL lookups
+
 
 CREATE TABLE IF NOT EXISTS event_comments (
     id TEXT PRIMARY KEY,
@@ -90,6 +116,8 @@ CREATE TABLE IF NOT EXISTS devices_raw ( -- filled during semantic map
     FOREIGN KEY(raw_data_id) REFERENCES raw_data(id) ON DELETE CASCADE
 );
 
+CREATE INDEX IF NOT EXISTS idx_devices_raw_upload_id ON devices_raw(upload_id, id);
+
 CREATE TABLE IF NOT EXISTS atomic_devices ( -- hard merge based on static device identifiers. user cannot edit this.
     id TEXT PRIMARY KEY,
     upload_ids JSONTEXT NOT NULL,  -- JSON list of uploads that contributed to this merged device
@@ -0,0 +1,75 @@
+"""
+Benchmark: extraction-shaped raw_data inserts (one commit per file) in a
+plain DatabaseSession vs. bulk_load=True with deferred foreign keys and
+deferred_indexes. Not collected by pytest; run it directly:
+
+    python tests/python/bench_bulk_load.py [files] [rows_per_file]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, repo_root)
+sys.path.insert(0, os.path.join(repo_root, "python_core"))
+
+from db_session import DatabaseSession, deferred_indexes
+from python_core.extractors.worker import RAW_DATA_INSERT, UPLOADED_FILE_INSERT
+from python_core.utils.id_utils import new_id
+
+SCHEMA_PATH = os.path.join(repo_root, "schema.sql")
+
+
+def load(db_path: str, files: int, rows: int, bulk: bool) -> float:
+    with DatabaseSession(db_path, SCHEMA_PATH):
+        pass  # schema outside the timing
+    record = json.dumps({"action": "Login", "ip": "10.0.0.1", "ua": "Mozilla/5.0" * 4})
+
+    start = time.perf_counter()
+    session = DatabaseSession(
+        db_path,
+        SCHEMA_PATH,  # already current, so only the user_version check
+        bulk_load=bulk,
+        defer_foreign_keys=bulk,
+    )
+    with session as conn:
+        upload_id = new_id()
+        conn.execute("INSERT INTO uploads (id) VALUES (?)", (upload_id,))
+        conn.commit()
+        with deferred_indexes(conn, ("raw_data",) if bulk else ()):
+            for i in range(files):
+                file_id = new_id()
+                name = f"f{i}"
+                conn.execute(
+                    UPLOADED_FILE_INSERT,
+                    (file_id, "f", upload_id, name, name, None, 0, 0, "parsed")
+                    + (None, None),
+                )
+                conn.executemany(
+                    RAW_DATA_INSERT,
+                    (
+                        (new_id(), upload_id, file_id, record, "[1]", None)
+                        for _ in range(rows)
+                    ),
+                )
+                conn.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = load(os.path.join(tmp, "plain.db"), files, rows, bulk=False)
+        bulk = load(os.path.join(tmp, "bulk.db"), files, rows, bulk=True)
+    print(
+        f"{files} files x {rows} rows: plain {plain:6.2f}s  "
+        f"bulk_load {bulk:6.2f}s  ({plain / bulk:4.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: compiled path accessors vs. the per-call regex walk that
+get_value_at_path used to do. Not collected by pytest; run it directly:
+
+    python tests/python/bench_path_accessors.py
+"""
+
+import os
+import sys
+import timeit
+
+repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, repo_root)
+
+from python_core.utils.json_utils import PATH_REGEX, compile_path, get_value_at_path
+
+
+def legacy_get_value_at_path(data, path, default=""):
+    """get_value_at_path before compile_path, kept here as the baseline."""
+    if data is None or not path:
+        return default
+    try:
+        current = data
+        for match in PATH_REGEX.finditer(path):
+            quoted_key, list_idx, simple_key = match.groups()
+            if quoted_key:
+                if isinstance(current, dict):
+                    current = current.get(quoted_key)
+                else:
+                    return default
+            elif list_idx:
+                idx = int(list_idx)
+                if isinstance(current, list) and 0 <= idx < len(current):
+                    current = current[idx]
+                else:
+                    return default
+            elif simple_key:
+                if isinstance(current, dict):
+                    current = current.get(simple_key)
+                else:
+                    return default
+            if current is None:
+                return default
+        return current
+    except Exception:
+        return default
+
+
+RECORD = {
+    "action": "Login",
+    "session": {"ip": "10.0.0.1"},
+    "items": [{"User Info": {"id": 42}}],
+    "string_map_data": {"User Agent": {"value": "Mozilla/5.0"}},
+}
+PATHS = [
+    "action",
+    "session.ip",
+    "items[0].'User Info'.id",
+    "string_map_data.'User Agent'.value",
+    "missing.key",
+]
+N = 100_000
+
+
+def main():
+    for path in PATHS:
+        accessor = compile_path(path)
+        assert accessor.get(RECORD) == legacy_get_value_at_path(RECORD, path)
+        legacy = timeit.timeit(lambda: legacy_get_value_at_path(RECORD, path), number=N)
+        wrapped = timeit.timeit(lambda: get_value_at_path(RECORD, path), number=N)
+        compiled = timeit.timeit(lambda: accessor.get(RECORD), number=N)
+        print(
+            f"{path:40} legacy {legacy * 1e6 / N:6.2f}us  "
+            f"get_value_at_path {wrapped * 1e6 / N:6.2f}us  "
+            f"accessor {compiled * 1e6 / N:6.2f}us  ({legacy / compiled:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
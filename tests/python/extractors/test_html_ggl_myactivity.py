@@ -397,3 +397,47 @@ class TestHTMLMyActivityParserExactCounts:
 
         assert isinstance(result, list)
         assert len(result) == 56, f"Expected 56 records, got {len(result)}"
+
+
+SYNTHETIC_MYACTIVITY = """<html><body><div class="mdl-grid">
+<div class="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"><div class="mdl-grid">
+  <div class="header-cell mdl-cell mdl-cell--12-col"><p class="mdl-typography--title">Search<br></p></div>
+  <div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1">Searched for&nbsp;<a href="https://www.google.com/search?q=caf%C3%A9&amp;x=1">caf&eacute;   hours</a><br>Feb 19, 2025, 10:00:00 AM EST</div>
+  <div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1 mdl-typography--text-right"></div>
+  <div class="content-cell mdl-cell mdl-cell--12-col mdl-typography--caption"><b>Products:</b><br>&emsp;Search<br><b>Locations:</b><br>&emsp;At <a href="https://www.google.com/maps/@?api=1">this general area</a> - Based on your past activity<br><b>Why is this here?</b><br>&emsp;This activity was saved.</div>
+</div></div>
+<!-- <div class="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"> -->
+<div class="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"><div class="mdl-grid">
+  <div class="header-cell mdl-cell mdl-cell--12-col"><p class="mdl-typography--title">Maps<br></p></div>
+  <div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1">Viewed   area<br>123 Main St<br>Feb 18, 2025, 9:00:00 PM EST</div>
+  <script>var x = "<div>";</script>
+</div></div>
+</div></body></html>"""
+
+
+class TestHTMLMyActivityStreaming:
+    """The streaming parser must agree with the BeautifulSoup implementation."""
+
+    def _bs_records(self, content):
+        from bs4 import BeautifulSoup
+
+        return HTMLMyActvityParser._parse_google_myactivity(
+            BeautifulSoup(content, "html.parser")
+        )
+
+    def test_stream_matches_beautifulsoup(self):
+        records = HTMLMyActvityParser.extract(SYNTHETIC_MYACTIVITY)
+        line_numbers = [r.pop("__line_numbers") for r in records]
+
+        assert records == self._bs_records(SYNTHETIC_MYACTIVITY)
+        assert records[0]["URL"].endswith("&x=1")
+        assert records[0]["Locations"] == "At this general area - Based on your past activity"
+        assert records[1]["Address"] == "123 Main St"
+        assert line_numbers == [[2, 7], [9, 13]]
+
+    def test_stream_is_independent_of_chunking(self, monkeypatch):
+        import python_core.utils.html_stream as html_stream
+
+        expected = HTMLMyActvityParser.extract(SYNTHETIC_MYACTIVITY)
+        monkeypatch.setattr(html_stream, "FEED_CHUNK", 7)
+        assert HTMLMyActvityParser.extract(SYNTHETIC_MYACTIVITY) == expected
@@ -457,3 +457,56 @@ class TestHTMLTableParserExactCounts:
                 "Old Value",
                 "New Value",
             }
+
+
+class TestHTMLTableStreaming:
+    """Row-at-a-time table extraction."""
+
+    def test_thead_headers_and_multiline_rows(self):
+        content = """<table>
+<thead><tr><td>Name</td><td>Note</td></tr></thead>
+<tbody>
+<tr><td>Alice</td><td>a
+b</td></tr>
+<tr><td>Bob<td>x <!-- c --> y</tr>
+</tbody>
+</table>"""
+        records = HTMLTableParser.extract(content)
+        assert records == [
+            {"Name": "Alice", "Note": "a\nb", "__line_numbers": [4, 5]},
+            {"Name": "Bob", "Note": "xy", "__line_numbers": [6, 6]},
+        ]
+
+    def test_rows_without_header_get_column_keys(self):
+        records = HTMLTableParser.extract("<table><tr><td>1</td><th>2</th></tr></table>")
+        assert records == [{"Column_0": "1", "Column_1": "2", "__line_numbers": [1, 1]}]
+
+    def test_records_are_yielded_incrementally(self):
+        rows = "".join(f"<tr><td>{i}</td></tr>\n" for i in range(3))
+        records = HTMLTableParser.iter_records(f"<table><tr><th>n</th></tr>\n{rows}")
+        assert next(records)["n"] == "0"
+
+    def test_subscriber_info_challenges_expanded_per_row(self):
+        from python_core.extractors.html_table import HTMLGglSubscriberInfoParser
+
+        content = """<table>
+<tr><th>Timestamp</th><th>IP Address</th><th>Activity Type</th><th>Challenges (timestamp, outcome, dusi)</th></tr>
+<tr><td>2025-02-20 21:18:40 Z</td><td>1.2.3.4</td><td>Login</td><td>2025-02-20 21:18:46 Z: Challenge Failed, -; 2025-02-20 21:19:01 Z: Challenge Passed, -</td></tr>
+<tr><td>2025-02-21 08:00:00 Z</td><td>1.2.3.4</td><td>Logout</td><td></td></tr>
+</table>"""
+        line_numbers = []
+        records = []
+        for record in HTMLGglSubscriberInfoParser.iter_records(content):
+            # the extract worker pops line numbers as it consumes records
+            line_numbers.append(record.pop("__line_numbers"))
+            records.append(record)
+
+        assert [r["Activity Type"] for r in records] == [
+            "Login",
+            "Challenge",
+            "Challenge",
+            "Logout",
+        ]
+        assert records[1]["Challenge Outcome"] == "Challenge Failed"
+        assert records[2]["IP Address"] == "1.2.3.4"
+        assert line_numbers == [[3, 3], [3, 3], [3, 3], [4, 4]]
@@ -35,3 +35,159 @@ def test_json_raises_file_level_error_on_bad_input():
 def test_jsonl_raises_file_level_error_on_bad_input():
     with pytest.raises(FileLevelError):
         JSONLParser.extract("{{{not valid json at all", {})
+
+
+def test_sniffer_detects_nonstandard_syntax():
+    from python_core.extractors.json_ import sniff_json_features
+
+    assert sniff_json_features('{"a": "it\'s // not a comment, }"}') == set()
+    assert sniff_json_features('{"a": 1,}') == {"trailing_commas"}
+    assert sniff_json_features("{'a': 1}") == {"single_quotes"}
+    assert sniff_json_features('{a: 1} // note') == {"unquoted_keys", "comments"}
+
+
+def test_strict_json_is_streamed():
+    stats = {}
+    JSONParser.extract('[{"a": 1}]', {"__stats": stats})
+    assert stats["decoder"] == "json_stream"
+    assert stats["failed_attempts"] == []
+
+
+def test_lenient_json_skips_failing_strict_decoders():
+    stats = {}
+    records = JSONParser.extract('[{"a": 1,},]', {"__stats": stats})
+    assert records[0]["a"] == 1
+    assert stats["decoder"] == "json5"
+    assert stats["failed_attempts"] == []
+
+
+def test_decoder_memoized_per_manifest_file(monkeypatch):
+    import python_core.extractors.json_ as json_module
+
+    # trailing comma sits past the sniffed head/tail, so only the memo can skip stdlib
+    monkeypatch.setattr(json_module, "SNIFF_WINDOW", 64)
+    padding = ",\n".join(f'{{"n": {i}}}' for i in range(20))
+    content = f'[{padding}, {{"b": 2,}}, {padding}]'
+    cfg = {"__manifest_file_id": "test_memo_file"}
+
+    stats = {}
+    JSONParser.extract(content, {**cfg, "__stats": stats})
+    assert stats["failed_attempts"] == ["json", "single_quote"]
+
+    stats = {}
+    JSONParser.extract(content, {**cfg, "__stats": stats})
+    assert stats["failed_attempts"] == ["json"]
+
+
+def test_memoized_lenient_decoder_does_not_take_over_strict_files():
+    import json
+
+    cfg = {"__manifest_file_id": "test_memo_strict_after_lenient"}
+    stats = {}
+    lenient = JSONParser.extract("[\n{\na: hello\nn: 1.5\n}\n]", {**cfg, "__stats": stats})
+    assert stats["decoder"] == "hjson"
+    assert json.dumps(lenient)
+
+    stats = {}
+    strict = JSONParser.extract('[{"n": 2.5, "k": 3}]', {**cfg, "__stats": stats})
+    assert stats["decoder"] == "json_stream"
+    assert json.loads(json.dumps(strict))[0] == {"n": 2.5, "k": 3, "__line_numbers": [1, 1]}
+
+    # the full-document parse also tries stdlib before the memo
+    stats = {}
+    JSONParser.basic_str_to_json('{"n": 4.5}', memo_key=cfg["__manifest_file_id"], stats=stats)
+    assert stats["decoder"] == "json"
+
+
+def test_stream_yields_only_root_elements():
+    from python_core.utils.json_stream import iter_json_root
+
+    content = (
+        '{"other": [{"x": "]}\\"["}, [1, 2]], "n": null,'
+        ' "outer": {"\'k\'": 0, "sessions_v2": [{"a": 1}, {"a": 2}]}}'
+    )
+    values = [v for v, _, _ in iter_json_root(content, "outer.sessions_v2[]")]
+    assert values == [{"a": 1}, {"a": 2}]
+
+    assert [v for v, _, _ in iter_json_root(content, "other[1]")] == [1, 2]
+    assert list(iter_json_root(content, "missing[]")) == []
+    assert [v for v, _, _ in iter_json_root("[{}, 3]")] == [{}, 3]
+
+
+def test_stream_matches_full_parse_for_json_root():
+    content = '{"meta": {"v": 1}, "devices_v2": [{"id": 1}, 7, {"id": 2}]}'
+    cfg = {"json_root": "devices_v2[]"}
+    streamed = JSONParser.extract(content, cfg)
+    assert [r["id"] for r in streamed] == [1, 2]
+    assert streamed == JSONParser._parse_document(content, cfg)
+
+
+def test_stream_falls_back_without_duplicates(monkeypatch):
+    import python_core.extractors.json_ as json_module
+
+    # the bad element is past the sniffed head/tail, so streaming starts and then fails
+    monkeypatch.setattr(json_module, "SNIFF_WINDOW", 16)
+    content = '[\n{"n": 0},\n{"n": 1},\n{"n": 2, bad: 1},\n{"n": 3},\n{"n": 4}\n]'
+
+    stats = {}
+    records = JSONParser.extract(content, {"__stats": stats})
+    assert [r["n"] for r in records] == [0, 1, 2, 3, 4]
+    assert stats["stream_fallback_after"] == 2
+
+
+def test_jsonl_where_pushdown_and_counters():
+    content = "\n".join(
+        [
+            '{"event_type": "session_start_success", "n": 1}',
+            '{"event_type": "message_sent", "n": 2}',
+            '{"event_type": "x", "note": "session_start_success", "n": 3}',
+            "{'event_type': 'session_start_success', 'n': 4}",
+            "[1, 2]",
+        ]
+    )
+    stats = {}
+    cfg = {
+        "where": {"source": "event_type", "op": "==", "value": "SESSION_START_SUCCESS"},
+        "__stats": stats,
+    }
+    records = JSONLParser.extract(content, cfg)
+
+    assert [(r["n"], r["__line_numbers"]) for r in records] == [(1, [1, 1]), (4, [4, 4])]
+    assert stats == {
+        "lines_decoded": 2,
+        "lines_fallback": 1,
+        "lines_prefiltered": 2,
+        "lines_filtered": 1,
+        "lines_skipped": 0,
+    }
+
+
+def test_raw_prefilter_only_pushes_down_safe_conditions():
+    from python_core.utils.filter_builder import make_raw_prefilter
+
+    assert make_raw_prefilter({"source": "a", "op": "!=", "value": "x"}) is None
+    assert make_raw_prefilter({"source": "a", "op": "==", "value": "42"}) is None
+    assert make_raw_prefilter({"source": "a", "op": "==", "value": "a/b"}) is None
+
+    any_of = make_raw_prefilter(
+        {
+            "logic": "any",
+            "conditions": [
+                {"source": "a", "op": "==", "value": "Login"},
+                {"source": "a", "op": "ne", "value": "x"},
+            ],
+        }
+    )
+    assert any_of is None
+
+    all_of = make_raw_prefilter(
+        {
+            "logic": "all",
+            "conditions": [
+                {"source": "a", "op": "==", "value": "Login"},
+                {"source": "b", "op": "!=", "value": "false"},
+            ],
+        }
+    )
+    assert all_of('{"a": "login", "b": "false"}')
+    assert not all_of('{"a": "logout"}')
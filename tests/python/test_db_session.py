@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import pytest
+from db_session import DatabaseSession, read_schema
+
+repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCHEMA_PATH = os.path.join(repo_root, "schema.sql")
+
+
+def _columns(conn, table):
+    return {c[0] for c in conn.execute(f"SELECT * FROM {table} LIMIT 0").description}
+
+
+class TestSchemaVersioning:
+    def test_current_database_skips_schema(self, tmp_path):
+        db_path = str(tmp_path / "t.db")
+        version, _ = read_schema(SCHEMA_PATH)
+        with DatabaseSession(db_path, schema_path=SCHEMA_PATH) as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == version
+            conn.execute("DROP VIEW v_event_actions")
+
+        # a session that ran schema.sql would have recreated the view
+        with DatabaseSession(
+            db_path, schema_path=SCHEMA_PATH, use_dict_factory=True
+        ) as conn:
+            views = conn.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'v_event_actions'"
+            ).fetchall()
+        assert views == []
+
+    def test_unversioned_database_is_migrated(self, tmp_path):
+        db_path = str(tmp_path / "old.db")
+        _, sql = read_schema(SCHEMA_PATH)
+        legacy = "\n".join(
+            line
+            for line in sql.splitlines()
+            if not line.strip().startswith(("raw_keys ", "encoding "))
+        )
+        conn = sqlite3.connect(db_path)
+        conn.executescript(legacy)
+        conn.execute("INSERT INTO uploads (id, platform) VALUES ('u', 'x')")
+        conn.commit()
+        assert "encoding" not in _columns(conn, "raw_data")
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+        conn.close()
+
+        with DatabaseSession(db_path, schema_path=SCHEMA_PATH) as conn:
+            assert "raw_keys" in _columns(conn, "uploaded_files")
+            assert "encoding" in _columns(conn, "raw_data")
+            assert conn.execute("SELECT id FROM uploads").fetchall() == [("u",)]
+            assert conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+
+
+class TestPipelineSession:
+    def test_stages_share_one_connection(self, tmp_path, monkeypatch):
+        from db_session import pipeline_session
+
+        db_path = str(tmp_path / "t.db")
+        connects = []
+        real_connect = sqlite3.connect
+        monkeypatch.setattr(
+            sqlite3,
+            "connect",
+            lambda *a, **k: connects.append(a) or real_connect(*a, **k),
+        )
+
+        with pipeline_session(db_path, SCHEMA_PATH) as shared:
+            with DatabaseSession(db_path, use_dict_factory=True) as conn:
+                assert conn is shared
+                conn.execute("INSERT INTO uploads (id, platform) VALUES ('u', 'x')")
+                assert conn.execute("SELECT id FROM uploads").fetchone() == {"id": "u"}
+            with DatabaseSession(db_path) as conn:
+                assert conn.execute("SELECT id FROM uploads").fetchone() == ("u",)
+            assert shared.row_factory is None
+
+        assert len(connects) == 1
+        with DatabaseSession(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM uploads").fetchone() == (1,)
+
+    def test_firefox_mirror_flushes_changed_pages_once(self, tmp_path, monkeypatch):
+        import builtins
+        import db_session
+        from db_session import pipeline_session
+
+        db_path = str(tmp_path / "t.db")
+        with DatabaseSession(db_path, SCHEMA_PATH) as conn:
+            conn.executemany(
+                "INSERT INTO uploads (id, given_name) VALUES (?, ?)",
+                [(str(i), "x" * 500) for i in range(2000)],
+            )
+
+        monkeypatch.setattr(builtins, "IS_FIREFOX", True, raising=False)
+        monkeypatch.setattr(
+            builtins, "FIREFOX_FLUSH_CHANGED_PAGES", True, raising=False
+        )
+        monkeypatch.setattr(db_session, "FLUSH_CHUNK", 4096)
+        writes = []
+        real_flush = DatabaseSession._flush_changed_chunks
+        monkeypatch.setattr(
+            DatabaseSession,
+            "_flush_changed_chunks",
+            lambda self: writes.append(self) or real_flush(self),
+        )
+
+        with pipeline_session(db_path, SCHEMA_PATH):
+            for name in ("a", "b"):
+                with DatabaseSession(db_path) as conn:
+                    conn.execute(
+                        "UPDATE uploads SET given_name = ? WHERE id = '7'", (name,)
+                    )
+        assert len(writes) == 1
+
+        monkeypatch.setattr(builtins, "IS_FIREFOX", False)
+        with DatabaseSession(db_path) as conn:
+            assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+            assert conn.execute(
+                "SELECT given_name, (SELECT COUNT(*) FROM uploads) FROM uploads WHERE id = '7'"
+            ).fetchone() == ("b", 2000)
+
+
+class TestBulkLoad:
+    INDEXES = "SELECT name FROM sqlite_master WHERE tbl_name = 'raw_data' AND sql LIKE 'CREATE INDEX%'"
+
+    def test_pragmas_restored_and_indexes_rebuilt(self, tmp_path):
+        from db_session import deferred_indexes
+
+        db_path = str(tmp_path / "t.db")
+        with DatabaseSession(db_path, SCHEMA_PATH) as conn:
+            conn.execute("INSERT INTO uploads (id) VALUES ('u')")
+            indexes = conn.execute(self.INDEXES).fetchall()
+
+        with DatabaseSession(db_path, bulk_load=True, defer_foreign_keys=True) as conn:
+            assert conn.execute("PRAGMA synchronous").fetchone() == (0,)
+            with deferred_indexes(conn, ("raw_data",)):
+                assert not conn.execute(self.INDEXES).fetchall()
+                # a child before its parent is fine until the commit
+                conn.execute("INSERT INTO raw_data (id, upload_id, file_id) VALUES ('r', 'u', 'f')")
+                conn.execute("INSERT INTO uploaded_files (id, upload_id) VALUES ('f', 'u')")
+            assert conn.execute(self.INDEXES).fetchall() == indexes
+
+            # still deferred after that commit, and enforced at the next one
+            conn.execute("INSERT INTO raw_data (id, upload_id, file_id) VALUES ('x', 'u', 'missing')")
+            with pytest.raises(sqlite3.IntegrityError):
+                conn.commit()
+            conn.rollback()
+
+            # a non-empty table keeps its indexes
+            with deferred_indexes(conn, ("raw_data",)):
+                assert conn.execute(self.INDEXES).fetchall() == indexes
+
+            conn.execute("DELETE FROM uploads WHERE id = 'u'")  # cascades still run
+            assert conn.execute("SELECT COUNT(*) FROM raw_data").fetchone() == (0,)
+
+        with DatabaseSession(db_path) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+            assert conn.execute("PRAGMA defer_foreign_keys").fetchone() == (0,)
+            assert conn.execute("SELECT COUNT(*) FROM uploaded_files").fetchone() == (0,)
@@ -0,0 +1,76 @@
+import random
+from semantic_map.deduplicate_events import EventDeduplicator, deduplicate_events
+from semantic_map.rows import EventRow
+
+
+def _event(i, ts, action="login", **attributes):
+    return EventRow(
+        f"e{i}", "u", [f"f{i}"], [f"r{i}"], ts, action, attributes=attributes
+    )
+
+
+class TestEventDeduplicator:
+    def test_batch_merges_within_tolerance(self):
+        rows = [
+            _event(0, 10_000, ip="1"),
+            _event(1, 10_500, ip="2", ua="x"),
+            _event(2, 13_000),
+            _event(3, 10_200, action="logout"),
+            _event(4, 0),
+            _event(5, 0),
+        ]
+        kept = deduplicate_events(rows)
+
+        assert [e.id for e in kept] == ["e4", "e5", "e0", "e3", "e2"]
+        e0 = kept[2]
+        assert e0.raw_data_ids == ["r0", "r1"]
+        assert e0.extra_timestamps == [10_500]
+        assert e0.attributes == {"ip": "1", "ua": "x"}
+        assert e0.deduplicated is True
+
+    def test_per_action_tolerance_and_exclude(self):
+        rows = [_event(i, 10_000 + i * 3000, action="login") for i in range(3)]
+        rows += [_event(i + 3, 10_000 + i * 3000, action="logout") for i in range(3)]
+        rows += [_event(6, 10_000, action="message"), _event(7, 10_000, "message")]
+        dedup = EventDeduplicator(exclude=["message"], tolerances={"login": 5000})
+
+        kept = dedup.add(rows)
+        # 13s merges into 10s, but 16s is 6s away from the nearest kept login
+        assert sorted(e.id for e in kept) == [f"e{i}" for i in (0, 2, 3, 4, 5, 6, 7)]
+
+    def test_chunks_match_batch(self):
+        rng = random.Random(7)
+        times = [rng.randrange(0, 60_000, 250) for _ in range(200)]
+        batch = deduplicate_events([_event(i, ts) for i, ts in enumerate(times)])
+
+        rows = [_event(i, ts) for i, ts in enumerate(times)]
+        rows.sort(key=lambda e: e.timestamp)
+        dedup = EventDeduplicator()
+        kept = []
+        for start in range(0, len(rows), 17):
+            kept += dedup.add(rows[start : start + 17])
+        assert [e.id for e in kept] == [e.id for e in batch]
+        assert {e.id for e in dedup.take_merged()} <= {e.id for e in kept}
+
+    def test_later_chunk_merges_into_earlier_and_seeded(self):
+        dedup = EventDeduplicator()
+        dedup.seed([_event(9, 50_000)])
+        first = dedup.add([_event(0, 20_000)])
+        assert [e.id for e in first] == ["e0"]
+
+        second = dedup.add([_event(1, 19_400), _event(2, 50_300), _event(3, 30_000)])
+        assert [e.id for e in second] == ["e3"]
+        merged = {e.id: e.raw_data_ids for e in dedup.take_merged()}
+        assert merged == {"e0": ["r0", "r1"], "e9": ["r9", "r2"]}
+        assert dedup.take_merged() == []
+
+    def test_foreign_seed_marks_duplicates_instead_of_merging(self):
+        dedup = EventDeduplicator()
+        stored = _event(9, 50_000)
+        dedup.seed([stored], foreign=True)
+
+        kept = dedup.add([_event(0, 50_400), _event(1, 50_600), _event(2, 90_000)])
+        assert [(e.id, e.duplicate_of) for e in kept] == [("e0", "e9"), ("e2", None)]
+        # e1 merges into e0, which stands in for e9 from then on
+        assert kept[0].raw_data_ids == ["r0", "r1"]
+        assert stored.raw_data_ids == ["r9"] and dedup.take_merged() == []
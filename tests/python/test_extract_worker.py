@@ -0,0 +1,373 @@
+import os
+import json
+import builtins
+import pytest
+from python_core.extractors import worker as extractor_worker
+from db_session import DatabaseSession
+
+
+DISCORD_EVENTS = "discord___activity___analytics___events-2025-00000-of-00001.json"
+
+
+def _write(name: str, content: str) -> None:
+    path = os.path.join(builtins.TEMP_ZIP_DATA_STORAGE, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _jsonl(n: int) -> str:
+    return "\n".join(
+        json.dumps({"event_type": "session_start_success", "ip": f"10.0.0.{i}"})
+        for i in range(n)
+    )
+
+
+class TestStreamingExtract:
+    def test_records_inserted_across_batches(self, test_db_path):
+        _write(DISCORD_EVENTS, _jsonl(7))
+
+        res = extractor_worker.extract("discord", "test", batch_size=3)
+        assert res["status"] == "success"
+        assert res["partial_errors"] == []
+
+        with DatabaseSession(test_db_path) as conn:
+            rows = conn.execute(
+                "SELECT data, line_numbers FROM raw_data WHERE upload_id = ? ORDER BY rowid",
+                (res["upload_id"],),
+            ).fetchall()
+
+        assert len(rows) == 7
+        assert json.loads(rows[0][0])["ip"] == "10.0.0.0"
+        assert json.loads(rows[6][1]) == [7, 7]
+
+    def test_bulk_load_restores_raw_data_indexes(self, test_db_path):
+        _write(DISCORD_EVENTS, _jsonl(5))
+
+        res = extractor_worker.extract("discord", "test", batch_size=2, bulk_load=True)
+        assert res["status"] == "success"
+
+        with DatabaseSession(test_db_path) as conn:
+            count = conn.execute(
+                "SELECT COUNT(*) FROM raw_data WHERE upload_id = ?",
+                (res["upload_id"],),
+            ).fetchone()[0]
+            indexes = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = 'raw_data' AND sql IS NOT NULL"
+            ).fetchone()[0]
+
+        assert count == 5
+        assert indexes == 2
+
+    def test_parser_generator_is_lazy(self):
+        from python_core.extractors.jsonl_ import JSONLParser
+
+        records = JSONLParser.iter_records(_jsonl(3) + "\n{{{not valid json at all")
+        assert next(records)["__line_numbers"] == [1, 1]
+
+    def test_failed_file_leaves_no_partial_rows(self, test_db_path):
+        _write(DISCORD_EVENTS, _jsonl(4) + "\n{{{not valid json at all")
+
+        res = extractor_worker.extract("discord", "test", batch_size=2)
+        assert res["status"] == "success"
+        assert len(res["partial_errors"]) == 1
+
+        with DatabaseSession(test_db_path) as conn:
+            raw_count = conn.execute(
+                "SELECT COUNT(*) FROM raw_data WHERE upload_id = ?",
+                (res["upload_id"],),
+            ).fetchone()[0]
+            file_count = conn.execute(
+                "SELECT COUNT(*) FROM uploaded_files WHERE upload_id = ?",
+                (res["upload_id"],),
+            ).fetchone()[0]
+            upload_count = conn.execute(
+                "SELECT COUNT(*) FROM uploads WHERE id = ?", (res["upload_id"],)
+            ).fetchone()[0]
+
+        assert raw_count == 0
+        assert file_count == 0
+        assert upload_count == 1
+
+
+class TestSinglePassIngest:
+    def test_ingest_digest_size_and_text(self, tmp_path):
+        import hashlib
+        from python_core.utils.safe_file_utils import ingest
+
+        raw = 'a,b\r\n1,"caf\xc3\xa9"\r\n'.encode("latin-1")
+        path = tmp_path / "sample.csv"
+        path.write_bytes(raw)
+
+        ingested = ingest(str(path))
+        assert ingested.digest == hashlib.sha256(raw).hexdigest()
+        assert ingested.size == len(raw)
+        assert bytes(ingested.view) == raw
+        assert ingested.text == 'a,b\n1,"café"\n'
+
+        ingested.release()
+        with pytest.raises(ValueError):
+            ingested.view
+
+    def test_uploaded_file_hash_and_size_recorded(self, test_db_path):
+        import hashlib
+
+        content = _jsonl(2)
+        _write(DISCORD_EVENTS, content)
+
+        res = extractor_worker.extract("discord", "test")
+        with DatabaseSession(test_db_path) as conn:
+            file_hash, size = conn.execute(
+                "SELECT file_hash, file_size_bytes FROM uploaded_files WHERE upload_id = ?",
+                (res["upload_id"],),
+            ).fetchone()
+
+        assert file_hash == hashlib.sha256(content.encode()).hexdigest()
+        assert size == len(content.encode())
+
+
+PARALLEL_MANIFEST = """
+id: partest
+files:
+  - id: "par_events"
+    path: "events/*.jsonl"
+    parser:
+      format: "jsonl"
+  - id: "par_devices"
+    path: "devices.json"
+    parser:
+      format: "json"
+      json_root: "devices[]"
+views:
+  - file:
+      id: "par_events"
+"""
+
+
+class TestParallelExtract:
+    def test_pool_workers_feed_a_single_writer(self, test_db_path, tmp_path):
+        (tmp_path / "partest.yaml").write_text(PARALLEL_MANIFEST)
+        _write("partest___events___a.jsonl", _jsonl(5))
+        _write("partest___events___b.jsonl", _jsonl(3))
+        _write("partest___events___bad.jsonl", _jsonl(2) + "\n{{{not valid json at all")
+        _write("partest___devices.json", '{"devices": [{"id": 1}, {"id": 2}]}')
+
+        res = extractor_worker.extract(
+            "partest", "test", manifest_dir=str(tmp_path), batch_size=2, workers=2
+        )
+        assert res["status"] == "success"
+        assert [e["file"] for e in res["partial_errors"]] == [
+            "partest___events___bad.jsonl"
+        ]
+
+        with DatabaseSession(test_db_path) as conn:
+            counts = dict(
+                conn.execute(
+                    "SELECT f.opfs_filename, COUNT(r.id) FROM uploaded_files f "
+                    "LEFT JOIN raw_data r ON r.file_id = f.id WHERE f.upload_id = ? "
+                    "GROUP BY f.id",
+                    (res["upload_id"],),
+                ).fetchall()
+            )
+            orphans = conn.execute(
+                "SELECT COUNT(*) FROM raw_data WHERE upload_id = ? AND file_id NOT IN "
+                "(SELECT id FROM uploaded_files)",
+                (res["upload_id"],),
+            ).fetchone()[0]
+
+        assert counts == {
+            "partest___events___a.jsonl": 5,
+            "partest___events___b.jsonl": 3,
+            "partest___devices.json": 2,
+        }
+        assert orphans == 0
+
+    def test_consumer_stopping_early_does_not_hang(self, tmp_path):
+        import threading
+
+        jobs = []
+        for i in range(4):
+            path = tmp_path / f"events{i}.jsonl"
+            path.write_text(_jsonl(200))
+            jobs.append(
+                {
+                    "opfs_filename": path.name,
+                    "opfs_filepath": str(path),
+                    "manifest_file_id": "par_events",
+                    "parser_cfg": {"format": "jsonl"},
+                }
+            )
+        messages = extractor_worker._iter_parallel(jobs, batch_size=1, workers=2)
+        assert next(messages)[0].startswith("events")
+
+        # workers are left blocked on the full queue; closing must still return
+        closer = threading.Thread(target=messages.close, daemon=True)
+        closer.start()
+        closer.join(timeout=30)
+        assert not closer.is_alive()
+
+
+class TestReuploadReuse:
+    def test_identical_file_is_cloned_not_parsed(self, test_db_path):
+        from semantic_map.worker import map as semantic_map
+
+        _write(DISCORD_EVENTS, _jsonl(4))
+        first = extractor_worker.extract("discord", "test")
+        semantic_map("discord", first["upload_id"], db_path=test_db_path)
+
+        _write(DISCORD_EVENTS, _jsonl(4))
+        second = extractor_worker.extract("discord", "test")
+        assert second["status"] == "success"
+        assert second["reuse_summary"]["files_reused"] == 1
+        assert second["reuse_summary"]["records_cloned"] == 4
+        semantic_map("discord", second["upload_id"], db_path=test_db_path)
+
+        with DatabaseSession(test_db_path) as conn:
+            status, new_file_id = conn.execute(
+                "SELECT parse_status, id FROM uploaded_files WHERE upload_id = ?",
+                (second["upload_id"],),
+            ).fetchone()
+            ids = [
+                {r[0] for r in conn.execute(
+                    "SELECT id FROM raw_data WHERE upload_id = ?", (u["upload_id"],)
+                )}
+                for u in (first, second)
+            ]
+            events = conn.execute(
+                "SELECT file_ids, raw_data_ids FROM events WHERE upload_id = ?",
+                (second["upload_id"],),
+            ).fetchall()
+            first_events = conn.execute(
+                "SELECT COUNT(*) FROM events WHERE upload_id = ?",
+                (first["upload_id"],),
+            ).fetchone()[0]
+
+        assert status == "reused"
+        assert len(ids[1]) == 4 and not ids[0] & ids[1]
+        assert len(events) == first_events > 0
+        for file_ids, raw_data_ids in events:
+            assert json.loads(file_ids) == [new_file_id]
+            assert set(json.loads(raw_data_ids)) <= ids[1]
+
+    def test_cloned_rows_are_not_normalized_again(self, test_db_path):
+        pytest.importorskip("ua_extract")
+        from semantic_map.worker import map as semantic_map
+        from field_normalization.worker import normalize
+
+        _write(DISCORD_EVENTS, _jsonl(4))
+        first = extractor_worker.extract("discord", "test")
+        semantic_map("discord", first["upload_id"], db_path=test_db_path)
+        assert normalize(first["upload_id"], db_path=test_db_path)["records_normalized"]
+
+        _write(DISCORD_EVENTS, _jsonl(4))
+        second = extractor_worker.extract("discord", "test")
+        semantic_map("discord", second["upload_id"], db_path=test_db_path)
+        with DatabaseSession(test_db_path) as conn:
+            # an origin determine_origin could not tell doesn't mark a row as pending
+            conn.execute(
+                "UPDATE events SET origin = NULL WHERE upload_id = ?",
+                (second["upload_id"],),
+            )
+            conn.commit()
+
+        result = normalize(second["upload_id"], db_path=test_db_path)
+        assert result["records_normalized"] == 0
+
+    def test_changed_manifest_is_not_reused(self, test_db_path, tmp_path):
+        import shutil
+        import yaml
+
+        _write(DISCORD_EVENTS, _jsonl(4))
+        first = extractor_worker.extract("discord", "test")
+
+        manifest_dir = str(tmp_path / "manifests")
+        shutil.copytree(builtins.MANIFESTS_DIR, manifest_dir)
+        path = os.path.join(manifest_dir, "discord.yaml")
+        with open(path, encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        for view in config["views"]:
+            view.setdefault("static", {})["note"] = "mapping changed"
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(config, f)
+
+        _write(DISCORD_EVENTS, _jsonl(4))
+        second = extractor_worker.extract("discord", "test", manifest_dir=manifest_dir)
+        assert second["reuse_summary"]["files_reused"] == 0
+
+        with DatabaseSession(test_db_path) as conn:
+            digests = conn.execute(
+                "SELECT upload_id, parse_status, config_digest FROM uploaded_files"
+            ).fetchall()
+        by_upload = {r[0]: r[1:] for r in digests}
+        assert by_upload[second["upload_id"]][0] == "success"
+        assert by_upload[first["upload_id"]][1] != by_upload[second["upload_id"]][1]
+
+
+class TestColumnarRawData:
+    def test_codec_round_trip(self):
+        from python_core.utils import raw_codec
+
+        first = {"a": 1, "b": "x" * 200, "__line_numbers": [1, 1]}
+        encoder = raw_codec.RawEncoder(raw_codec.COLUMNAR_ZLIB, first)
+        assert encoder.keys == ["a", "b"]
+
+        for record, expected_encoding in [
+            ({"a": 1, "b": "x" * 200}, raw_codec.COLUMNAR_ZLIB),
+            ({"a": 2, "b": "short"}, raw_codec.COLUMNAR),
+            ({"a": 3, "c": []}, None),  # different keys stay plain JSON
+        ]:
+            data, encoding = encoder.encode(record)
+            assert encoding == expected_encoding
+            assert raw_codec.decode(data, encoding, json.dumps(encoder.keys)) == record
+
+        with pytest.raises(ValueError):
+            raw_codec.RawEncoder("parquet")
+
+    def test_columnar_upload_maps_like_json(self, test_db_path):
+        from semantic_map.worker import map as semantic_map
+
+        results = {}
+        for encoding in (None, "columnar"):
+            _write(DISCORD_EVENTS, _jsonl(5))
+            res = extractor_worker.extract("discord", "test", raw_encoding=encoding)
+            assert res["status"] == "success"
+            semantic_map("discord", res["upload_id"], db_path=test_db_path)
+            results[encoding] = res["upload_id"]
+            # clear the hash so the second run parses instead of reusing
+            with DatabaseSession(test_db_path) as conn:
+                conn.execute("UPDATE uploaded_files SET file_hash = NULL")
+
+        with DatabaseSession(test_db_path) as conn:
+            keys, encodings = conn.execute(
+                "SELECT f.raw_keys, GROUP_CONCAT(DISTINCT r.encoding) FROM raw_data r "
+                "JOIN uploaded_files f ON f.id = r.file_id WHERE r.upload_id = ?",
+                (results["columnar"],),
+            ).fetchone()
+            attributes = [
+                sorted(
+                    r[0]
+                    for r in conn.execute(
+                        "SELECT attributes FROM events WHERE upload_id = ?", (upload_id,)
+                    )
+                )
+                for upload_id in results.values()
+            ]
+
+        assert json.loads(keys) == ["event_type", "ip"]
+        assert encodings == "columnar"
+        assert attributes[0] == attributes[1] and len(attributes[0]) == 5
+
+    def test_missing_columns_added_to_older_databases(self, tmp_path):
+        import sqlite3
+
+        db_path = str(tmp_path / "old.db")
+        old = sqlite3.connect(db_path)
+        old.execute(
+            "CREATE TABLE raw_data (id TEXT PRIMARY KEY, upload_id TEXT, "
+            "file_id TEXT, data JSONTEXT, line_numbers JSONTEXT)"
+        )
+        old.close()
+
+        with DatabaseSession(db_path) as conn:
+            columns = {r[1] for r in conn.execute("PRAGMA table_info(raw_data)")}
+        assert "encoding" in columns
@@ -0,0 +1,37 @@
+import uuid
+from python_core.utils import id_utils
+
+
+class TestIdUtils:
+    def test_ids_are_sortable_and_unique(self):
+        ids = [id_utils.new_id() for _ in range(5000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+        assert all(len(i) == id_utils.ID_LENGTH for i in ids)
+
+    def test_time_prefix_orders_across_milliseconds(self, monkeypatch):
+        monkeypatch.setattr(id_utils, "_last_ms", -1)
+        monkeypatch.setattr(id_utils.time, "time_ns", lambda: 1_000_000_000_000_000)
+        early = id_utils.new_id()
+        monkeypatch.setattr(id_utils.time, "time_ns", lambda: 2_000_000_000_000_000)
+        late = id_utils.new_id()
+        assert early[: id_utils.TIME_CHARS] < late[: id_utils.TIME_CHARS]
+
+    def test_clock_stepping_back_stays_monotonic(self, monkeypatch):
+        monkeypatch.setattr(id_utils, "_last_ms", -1)
+        monkeypatch.setattr(id_utils.time, "time_ns", lambda: 3_000_000_000_000_000)
+        first = id_utils.new_id()
+        monkeypatch.setattr(id_utils.time, "time_ns", lambda: 2_500_000_000_000_000)
+        assert id_utils.new_id() > first
+
+    def test_derived_ids(self):
+        parent = id_utils.new_id()
+        copy = id_utils.derived_id(parent, "old-row")
+        assert copy == id_utils.derived_id(parent, "old-row")
+        assert copy != id_utils.derived_id(parent, "other-row")
+        assert copy[: id_utils.TIME_CHARS] == parent[: id_utils.TIME_CHARS]
+
+        legacy = str(uuid.uuid4())
+        assert id_utils.derived_id(legacy, "old-row") == str(
+            uuid.uuid5(uuid.UUID(legacy), "old-row")
+        )
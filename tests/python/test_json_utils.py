@@ -0,0 +1,44 @@
+import pytest
+from python_core.utils.json_utils import compile_path, get_value_at_path
+
+RECORD = {
+    "action": "Login",
+    "session": {"ip": "10.0.0.1", "none": None},
+    "items": [{"User Info": {"id": 42}}, "x"],
+    "Device ID": 0,
+}
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("action", "Login"),
+        ("session.ip", "10.0.0.1"),
+        ("items[0].'User Info'.id", 42),
+        ("items[1]", "x"),
+        ("items[2]", "missing"),
+        ("'Device ID'", 0),
+        ("session.none", "missing"),
+        ("action.length", "missing"),
+        ("session[0]", "missing"),
+        ("nope", "missing"),
+    ],
+)
+def test_compiled_path_matches_get_value_at_path(path, expected):
+    assert get_value_at_path(RECORD, path, "missing") == expected
+    assert compile_path(path).get(RECORD, "missing") == expected
+
+
+def test_flat_keys_take_the_fast_path():
+    assert compile_path("action").flat_key == "action"
+    assert compile_path("'Device ID'").flat_key == "Device ID"
+    assert compile_path("session.ip").flat_key is None
+    assert compile_path("items[0]").flat_key is None
+    assert compile_path("session.ip") is compile_path("session.ip")
+
+
+def test_missing_data_or_path():
+    assert get_value_at_path(None, "a") == ""
+    assert get_value_at_path(RECORD, "") == ""
+    assert get_value_at_path(RECORD, None, 1) == 1
+    assert compile_path("a").get(None, 1) == 1
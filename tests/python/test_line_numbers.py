@@ -48,9 +48,19 @@ class TestJSONLineNumbers:
         content = '[\n  {"a": 1},\n  {"b": 2}\n]'
         records = JSONParser.extract(content)
         assert len(records) == 2
-        # All records in the array share the full file range
-        assert records[0]["__line_numbers"] == [1, 4]
-        assert records[1]["__line_numbers"] == [1, 4]
+        # Each element spans its own lines
+        assert records[0]["__line_numbers"] == [2, 2]
+        assert records[1]["__line_numbers"] == [3, 3]
+
+    def test_json_root_multiline_elements(self):
+        content = '{"meta": {\n  "v": 1\n},\n "devices_v2": [\n  {"a": 1,\n   "b": 2},\n  {"a": 3}\n]}\n'
+        records = JSONParser.extract(content, {"json_root": "devices_v2[]"})
+        assert [r["__line_numbers"] for r in records] == [[5, 6], [7, 7]]
+
+    def test_lenient_json_falls_back_to_file_range(self):
+        content = '[\n  {"a": 1,},\n  {"b": 2}\n]\n'
+        records = JSONParser.extract(content)
+        assert [r["__line_numbers"] for r in records] == [[1, 4], [1, 4]]
 
 
 class TestCSVLineNumbers:
@@ -90,6 +100,17 @@ MOBILE,Apple,iOS"""
         assert records[1]["__line_numbers"] == [3, 4]  # spans multiline value
         assert records[2]["__line_numbers"] == [5, 5]
 
+    def test_blank_lines_counted(self):
+        content = 'Name,Age\nAlice,30\n\nBob,25'
+        records = CSVParser.extract(content)
+        assert len(records) == 2
+        assert records[1]["__line_numbers"] == [4, 4]
+
+    def test_short_row_padded(self):
+        records = CSVParser.extract("Name,Age\nAlice")
+        assert records[0]["Age"] == ""
+        assert records[0]["__line_numbers"] == [2, 2]
+
 
 class TestCSVMultiLineNumbers:
     def test_concatenated_csv(self):
@@ -111,6 +132,12 @@ LA,USA"""
             assert "__line_numbers" in record
             assert isinstance(record["__line_numbers"], list)
 
+    def test_concatenated_csv_exact_lines(self):
+        content = "Devices\nDevice Type,Brand\nMOBILE,Apple\nMOBILE,Google\n\n\nLocations\nCity,Country\nNYC,USA"
+        records = CSVMultiParser.extract(content)
+        assert [r["__line_numbers"] for r in records] == [[3, 3], [4, 4], [9, 9]]
+        assert records[2]["__segment_header"] == "Locations"
+
 
 class TestHTMLTableLineNumbers:
     def test_single_line_html_table(self):
@@ -128,9 +155,9 @@ class TestHTMLTableLineNumbers:
 </table>"""
         records = HTMLTableParser.extract(content)
         assert len(records) == 2
-        # All rows share the full HTML file range
-        assert records[0]["__line_numbers"] == [1, 5]
-        assert records[1]["__line_numbers"] == [1, 5]
+        # Each row spans its own <tr>
+        assert records[0]["__line_numbers"] == [3, 3]
+        assert records[1]["__line_numbers"] == [4, 4]
 
     def test_multiple_tables_html(self):
         content = """<table>
@@ -143,8 +170,8 @@ class TestHTMLTableLineNumbers:
 </table>"""
         records = HTMLTableParser.extract(content)
         assert len(records) == 2
-        assert records[0]["__line_numbers"] == [1, 8]
-        assert records[1]["__line_numbers"] == [1, 8]
+        assert records[0]["__line_numbers"] == [3, 3]
+        assert records[1]["__line_numbers"] == [7, 7]
 
 
 class TestHTMLMyActivityLineNumbers:
@@ -188,5 +215,17 @@ class TestJSONLabelValuesLineNumbers:
         assert records[0]["__line_numbers"] == [1, 4]
 
 
+class TestLineIndex:
+    def test_offsets_and_totals(self):
+        from python_core.utils.line_index import LineIndex
+
+        index = LineIndex("ab\ncd\n\nef")
+        assert index.total_lines == 4
+        assert [index.line_of(i) for i in (0, 2, 3, 5, 6, 7)] == [1, 1, 2, 2, 3, 4]
+        assert index.span(3, 6) == [2, 2]  # "cd\n" ends on its own newline
+        assert LineIndex("").full_span == [1, 1]
+        assert LineIndex("x\n").full_span == [1, 1]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
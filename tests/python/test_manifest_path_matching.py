@@ -103,3 +103,43 @@ class TestManifestPathMatching:
             assert cfg.get("id") == "ggl_access_log_devices", (
                 f"Expected ggl_access_log_devices for {opfs_filename}, got {cfg.get('id')}"
             )
+
+
+class TestManifestCache:
+    MANIFEST = """
+files:
+  - id: first
+    path: "a/*/x*.json"
+  - id: second
+    path: "a/b/*.json"
+views:
+  - file: {id: first}
+"""
+
+    def test_combined_globs_keep_first_match_order(self, tmp_path):
+        (tmp_path / "demo.yaml").write_text(self.MANIFEST)
+        manifest = Manifest("demo", manifest_dir=str(tmp_path))
+
+        assert manifest.get_file_cfg("demo___a___b___x1.json")["id"] == "first"
+        assert manifest.get_file_cfg("demo___a___b___y.json")["id"] == "second"
+        assert manifest.get_file_cfg("demo___A___B___Y.JSON")["id"] == "second"
+        assert manifest.get_file_cfg("demo___a___y.json") == {}
+
+    def test_yaml_parsed_once_until_it_changes(self, tmp_path, monkeypatch):
+        import manifest as manifest_module
+
+        path = tmp_path / "demo.yaml"
+        path.write_text(self.MANIFEST)
+        Manifest("demo", manifest_dir=str(tmp_path))
+
+        def fail(_):
+            raise AssertionError("YAML parsed again")
+
+        monkeypatch.setattr(manifest_module.yaml, "safe_load", fail)
+        cached = Manifest("demo", manifest_dir=str(tmp_path))
+        assert cached.views("first") == [{"file": {"id": "first"}}]
+        monkeypatch.undo()
+
+        path.write_text(self.MANIFEST.replace("id: second", "id: renamed"))
+        changed = Manifest("demo", manifest_dir=str(tmp_path))
+        assert changed.get_file_cfg("demo___a___b___y.json")["id"] == "renamed"
@@ -66,3 +66,417 @@ class TestSemanticMap:
                     f"Attributes should be dict, got {type(attrs)}"
                 )
                 assert len(attrs) > 0, f"Row {row['id']} has empty attributes"
+
+
+class TestViewPlan:
+    VIEW = {
+        "file": {
+            "id": "f",
+            "where": {"source": "action", "op": "==", "value": "Login"},
+        },
+        "static": {"event_kind": "event", "Event.Action": "login"},
+        "fields": [
+            {
+                "target": "IP.Address",
+                "source": ["ip", "session.ip"],
+                "transform": "coalesce",
+            },
+            {"target": "browser", "source": ["ua", "agent"]},
+            {"target": "version", "source": "ua", "regex": r"Chrome/(\d+)"},
+            {"target": "timestamp", "source": "time", "type": "datetime"},
+        ],
+    }
+
+    def test_plan_maps_records(self):
+        from semantic_map.view_plan import ViewPlan
+
+        plan = ViewPlan(self.VIEW)
+        login = {
+            "action": "login",
+            "ip": "",
+            "session": {"ip": "1.2.3.4"},
+            "ua": "Mozilla Chrome/120.0",
+            "time": "2024-01-15T10:00:00Z",
+        }
+        assert plan.applies(login)
+        assert plan.applies({"action": "Login", "ip": "5.6.7.8"})
+        assert not plan.applies({"action": "Logout", "ip": "5.6.7.8"})
+
+        assert plan.map(login) == {
+            "event_kind": "event",
+            "event_action": "login",
+            "ip_address": "1.2.3.4",  # coalesce skips the empty "ip"
+            "browser": "Mozilla Chrome/120.0",  # no transform: first source only
+            "version": "120",
+            "timestamp": 1705312800000,
+        }
+        curl = {"action": "Login", "ip": "5.6.7.8", "ua": "curl", "time": ""}
+        mapped = plan.map(curl)
+        assert mapped["ip_address"] == "5.6.7.8"
+        assert mapped["version"] == "" and mapped["timestamp"] == 0
+
+    def test_manifest_caches_plans(self):
+        import builtins
+        from manifest import Manifest
+
+        manifest = Manifest("discord", manifest_dir=builtins.MANIFESTS_DIR)
+        plans = manifest.view_plans("discord_analytics_login")
+        again = Manifest("discord", manifest_dir=builtins.MANIFESTS_DIR)
+        assert again.view_plans("discord_analytics_login") is plans
+        # date parsers live on the compiled manifest with its plans
+        assert again.date_parsers is manifest.date_parsers
+        dates = [f.dates for p in plans for f in p.fields if f.dates is not None]
+        assert dates
+        assert all(d in manifest.date_parsers.values() for d in dates)
+
+
+TABULAR_MANIFEST = """
+id: tabtest
+files:
+  - id: "tab_logins"
+    path: "logins.csv"
+    parser:
+      format: "csv"
+views:
+  - file:
+      id: "tab_logins"
+      where: {source: "Activity", op: "==", value: "login"}
+    static: {event_kind: "event", event_action: "login"}
+    fields:
+      - {target: "timestamp", source: "Time", type: "datetime"}
+      - {target: "ip", source: ["IP", "Fallback IP"], transform: "coalesce"}
+      - {target: "chrome", source: "User Agent", regex: "Chrome/(\\\\d+)"}
+  - file:
+      id: "tab_logins"
+      where:
+        logic: "any"
+        conditions:
+          - {source: "User Agent", op: "contains", value: "iphone"}
+          - {source: "'Device'", op: "startswith", value: "pix"}
+    static: {event_kind: "entity", entity_type: "session"}
+    fields:
+      - {target: "device", source: "Device"}
+      - {target: "first_char", source: "Device[0]"}
+"""
+
+
+TABULAR_KEYS = ("Activity", "Time", "IP", "Fallback IP", "User Agent", "Device")
+TABULAR_ROWS = [
+    dict(zip(TABULAR_KEYS, values))
+    for values in [
+        ("Login", "2024-01-15T10:00:00Z", "", "10.0.0.1", "Chrome/120 iPhone", "iPad"),
+        ("logout", "2024-01-15T11:00:00Z", "10.0.0.2", "", "Firefox", "Pixel 8"),
+        ("LOGIN", "2024-01-16T09:30:00Z", "10.0.0.3", None, "Chrome/99", None),
+    ]
+] + [
+    {"Activity": "login", "Device": "odd row with other keys"},
+    ["not", "a", "record"],
+]
+
+
+DEDUP_MANIFEST = """
+id: duptest
+files:
+  - id: "dup_logins"
+    path: "logins.csv"
+    parser:
+      format: "csv"
+views:
+  - file:
+      id: "dup_logins"
+    static: {event_kind: "event", event_action: "login"}
+    fields:
+      - {target: "timestamp", source: "Time", type: "datetime"}
+      - {target: "ip", source: "IP"}
+  - file:
+      id: "dup_logins"
+    static: {event_kind: "event", event_action: "login"}
+    fields:
+      - {target: "timestamp", source: "Time", type: "datetime"}
+      - {target: "note", source: "Note"}
+"""
+
+
+class TestColumnarMapping:
+    ROWS = TABULAR_ROWS
+
+    def _cursor_rows(self, encoding):
+        from python_core.utils.raw_codec import RawEncoder
+
+        encoder = RawEncoder(encoding, self.ROWS[0])
+        rows = []
+        for i, record in enumerate(self.ROWS):
+            if isinstance(record, dict):
+                data, row_encoding = encoder.encode(record)
+            else:
+                data, row_encoding = json.dumps(record), None
+            keys = json.dumps(encoder.keys)
+            rows.append((f"raw{i}", "file1", data, "tab_logins", row_encoding, keys))
+        return rows
+
+    @staticmethod
+    def _summary(event_rows, device_rows):
+        return sorted(
+            json.dumps([r.raw_data_ids, r.timestamp, r.attributes]) for r in event_rows
+        ) + sorted(json.dumps([r[3], r[6]]) for r in device_rows)
+
+    def test_columnar_matches_per_record(self, tmp_path, monkeypatch):
+        from manifest import Manifest
+        from semantic_map import columnar
+        from semantic_map.worker import _generate_table_rows
+
+        (tmp_path / "tabtest.yaml").write_text(TABULAR_MANIFEST)
+        manifest = Manifest("tabtest", manifest_dir=str(tmp_path))
+        plans = manifest.view_plans("tab_logins")
+        assert [columnar.is_columnar(p) for p in plans] == [True, False]
+
+        results = [
+            self._summary(*_generate_table_rows(self._cursor_rows(enc), manifest, "u"))
+            for enc in (None, "columnar")
+        ]
+        monkeypatch.setattr(columnar, "is_tabular", lambda *_: False)
+        per_record = self._summary(
+            *_generate_table_rows(self._cursor_rows(None), manifest, "u")
+        )
+
+        assert results[0] == results[1] == per_record
+        assert len(per_record) == 3 + 2  # 3 logins, 2 sessions
+
+    def test_columnar_dedups_like_per_record(self, tmp_path, monkeypatch):
+        from manifest import Manifest
+        from semantic_map import columnar
+        from semantic_map.deduplicate_events import EventDeduplicator
+        from semantic_map.worker import _generate_table_rows
+
+        (tmp_path / "duptest.yaml").write_text(DEDUP_MANIFEST)
+        manifest = Manifest("duptest", manifest_dir=str(tmp_path))
+        when = "2024-01-15T10:00:00Z"
+        records = [
+            {"Time": when, "IP": "10.0.0.1"},
+            {"Time": when, "IP": "10.0.0.2", "Note": "extra column"},
+            {"Time": when, "IP": "10.0.0.3"},
+        ]
+        rows = [
+            (f"raw{i}", "file1", json.dumps(r), "dup_logins", None, None)
+            for i, r in enumerate(records)
+        ]
+
+        def deduplicated():
+            events, _ = _generate_table_rows(list(rows), manifest, "u")
+            kept = EventDeduplicator.from_manifest(manifest).add(events)
+            return [(e.raw_data_ids, e.attributes, e.extra_timestamps) for e in kept]
+
+        tabular = deduplicated()
+        monkeypatch.setattr(columnar, "is_tabular", lambda *_: False)
+        per_record = deduplicated()
+
+        assert tabular == per_record
+        assert tabular[0][0] == ["raw0", "raw0", "raw1", "raw1", "raw2", "raw2"]
+
+    def test_column_filter_matches_make_filter(self):
+        from utils.filter_builder import make_column_filter, make_filter
+        from semantic_map.columnar import ColumnBlock
+
+        block = ColumnBlock("f", ("a", "b"))
+        block.rows = [["Foo", 1], [None, 2], ["foobar", None]]
+        records = [dict(zip(block.keys, r)) for r in block.rows]
+        for where in [
+            {"source": "a", "op": "==", "value": "FOO"},
+            {"source": "a", "op": "!=", "value": "foo"},
+            {"source": "a", "op": "ends_with", "value": "BAR"},
+            {"source": "b", "op": "eq", "value": 2},
+            {"source": "a", "op": "regex", "value": "x"},
+            {
+                "logic": "all",
+                "conditions": [
+                    {"source": "a", "op": "contains", "value": "foo"},
+                    {"source": "b", "op": "ne", "value": "1"},
+                ],
+            },
+        ]:
+            column_filter = make_column_filter(where)
+            assert column_filter(block) == [make_filter(where)(r) for r in records]
+        assert make_column_filter({"source": "a.b", "op": "==", "value": "x"}) is None
+
+
+class TestChunkedMapping:
+    def _upload(self, db_path, raw_encoding, upload_id="u"):
+        from db_session import DatabaseSession
+        from python_core.utils.raw_codec import RawEncoder
+
+        with DatabaseSession(str(db_path)) as conn:
+            conn.execute(
+                "INSERT INTO uploads (id, platform) VALUES (?, 'tabtest')", (upload_id,)
+            )
+            encoders = {}
+            for file_id in ("f2", "f1"):
+                encoders[file_id] = RawEncoder(raw_encoding, TABULAR_ROWS[0])
+                conn.execute(
+                    "INSERT INTO uploaded_files (id, manifest_file_id, upload_id, raw_keys) VALUES (?, 'tab_logins', ?, ?)",
+                    (upload_id + file_id, upload_id, json.dumps(encoders[file_id].keys)),
+                )
+            # the two files' rows interleave in rowid order
+            for i, record in enumerate(TABULAR_ROWS * 2):
+                file_id = ("f1", "f2")[i % 2]
+                if isinstance(record, dict):
+                    data, encoding = encoders[file_id].encode(record)
+                else:
+                    data, encoding = json.dumps(record), None
+                conn.execute(
+                    "INSERT INTO raw_data (id, upload_id, file_id, data, encoding) VALUES (?, ?, ?, ?, ?)",
+                    (f"{upload_id}raw{i}", upload_id, upload_id + file_id, data, encoding),
+                )
+            conn.commit()
+
+    @staticmethod
+    def _mapped(db_path):
+        from db_session import DatabaseSession
+
+        with DatabaseSession(str(db_path)) as conn:
+            events = conn.execute(
+                "SELECT raw_data_ids, timestamp, attributes FROM events ORDER BY raw_data_ids"
+            ).fetchall()
+            devices = conn.execute(
+                "SELECT raw_data_id, attributes FROM devices_raw ORDER BY raw_data_id"
+            ).fetchall()
+        return [tuple(r) for r in events], [tuple(r) for r in devices]
+
+    def test_iter_raw_chunks_groups_files(self, tmp_path):
+        from db_session import DatabaseSession
+        from semantic_map.worker import _iter_raw_chunks
+
+        self._upload(tmp_path / "t.db", "columnar")
+        with DatabaseSession(str(tmp_path / "t.db")) as conn:
+            chunks = list(_iter_raw_chunks(conn, "u", 2))
+
+        assert all(len({r[1] for r in chunk}) == 1 for chunk in chunks)
+        assert [len(c) for c in chunks] == [2, 2, 1, 2, 2, 1]
+        ids = [r[0] for chunk in chunks for r in chunk]
+        assert ids == [f"uraw{i}" for i in (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)]
+
+    def test_chunk_size_does_not_change_output(self, tmp_path):
+        (tmp_path / "tabtest.yaml").write_text(TABULAR_MANIFEST)
+        results = []
+        for chunk_size in (1, 3, 5000):
+            db_path = tmp_path / f"chunk{chunk_size}.db"
+            self._upload(db_path, "columnar")
+            semantic_map(
+                "tabtest",
+                "u",
+                db_path=str(db_path),
+                manifest_dir=str(tmp_path),
+                chunk_size=chunk_size,
+            )
+            results.append(self._mapped(db_path))
+
+        events, devices = results[0]
+        assert len(events) == 4 and len(devices) == 4  # both files' logins merge
+        assert results[0] == results[1] == results[2]
+
+    def test_dedup_across_uploads(self, tmp_path):
+        from db_session import DatabaseSession
+
+        (tmp_path / "tabtest.yaml").write_text(TABULAR_MANIFEST)
+        db_path = tmp_path / "t.db"
+        query = "SELECT id, raw_data_ids, attributes, duplicate_of FROM events WHERE upload_id = ? AND event_kind = 'event' AND timestamp > 0 ORDER BY id"
+        for upload_id in ("a", "b"):
+            self._upload(db_path, None, upload_id)
+            semantic_map(
+                "tabtest",
+                upload_id,
+                db_path=str(db_path),
+                manifest_dir=str(tmp_path),
+                across_uploads=True,
+            )
+            if upload_id == "a":
+                with DatabaseSession(str(db_path)) as conn:
+                    a_events = conn.execute(query, ("a",)).fetchall()
+
+        with DatabaseSession(str(db_path)) as conn:
+            # upload a's events are left as they were; b's logins point at them
+            assert conn.execute(query, ("a",)).fetchall() == a_events
+            assert [len(json.loads(r[1])) for r in a_events] == [2, 2]
+            b_events = conn.execute(query, ("b",)).fetchall()
+            assert sorted(r[3] for r in b_events) == sorted(r[0] for r in a_events)
+            assert all(i.startswith("b") for r in b_events for i in json.loads(r[1]))
+
+            # removing the earlier upload turns b's events into originals
+            conn.execute("DELETE FROM uploads WHERE id = 'a'")
+            assert [r[3] for r in conn.execute(query, ("b",))] == [None, None]
+            conn.rollback()
+
+            # removing the new upload leaves nothing of it in a's events
+            conn.execute("DELETE FROM uploads WHERE id = 'b'")
+            assert conn.execute(query, ("a",)).fetchall() == a_events
+            raw_ids = {r[0] for r in conn.execute("SELECT id FROM raw_data")}
+            assert all(set(json.loads(r[1])) <= raw_ids for r in a_events)
+
+    def test_partly_reused_upload_clones_each_device_once(self, tmp_path):
+        import uuid
+        from db_session import DatabaseSession
+        from python_core.utils import reuse_utils
+
+        (tmp_path / "tabtest.yaml").write_text(TABULAR_MANIFEST)
+        db_path = tmp_path / "t.db"
+        # reuse derives ids from the new upload and file ids, so they are real uuids
+        a, b, reused = (str(uuid.uuid4()) for _ in range(3))
+        self._upload(db_path, None, a)
+        self._upload(db_path, None, b)
+        # b's f1 is a reused copy of a's f1, whose logins merged with f2's in a
+        with DatabaseSession(str(db_path)) as conn:
+            conn.execute("DELETE FROM raw_data WHERE file_id = ?", (b + "f1",))
+            conn.execute(
+                "UPDATE uploaded_files SET id = ? WHERE id = ?", (reused, b + "f1")
+            )
+            reuse_utils.register(conn)
+            reuse_utils.clone_raw_data(conn, a + "f1", reused, b)
+            conn.commit()
+        for upload_id in (a, b):
+            semantic_map(
+                "tabtest", upload_id, db_path=str(db_path), manifest_dir=str(tmp_path)
+            )
+
+        query = "SELECT COUNT(*), COUNT(DISTINCT raw_data_id) FROM devices_raw WHERE upload_id = ? GROUP BY file_id"
+        with DatabaseSession(str(db_path)) as conn:
+            a_devices = conn.execute(query, (a,)).fetchall()
+            b_devices = conn.execute(query, (b,)).fetchall()
+            remapped = conn.execute(
+                "SELECT COUNT(*) FROM events WHERE upload_id = ? AND file_ids LIKE ? AND file_ids LIKE ?",
+                (b, f"%{reused}%", f"%{b}f2%"),
+            ).fetchone()[0]
+
+        assert remapped > 0  # some of the reused file's rows were mapped again
+        assert [tuple(r) for r in a_devices] == [(2, 2), (2, 2)]
+        assert [tuple(r) for r in b_devices] == [(2, 2), (2, 2)]
+
+    def test_fused_normalization_matches_normalize_pass(self, tmp_path):
+        pytest.importorskip("ua_extract")
+        from db_session import DatabaseSession
+        from field_normalization.worker import normalize
+
+        (tmp_path / "tabtest.yaml").write_text(TABULAR_MANIFEST)
+        results = []
+        for fused in (False, True):
+            db_path = tmp_path / f"fused{fused}.db"
+            self._upload(db_path, "columnar")
+            semantic_map(
+                "tabtest",
+                "u",
+                db_path=str(db_path),
+                manifest_dir=str(tmp_path),
+                normalize=fused,
+            )
+            if not fused:
+                normalize("u", db_path=str(db_path))
+            with DatabaseSession(str(db_path)) as conn:
+                results.append(
+                    conn.execute(
+                        "SELECT raw_data_ids, attributes, origin, treat_as_auth_device FROM events ORDER BY raw_data_ids"
+                    ).fetchall()
+                    + conn.execute(
+                        "SELECT raw_data_id, attributes, origin, NULL FROM devices_raw ORDER BY raw_data_id"
+                    ).fetchall()
+                )
+
+        assert results[0] == results[1]
+        assert all(row[2] is not None for row in results[1])
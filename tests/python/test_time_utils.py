@@ -0,0 +1,43 @@
+import pytest
+from utils.time_utils import DateParser, parse_date, unix_ms
+
+
+def _same_as_dateutil(values):
+    parser = DateParser()
+    for value in values:
+        assert parser.unix_ms(value) == unix_ms(parse_date(value)), value
+    return parser
+
+
+class TestDateParser:
+    def test_learns_a_format_then_uses_strptime(self):
+        values = [f"2024-01-{d:02d} 10:{d:02d}:00 UTC" for d in range(1, 29)]
+        parser = _same_as_dateutil(values + values)
+
+        assert parser.stats["format"] == "%Y-%m-%d %H:%M:%S %Z"
+        assert parser.stats["learned"] == DateParser.LEARN_SAMPLES
+        assert parser.stats["fast"] == 28 - DateParser.LEARN_SAMPLES
+        assert parser.stats["memo_hits"] == 28
+
+    def test_iso_variants_share_one_format(self):
+        values = [
+            "2024-01-15T10:00:00Z",
+            "2024-01-15T10:00:00.123+02:00",
+            "2024-02-01T00:00:00",
+            "2024-03-01 08:30:00",
+            "2024-04-01",
+            "2024-05-01T23:59:59.999999Z",
+        ]
+        assert _same_as_dateutil(values).stats["format"] == "iso"
+
+    def test_mismatches_fall_back_to_dateutil(self):
+        values = [f"{m}/02/2024" for m in range(1, 7)] + ["13/02/2024", "garbage", ""]
+        parser = _same_as_dateutil(values)
+
+        assert parser.stats["format"] == "%m/%d/%Y"
+        assert parser.stats["fallback"] == 1  # day-first date doesn't fit %m
+        assert parser.stats["failed"] == 2
+
+    @pytest.mark.parametrize("value", ["1705312800", 1705312800000, None])
+    def test_epochs_and_empty_values(self, value):
+        _same_as_dateutil([value])
@@ -177,20 +177,22 @@ function compileGlobalFuzzySearch(text, stringColumns) {
 // --- STATE-BASED CHIP BUILDERS ---
 
 function compileUploadFilter(uploadIds = []) {
-  /* Restricts queries to specific upload timeline sources. */
-  if (!Array.isArray(uploadIds)) {
-    return { conditions: [], params: [] };
-  }
-
-  const ids = uploadIds.filter(id => (typeof id === 'string' || typeof id === 'number') && id !== '_all');
+  /* Restricts queries to specific upload timeline sources. An event recorded as a repeat of an earlier upload's
+     event (events.duplicate_of, cross-upload deduplication) is hidden while that upload is shown as well. */
+  const ids = Array.isArray(uploadIds)
+    ? uploadIds.filter(id => (typeof id === 'string' || typeof id === 'number') && id !== '_all')
+    : [];
   if (ids.length === 0) {
-    return { conditions: [], params: [] };
+    return { conditions: ['e.duplicate_of IS NULL'], params: [] };
   }
 
   const placeholders = ids.map(() => '?').join(',');
   return {
-    conditions: [`e.upload_id IN (${placeholders})`],
-    params: ids
+    conditions: [
+      `e.upload_id IN (${placeholders})`,
+      `(e.duplicate_of IS NULL OR NOT EXISTS (SELECT 1 FROM events d WHERE d.id = e.duplicate_of AND d.upload_id IN (${placeholders})))`
+    ],
+    params: [...ids, ...ids]
   };
 }
 
@@ -0,0 +1,21 @@
+// custom to WISPR-lab/data-export-gui
+
+/* Mirrors python_core/utils/raw_codec.py: raw_data.encoding is NULL (JSON object),
+   'columnar' (value array keyed by uploaded_files.raw_keys) or 'columnar+zlib'. */
+export async function decodeRawData(data, encoding, rawKeys) {
+  if (!encoding) {
+    return JSON.parse(data);
+  }
+  if (encoding === 'columnar+zlib') {
+    // zlib.compress output is what the Compression Streams API calls 'deflate'
+    const stream = new Blob([data]).stream().pipeThrough(new DecompressionStream('deflate'));
+    data = await new Response(stream).text();
+  } else if (encoding !== 'columnar') {
+    throw new Error(`Unknown raw_data encoding: ${encoding}`);
+  }
+  const keys = typeof rawKeys === 'string' ? JSON.parse(rawKeys) : rawKeys;
+  const values = JSON.parse(data);
+  const record = {};
+  keys.forEach((key, i) => { record[key] = values[i]; });
+  return record;
+}
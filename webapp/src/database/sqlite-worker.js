@@ -1,5 +1,6 @@
 let sqlite3 = null;
 let initializedDbs = new Set(); // Track which DBs have been initialized
+let schemaCache = null; // { version, sql } of schema.sql
 
 async function getSqlite() {
   if (!sqlite3) {
@@ -9,22 +10,60 @@ async function getSqlite() {
   return sqlite3;
 }
 
+async function fetchSchema(schemaPath) {
+  /* Fetches schema SQL from a relative URL derived from schemaPath; returns { version, sql } from its '-- schema_version: N' line. */
+  if (schemaCache) return schemaCache;
+  const fetchPath = schemaPath.startsWith('/') ? `.${schemaPath}` : `./${schemaPath}`;
+  const response = await fetch(fetchPath);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch schema: ${response.status} ${response.statusText}`);
+  }
+  const sql = await response.text();
+  if (!sql || sql.trim().length === 0) {
+    throw new Error('Schema file is empty');
+  }
+  const match = sql.match(/^--\s*schema_version:\s*(\d+)/m);
+  schemaCache = { version: match ? parseInt(match[1], 10) : 0, sql };
+  return schemaCache;
+}
+
+/* MIGRATIONS of python_core/db_session.py, for databases the webapp opens before a pipeline session does:
+   [version, [[table, column, type], ...]]. Keep the two lists in step. */
+const MIGRATIONS = [
+  [1, [['uploaded_files', 'raw_keys', 'JSONTEXT'], ['raw_data', 'encoding', 'TEXT']]],
+  [2, [['uploaded_files', 'config_digest', 'TEXT']]],
+  [3, [['events', 'duplicate_of', 'TEXT REFERENCES events(id) ON DELETE SET NULL']]],
+];
+
+function addColumn(db, table, column, type) {
+  /* Same as add_column() there: a no-op if the table doesn't exist yet (schema.sql creates it) or has the column. */
+  const columns = db.exec(`SELECT name FROM pragma_table_info('${table}');`, { returnValue: 'resultRows', rowMode: 0 });
+  if (columns.length === 0 || columns.includes(column)) return;
+  console.log(`[Sqlite Worker] adding column ${table}.${column}`);
+  db.exec(`ALTER TABLE ${table} ADD COLUMN ${column} ${type};`);
+}
+
 async function ensureSchema(db, schemaPath, dbPath) {
-  /* Runs schema SQL once per dbPath lifetime (tracked by initializedDbs Set); fetches schema from a relative URL derived from schemaPath. */
+  /* Brings the DB to schema.sql's version once per dbPath lifetime (tracked by initializedDbs Set), as
+     DatabaseSession._ensure_schema does: a current DB (PRAGMA user_version) runs no DDL; an older one gets
+     the MIGRATIONS above its version, then schema.sql, then the new version, in one transaction. */
   if (initializedDbs.has(dbPath)) return; // Skip if already initialized
   try {
-    const fetchPath = schemaPath.startsWith('/') ? `.${schemaPath}` : `./${schemaPath}`;
-    const response = await fetch(fetchPath);
-    if (!response.ok) {
-      throw new Error(`Failed to fetch schema: ${response.status} ${response.statusText}`);
-    }
-    const sql = await response.text();
-    if (!sql || sql.trim().length === 0) {
-      throw new Error('Schema file is empty');
+    const current = db.selectValue('PRAGMA user_version;') || 0;
+    const { version, sql } = await fetchSchema(schemaPath);
+    if (current < version) {
+      db.transaction(() => {
+        for (const [stepVersion, columns] of MIGRATIONS) {
+          if (current < stepVersion && stepVersion <= version) {
+            columns.forEach(([table, column, type]) => addColumn(db, table, column, type));
+          }
+        }
+        db.exec(sql);
+        db.exec(`PRAGMA user_version = ${version};`);
+      });
+      console.log(`[Sqlite Worker] schema upgraded for ${dbPath} (version ${current} -> ${version})`);
     }
-    db.exec(sql);
     initializedDbs.add(dbPath); // Mark as initialized
-    console.log(`[Sqlite Worker] schema initialized for ${dbPath}`);
   } catch (e) {
     console.error('[sqlite Worker] error initializing schema:', e);
     throw e;